@@ -0,0 +1,173 @@
+"""
+Arranque de los workers: precarga y medición.
+
+Los workers se reciclan seguido, así que importa cuánto tarda uno nuevo en
+responder. wsgi.py y asgi.py llaman a precargar() antes de devolver la
+aplicación (el servidor no le pasa requests hasta entonces), que deja hecho lo
+que si no pagaría el primer request:
+
+- URLs (settings.PRECARGA): importa el URLconf (vistas, api, admin) y arma
+  los diccionarios de reverse() de todos los namespaces;
+- base de datos (settings.PRECARGA): abre las conexiones (driver, PRAGMAs de
+  connection_created). En WSGI quedan abiertas para el thread que atiende;
+  antes de un fork (gunicorn --preload) se cierran, para que ningún worker
+  herede el socket o el archivo de otro;
+- templates (settings.TEMPLATES_PRECOMPILAR): los del sitio (PLANTILLAS); los
+  del admin, que es de uso interno, se compilan con su primer request. Ver
+  blogmusica/plantillas.py.
+
+`manage.py medir_arranque` mide el arranque en procesos nuevos con
+`python -X importtime`: importar wsgi.py, el primer response y el segundo, y
+en qué se van los imports.
+"""
+import json
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Templates que se compilan al arrancar (prefijos de nombre).
+PLANTILLAS = ('musica/',)
+
+
+# ----------------------------
+# Precarga
+# ----------------------------
+
+@contextmanager
+def _fase(tiempos, nombre):
+    inicio = time.perf_counter()
+    yield
+    tiempos[nombre] = time.perf_counter() - inicio
+
+_fork_registrado = False
+
+def _cerrar_antes_del_fork():
+    global _fork_registrado
+    if not _fork_registrado:
+        os.register_at_fork(before=connections.close_all)
+        _fork_registrado = True
+
+def precargar(conservar_conexiones=True):
+    """Precarga URLs, conexiones y templates según settings. Devuelve {fase: segundos}."""
+    from . import plantillas
+
+    tiempos = {}
+    if getattr(settings, 'PRECARGA', False):
+        with _fase(tiempos, 'urls'):
+            get_resolver().reverse_dict  # arma también los de los includes (musica, admin)
+        with _fase(tiempos, 'cache'):
+            caches['default'].get('arranque:precarga')
+        with _fase(tiempos, 'base de datos'):
+            for conexion in connections.all():
+                with conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            if conservar_conexiones:
+                _cerrar_antes_del_fork()
+            else:
+                connections.close_all()
+    if getattr(settings, 'TEMPLATES_PRECOMPILAR', False):
+        with _fase(tiempos, 'templates'):
+            errores = [nombre for nombre, _s, error in plantillas.precompilar(PLANTILLAS) if error]
+        if errores:
+            logger.warning("Templates que no compilan: %s", ', '.join(errores))
+    if tiempos:
+        logger.info("Precarga: %s", ', '.join(f'{fase} {s * 1000:.0f} ms' for fase, s in tiempos.items()))
+    return tiempos
+
+
+# ----------------------------
+# Medición (procesos nuevos)
+# ----------------------------
+
+# Corre en un proceso nuevo con -X importtime; imprime los tiempos en JSON en la última línea.
+_SCRIPT = '''
+import io, json, sys, time
+inicio = time.perf_counter()
+from blogmusica.wsgi import application
+importado = time.perf_counter()
+
+def pedir(ruta):
+    ruta, _, query = ruta.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    estado = []
+    b''.join(application(environ, lambda status, headers, exc_info=None: estado.append(status)))
+    return int(estado[0].split()[0])
+
+status = pedir(sys.argv[1])
+primero = time.perf_counter()
+pedir(sys.argv[1])
+segundo = time.perf_counter()
+print(json.dumps({
+    'importar': importado - inicio, 'primer_response': primero - importado,
+    'segundo_response': segundo - primero, 'status': status,
+}))
+'''
+
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def leer_importtime(texto):
+    """[(módulo, propio µs, acumulado µs, profundidad)] de la salida de -X importtime."""
+    modulos = []
+    for linea in texto.splitlines():
+        m = _IMPORTTIME.match(linea)
+        if m:
+            propio, acumulado, sangria, nombre = m.groups()
+            modulos.append((nombre, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return modulos
+
+def por_paquete(modulos):
+    """{paquete de primer nivel: µs propios} ('django', 'PIL', 'musica', ...)."""
+    totales = {}
+    for nombre, propio, _acumulado, _profundidad in modulos:
+        paquete = nombre.split('.')[0]
+        totales[paquete] = totales.get(paquete, 0) + propio
+    return totales
+
+def medir_proceso(ruta='/', precarga=True):
+    """Arranca un proceso nuevo, importa wsgi.py y pide `ruta` dos veces. Devuelve (tiempos, módulos)."""
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'blogmusica.settings')}
+    if not precarga:
+        entorno.update(DJ_PRECARGA='False', DJ_TEMPLATES_PRECOMPILAR='False')
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT, ruta],
+        cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True, check=False,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else 'el proceso falló')
+    return json.loads(proceso.stdout.strip().splitlines()[-1]), leer_importtime(proceso.stderr)
+
+def medir(ruta='/', repeticiones=5, precarga=True):
+    """Medianas de `repeticiones` procesos: {'tiempos': {...}, 'paquetes': {...}, 'modulos': [...]}."""
+    tiempos, paquetes, acumulados = [], {}, {}
+    for _ in range(repeticiones):
+        medidos, modulos = medir_proceso(ruta, precarga)
+        tiempos.append(medidos)
+        for paquete, us in por_paquete(modulos).items():
+            paquetes.setdefault(paquete, []).append(us)
+        for nombre, _propio, acumulado, _profundidad in modulos:
+            acumulados.setdefault(nombre, []).append(acumulado)
+    claves = ('importar', 'primer_response', 'segundo_response')
+    return {
+        'tiempos': {clave: statistics.median(t[clave] for t in tiempos) for clave in claves},
+        'status': tiempos[-1]['status'],
+        'paquetes': {p: statistics.median(v) / 1e6 for p, v in paquetes.items()},
+        'modulos': {m: statistics.median(v) / 1e6 for m, v in acumulados.items()},
+    }
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogmusica.settings')
+# Sin conexiones persistentes: el ORM corre en threads de sync_to_async que no cierran las suyas.
+os.environ.setdefault('DJ_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+# Antes del primer request: URLs, conexiones y templates (ver blogmusica/arranque.py).
+from blogmusica import arranque  # noqa: E402
+
+arranque.precargar(conservar_conexiones=False)  # el ORM corre en otro thread: no sirve dejarlas abiertas
@@ -0,0 +1,55 @@
+"""
+SQLite en producción: PRAGMAs de cada conexión.
+
+Sin opciones, SQLite usa el rollback journal: mientras alguien escribe (un
+comentario, el worker) nadie puede leer, y cada request abre y cierra su
+conexión. Al abrirse cada conexión (connection_created) se aplican los
+PRAGMAs de settings.SQLITE_PRAGMAS:
+
+- journal_mode=WAL: los lectores no esperan al escritor (y viceversa); queda
+  grabado en el archivo. No funciona en sistemas de archivos de red: ahí
+  DJ_SQLITE_WAL=False;
+- synchronous=NORMAL: con WAL no se pierde consistencia, sólo las últimas
+  transacciones ante un corte de luz; un fsync por checkpoint y no por commit;
+- busy_timeout: cuánto espera un escritor el lock antes de fallar con
+  "database is locked" (el driver de Python ya usaba 5 s; queda explícito);
+- cache_size / mmap_size / temp_store: más páginas en memoria por conexión.
+
+En settings, además: conexiones persistentes con chequeo (CONN_MAX_AGE,
+CONN_HEALTH_CHECKS) para no pagar el open y los PRAGMAs en cada request, y
+transacciones IMMEDIATE (toman el lock de escritura al empezar: con DEFERRED,
+una transacción que lee y después escribe puede fallar sin esperar el busy_timeout).
+
+`manage.py medir_sqlite` compara lecturas con escrituras de comentarios
+concurrentes entre esta configuración y la de antes (ver musica/concurrencia.py).
+"""
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+def _aplicar(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Sobre la conexión del driver: no pasan por execute_wrappers ni por el log de consultas.
+    for nombre, valor in pragmas().items():
+        connection.connection.execute(f'PRAGMA {nombre} = {valor}').fetchall()
+
+def instalar():
+    """Aplica los PRAGMAs a las conexiones que se abran (musica/apps.py lo llama al arrancar)."""
+    connection_created.connect(_aplicar, dispatch_uid='basedatos_pragmas')
+
+def estado(alias='default'):
+    """{pragma: valor actual} de la conexión `alias` (la abre si hace falta)."""
+    conexion = connections[alias]
+    if conexion.vendor != 'sqlite':
+        return {}
+    conexion.ensure_connection()
+    valores = {}
+    for nombre in pragmas():
+        fila = conexion.connection.execute(f'PRAGMA {nombre}').fetchone()
+        valores[nombre] = fila[0] if fila else None  # p.ej. mmap_size en una base en memoria
+    return valores
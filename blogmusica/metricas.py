@@ -0,0 +1,379 @@
+"""
+Métricas de requests: latencia por vista, SQL, templates y cache.
+
+MetricasMiddleware mide una muestra de los requests (settings.METRICAS_MUESTREO,
+de 0 a 1) y acumula, por vista (el view_name de la URL):
+
+- histograma de latencia total del request,
+- cantidad y tiempo de consultas SQL (execute_wrapper en cada conexión),
+- tiempo de render de templates,
+- aciertos y fallos del cache por defecto (get / get_many).
+
+`/metricas/` las publica en el formato de texto de Prometheus (sólo staff, o
+con `Authorization: Bearer <METRICAS_TOKEN>` para el scraper) y
+`/metricas/lentas/` lista los METRICAS_LENTAS requests más lentos con su SQL,
+entre los que tardaron al menos METRICAS_LENTO_MS; cada vez que uno entra en
+esa lista también se registra en el log "blogmusica.metricas".
+
+Con el muestreo en 0 el middleware se desactiva al arrancar (MiddlewareNotUsed)
+y no se instala ningún gancho: costo cero. Con muestreo, un request que no
+sale sorteado sólo paga un random(); los ganchos de SQL, templates y cache
+leen un ContextVar y, fuera de un request medido, llaman directo a la función
+original. El ContextVar viaja con sync_to_async: las vistas async cuentan el
+SQL que corre en el thread del ORM.
+
+Los contadores son del proceso (cada worker de gunicorn tiene los suyos); la
+exposición lleva la etiqueta `pid` para que Prometheus no los mezcle.
+"""
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.template.backends.django import Template
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) de los buckets del histograma de latencia.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Consultas que se guardan por request lento (las de más tiempo).
+SQL_POR_REQUEST = 20
+RUTAS_PROPIAS = ('/metricas/',)
+
+_actual = ContextVar('metricas_actual', default=None)
+
+
+class Medicion:
+    """Lo que se acumula durante un request muestreado."""
+
+    __slots__ = ('consultas', 'sql_segundos', 'sql', 'template_segundos', 'aciertos', 'fallos')
+
+    def __init__(self):
+        self.consultas = 0
+        self.sql_segundos = 0.0
+        self.sql = []
+        self.template_segundos = 0.0
+        self.aciertos = 0
+        self.fallos = 0
+
+
+# ----------------------------
+# Registro (por proceso)
+# ----------------------------
+
+class _Serie:
+    __slots__ = ('buckets', 'suma', 'cantidad', 'consultas', 'sql_segundos', 'template_segundos',
+                 'aciertos', 'fallos', 'estados')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.suma = 0.0
+        self.cantidad = 0
+        self.consultas = 0
+        self.sql_segundos = 0.0
+        self.template_segundos = 0.0
+        self.aciertos = 0
+        self.fallos = 0
+        self.estados = {}
+
+
+class Registro:
+
+    def __init__(self, lentas=10, umbral=0.5):
+        self.lentas = lentas
+        self.umbral = umbral  # segundos: los más rápidos no cuentan como lentos
+        self._series = {}  # (vista, método) -> _Serie
+        self._lentos = []  # heap de (segundos, n, dict)
+        self._n = 0
+        self._lock = threading.Lock()
+
+    def agregar(self, vista, metodo, status, segundos, medicion, ruta):
+        with self._lock:
+            serie = self._series.get((vista, metodo))
+            if serie is None:
+                serie = self._series[(vista, metodo)] = _Serie()
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    serie.buckets[i] += 1
+            serie.suma += segundos
+            serie.cantidad += 1
+            serie.consultas += medicion.consultas
+            serie.sql_segundos += medicion.sql_segundos
+            serie.template_segundos += medicion.template_segundos
+            serie.aciertos += medicion.aciertos
+            serie.fallos += medicion.fallos
+            serie.estados[status] = serie.estados.get(status, 0) + 1
+
+            if not self.lentas or segundos < self.umbral:
+                return None
+            if len(self._lentos) >= self.lentas and segundos <= self._lentos[0][0]:
+                return None
+            self._n += 1
+            lento = {
+                'vista': vista, 'metodo': metodo, 'ruta': ruta, 'status': status,
+                'ms': round(segundos * 1000, 1), 'consultas': medicion.consultas,
+                'sql_ms': round(medicion.sql_segundos * 1000, 1),
+                'template_ms': round(medicion.template_segundos * 1000, 1),
+                'sql': [{'ms': round(s * 1000, 2), 'sql': sql} for s, sql in
+                        heapq.nlargest(SQL_POR_REQUEST, medicion.sql, key=lambda x: x[0])],
+            }
+            if len(self._lentos) >= self.lentas:
+                heapq.heapreplace(self._lentos, (segundos, self._n, lento))
+            else:
+                heapq.heappush(self._lentos, (segundos, self._n, lento))
+            return lento
+
+    def lentos(self):
+        with self._lock:
+            return [lento for _s, _n, lento in sorted(self._lentos, key=lambda x: -x[0])]
+
+    def prometheus(self):
+        """Texto de exposición de Prometheus (version 0.0.4)."""
+        with self._lock:
+            series = sorted(self._series.items())
+            pid = os.getpid()
+            lineas = []
+
+            def familia(nombre, tipo, ayuda):
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+
+            def etiquetas(vista, metodo, **extra):
+                pares = {'pid': pid, 'vista': vista, 'metodo': metodo, **extra}
+                return ','.join(f'{k}="{_escapar(v)}"' for k, v in pares.items())
+
+            familia('blogmusica_request_seconds', 'histogram', 'Latencia de los requests muestreados.')
+            for (vista, metodo), s in series:
+                for limite, n in zip(BUCKETS, s.buckets):
+                    lineas.append(f'blogmusica_request_seconds_bucket{{{etiquetas(vista, metodo, le=limite)}}} {n}')
+                lineas.append(f'blogmusica_request_seconds_bucket{{{etiquetas(vista, metodo, le="+Inf")}}} {s.cantidad}')
+                lineas.append(f'blogmusica_request_seconds_sum{{{etiquetas(vista, metodo)}}} {s.suma:.6f}')
+                lineas.append(f'blogmusica_request_seconds_count{{{etiquetas(vista, metodo)}}} {s.cantidad}')
+
+            familia('blogmusica_responses_total', 'counter', 'Respuestas muestreadas por código de estado.')
+            for (vista, metodo), s in series:
+                for status, n in sorted(s.estados.items()):
+                    lineas.append(f'blogmusica_responses_total{{{etiquetas(vista, metodo, status=status)}}} {n}')
+
+            for nombre, tipo, ayuda, atributo in (
+                ('blogmusica_sql_queries_total', 'counter', 'Consultas SQL de los requests muestreados.', 'consultas'),
+                ('blogmusica_sql_seconds_total', 'counter', 'Tiempo en consultas SQL.', 'sql_segundos'),
+                ('blogmusica_template_seconds_total', 'counter', 'Tiempo de render de templates.', 'template_segundos'),
+                ('blogmusica_cache_hits_total', 'counter', 'Aciertos del cache por defecto.', 'aciertos'),
+                ('blogmusica_cache_misses_total', 'counter', 'Fallos del cache por defecto.', 'fallos'),
+            ):
+                familia(nombre, tipo, ayuda)
+                for (vista, metodo), s in series:
+                    valor = getattr(s, atributo)
+                    lineas.append(f'{nombre}{{{etiquetas(vista, metodo)}}} {valor:.6f}' if isinstance(valor, float)
+                                  else f'{nombre}{{{etiquetas(vista, metodo)}}} {valor}')
+
+            familia('blogmusica_muestreo_ratio', 'gauge', 'Fracción de requests que se miden.')
+            lineas.append(f'blogmusica_muestreo_ratio{{pid="{pid}"}} {muestreo()}')
+        return '\n'.join(lineas) + '\n'
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+            self._lentos.clear()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro = Registro()
+
+
+def muestreo():
+    return float(getattr(settings, 'METRICAS_MUESTREO', 0))
+
+
+# ----------------------------
+# Ganchos (se instalan una vez, al activarse el middleware)
+# ----------------------------
+
+def _sql(execute, sql, params, many, context):
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        segundos = time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.sql_segundos += segundos
+        medicion.sql.append((segundos, sql))
+
+def _conexion_creada(sender, connection, **kwargs):
+    if _sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql)
+
+def _medir_render(render):
+    @wraps(render)
+    def medido(self, *args, **kwargs):
+        medicion = _actual.get()
+        if medicion is None:
+            return render(self, *args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            medicion.template_segundos += time.perf_counter() - inicio
+    medido._metricas = True
+    return medido
+
+def _medir_get(get):
+    @wraps(get)
+    def medido(self, key, default=None, version=None):
+        valor = get(self, key, default, version)
+        medicion = _actual.get()
+        if medicion is not None:
+            if valor is default:
+                medicion.fallos += 1
+            else:
+                medicion.aciertos += 1
+        return valor
+    medido._metricas = True
+    return medido
+
+def _medir_get_many(get_many):
+    @wraps(get_many)
+    def medido(self, keys, version=None):
+        medicion = _actual.get()
+        if medicion is None:
+            return get_many(self, keys, version=version)
+        keys = list(keys)
+        token = _actual.set(None)  # la implementación base llama a get() por clave: no contar dos veces
+        try:
+            valores = get_many(self, keys, version=version)
+        finally:
+            _actual.reset(token)
+        medicion.aciertos += len(valores)
+        medicion.fallos += len(keys) - len(valores)
+        return valores
+    medido._metricas = True
+    return medido
+
+_instalado = False
+_instalando = threading.Lock()
+
+def instalar():
+    """Engancha SQL (conexiones actuales y futuras), render de templates y el cache por defecto."""
+    global _instalado
+    with _instalando:
+        if _instalado:
+            return
+        connection_created.connect(_conexion_creada, dispatch_uid='metricas_sql')
+        for conexion in connections.all(initialized_only=True):
+            _conexion_creada(None, conexion)
+        # El Template del backend: lo usan render() y TemplateResponse una vez por página (los
+        # {% include %} y {% extends %} quedan adentro, sin contarse dos veces).
+        Template.render = _medir_render(Template.render)
+        clase = type(caches['default'])
+        if not getattr(clase.get, '_metricas', False):
+            clase.get = _medir_get(clase.get)
+            clase.get_many = _medir_get_many(clase.get_many)
+        _instalado = True
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+
+def _vista(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'sin_ruta'
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.tasa = muestreo()
+        if self.tasa <= 0:
+            raise MiddlewareNotUsed
+        registro.lentas = getattr(settings, 'METRICAS_LENTAS', 10)
+        registro.umbral = getattr(settings, 'METRICAS_LENTO_MS', 500) / 1000
+        instalar()
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def _sorteado(self, request):
+        return (self.tasa >= 1 or random.random() < self.tasa) and not request.path.startswith(RUTAS_PROPIAS)
+
+    def _registrar(self, request, response, inicio, medicion):
+        segundos = time.perf_counter() - inicio
+        lento = registro.agregar(_vista(request), request.method, response.status_code, segundos, medicion, request.path)
+        if lento:
+            logger.warning(
+                "Request lento: %s %s (%s) %.1f ms, %s consultas (%.1f ms SQL)\n%s",
+                request.method, request.path, lento['vista'], lento['ms'], lento['consultas'], lento['sql_ms'],
+                '\n'.join(f"  {q['ms']:.2f} ms  {q['sql']}" for q in lento['sql']),
+            )
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if not self._sorteado(request):
+            return self.get_response(request)
+        medicion = Medicion()
+        token = _actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._registrar(request, response, inicio, medicion)
+        return response
+
+    async def __acall__(self, request):
+        if not self._sorteado(request):
+            return await self.get_response(request)
+        medicion = Medicion()
+        token = _actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._registrar(request, response, inicio, medicion)
+        return response
+
+
+# ----------------------------
+# Vistas
+# ----------------------------
+
+def autorizado(request):
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+def exposicion(request):
+    """Métricas en formato de texto de Prometheus."""
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registro.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def lentas(request):
+    """Los requests más lentos de este proceso, con su SQL."""
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    return JsonResponse({'muestreo': muestreo(), 'lentos': registro.lentos()}, json_dumps_params={'ensure_ascii': False})
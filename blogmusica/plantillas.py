@@ -0,0 +1,341 @@
+"""
+Templates: perfil de render y precompilación.
+
+Perfil (opt-in, settings.TEMPLATES_PERFIL = fracción de requests, 0 = apagado)
+-----------------------------------------------------------------------------
+PerfilMiddleware mide una muestra de los requests y reparte el tiempo de
+render entre:
+
+- templates: cada Template que se renderiza (la página, sus padres de
+  {% extends %} y cada {% include %}), tiempo inclusivo;
+- nodos: cada tag y variable por template y línea ({% include ... %},
+  {% firstof ... %}, {{ n.created_at|date:"..." }}), con tiempo total y
+  propio (sin los nodos que contiene);
+- filtros: cada filtro por nombre (date, truncatechars, ...).
+
+Los acumulados son del proceso y se leen en `/metricas/templates/` (mismo
+acceso que /metricas/) o, sin servidor, con `manage.py perfilar_templates`.
+Como en metricas.py, con el perfil en 0 el middleware se desactiva al
+arrancar y no se instala ningún gancho. Los filtros se envuelven al compilar:
+al instalar los ganchos se vacía el cache de templates compilados.
+
+Precompilación
+--------------
+Fuera de DEBUG los templates se cargan con el cached loader (ver settings):
+cada template se lee y se compila una vez por proceso. precompilar() los
+compila todos de entrada (la precarga de blogmusica/arranque.py, si
+settings.TEMPLATES_PRECOMPILAR), así el primer request de cada página no paga
+la compilación; `manage.py precompilar_templates` hace lo mismo y falla si
+algún template tiene errores de sintaxis (para CI).
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponseForbidden, JsonResponse
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.base import FilterExpression, Node, Template, TextNode, TokenType
+
+from .metricas import RUTAS_PROPIAS, autorizado
+
+# Largo máximo del texto de un nodo en los reportes.
+_LARGO_ETIQUETA = 80
+
+_actual = ContextVar('plantillas_perfil', default=None)
+
+
+def tasa():
+    return float(getattr(settings, 'TEMPLATES_PERFIL', 0))
+
+
+# ----------------------------
+# Perfil
+# ----------------------------
+
+class Perfil:
+    """Tiempos de un render (o de varios): {(tipo, nombre): [llamadas, total, propio]}."""
+
+    def __init__(self):
+        self.datos = {}
+        self._pila = []  # tiempo de los hijos de cada nodo abierto
+
+    def _sumar(self, clave, total, propio):
+        fila = self.datos.get(clave)
+        if fila is None:
+            fila = self.datos[clave] = [0, 0.0, 0.0]
+        fila[0] += 1
+        fila[1] += total
+        fila[2] += propio
+
+    def medir(self, clave, funcion, *args):
+        """Llama a funcion(*args) y suma su tiempo a `clave` (y al nodo que la contiene)."""
+        self._pila.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            total = time.perf_counter() - inicio
+            hijos = self._pila.pop()
+            if self._pila:
+                self._pila[-1] += total
+            self._sumar(clave, total, total - hijos)
+
+    def sumar(self, otro):
+        for clave, (llamadas, total, propio) in otro.datos.items():
+            fila = self.datos.setdefault(clave, [0, 0.0, 0.0])
+            fila[0] += llamadas
+            fila[1] += total
+            fila[2] += propio
+
+    def filas(self, tipo=None, orden='propio'):
+        """[{tipo, nombre, llamadas, total_ms, propio_ms}] ordenadas de mayor a menor."""
+        indice = {'llamadas': 0, 'total': 1, 'propio': 2}[orden]
+        filas = sorted(
+            ((clave, fila) for clave, fila in self.datos.items() if tipo is None or clave[0] == tipo),
+            key=lambda x: -x[1][indice],
+        )
+        return [
+            {'tipo': t, 'nombre': nombre, 'llamadas': llamadas,
+             'total_ms': round(total * 1000, 3), 'propio_ms': round(propio * 1000, 3)}
+            for (t, nombre), (llamadas, total, propio) in filas
+        ]
+
+
+class _Acumulado:
+    """Perfil del proceso: suma de los requests perfilados."""
+
+    def __init__(self):
+        self.perfil = Perfil()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def agregar(self, perfil):
+        with self._lock:
+            self.perfil.sumar(perfil)
+            self.requests += 1
+
+    def copia(self):
+        with self._lock:
+            copia = Perfil()
+            copia.sumar(self.perfil)
+            return copia, self.requests
+
+    def reiniciar(self):
+        with self._lock:
+            self.perfil = Perfil()
+            self.requests = 0
+
+
+acumulado = _Acumulado()
+
+
+def _etiqueta(nodo):
+    token = getattr(nodo, 'token', None)
+    origen = getattr(getattr(nodo, 'origin', None), 'template_name', None) or '?'
+    if token is None:
+        return f'{origen} {type(nodo).__name__}'
+    contenido = ' '.join(token.contents.split())
+    if len(contenido) > _LARGO_ETIQUETA:
+        contenido = contenido[:_LARGO_ETIQUETA - 1] + '…'
+    texto = f'{{{{ {contenido} }}}}' if token.token_type == TokenType.VAR else f'{{% {contenido} %}}'
+    return f'{origen}:{token.lineno} {texto}'
+
+
+# ----------------------------
+# Ganchos
+# ----------------------------
+
+def _medir_nodo(render_annotated):
+    @wraps(render_annotated)
+    def medido(self, context):
+        perfil = _actual.get()
+        if perfil is None or isinstance(self, TextNode):
+            return render_annotated(self, context)
+        return perfil.medir(('nodo', _etiqueta(self)), render_annotated, self, context)
+    medido._perfil = True
+    return medido
+
+def _medir_template(render):
+    @wraps(render)
+    def medido(self, context):
+        perfil = _actual.get()
+        if perfil is None:
+            return render(self, context)
+        return perfil.medir(('template', self.name or '<cadena>'), render, self, context)
+    medido._perfil = True
+    return medido
+
+_filtros = {}  # función original -> envuelta
+
+def _medir_filtro(funcion):
+    envuelta = _filtros.get(funcion)
+    if envuelta is None:
+        nombre = getattr(funcion, '_filter_name', funcion.__name__)
+
+        @wraps(funcion)  # copia is_safe, needs_autoescape, expects_localtime...
+        def envuelta(*args, **kwargs):
+            perfil = _actual.get()
+            if perfil is None:
+                return funcion(*args, **kwargs)
+            return perfil.medir(('filtro', nombre), lambda: funcion(*args, **kwargs))
+        _filtros[funcion] = envuelta
+    return envuelta
+
+def _envolver_filtros(init):
+    @wraps(init)
+    def envuelto(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.filters = [(_medir_filtro(funcion), argumentos) for funcion, argumentos in self.filters]
+    envuelto._perfil = True
+    return envuelto
+
+def vaciar_cache():
+    """Descarta los templates compilados (cached loader) de todos los engines de Django."""
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            for loader in engine.engine.template_loaders:
+                if hasattr(loader, 'reset'):
+                    loader.reset()
+
+_instalado = False
+_instalando = threading.Lock()
+
+def instalar():
+    """Engancha el render de nodos y templates y los filtros de los templates que se compilen."""
+    global _instalado
+    with _instalando:
+        # El entorno de pruebas reemplaza Template._render (y lo restaura al salir): se revisa aparte.
+        if not getattr(Template._render, '_perfil', False):
+            Template._render = _medir_template(Template._render)
+        if _instalado:
+            return
+        Node.render_annotated = _medir_nodo(Node.render_annotated)
+        FilterExpression.__init__ = _envolver_filtros(FilterExpression.__init__)
+        vaciar_cache()  # los ya compilados tienen los filtros sin envolver
+        _instalado = True
+
+
+@contextmanager
+def perfilar():
+    """Perfila los renders dentro del bloque; devuelve el Perfil (y lo suma al acumulado)."""
+    instalar()
+    perfil = _actual.get()
+    if perfil is not None:  # ya adentro de otro perfil (p.ej. el middleware bajo perfilar_templates)
+        yield perfil
+        return
+    perfil = Perfil()
+    token = _actual.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _actual.reset(token)
+        acumulado.agregar(perfil)
+
+
+# ----------------------------
+# Middleware y vista
+# ----------------------------
+
+class PerfilMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.tasa = tasa()
+        if self.tasa <= 0:
+            raise MiddlewareNotUsed
+        instalar()
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def _sorteado(self, request):
+        return (self.tasa >= 1 or random.random() < self.tasa) and not request.path.startswith(RUTAS_PROPIAS)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if not self._sorteado(request):
+            return self.get_response(request)
+        with perfilar():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not self._sorteado(request):
+            return await self.get_response(request)
+        with perfilar():
+            return await self.get_response(request)
+
+
+def perfil_vista(request):
+    """Perfil de templates acumulado por este proceso (JSON). ?tipo=template|nodo|filtro&orden=total."""
+    if not autorizado(request):
+        return HttpResponseForbidden()
+    perfil, requests = acumulado.copia()
+    tipo = request.GET.get('tipo') or None
+    orden = request.GET.get('orden', 'propio')
+    if orden not in ('llamadas', 'total', 'propio'):
+        orden = 'propio'
+    return JsonResponse(
+        {'pid': os.getpid(), 'perfil': tasa(), 'requests': requests, 'filas': perfil.filas(tipo, orden)[:200]},
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+# ----------------------------
+# Precompilación
+# ----------------------------
+
+def _nombres(engine):
+    """Nombres de todos los templates que ven los loaders del engine, sin repetir (gana el primero)."""
+    vistos = []
+    pendientes = list(engine.template_loaders)
+    while pendientes:
+        loader = pendientes.pop(0)
+        if hasattr(loader, 'loaders'):  # cached loader: los de adentro
+            pendientes[:0] = loader.loaders
+            continue
+        for directorio in loader.get_dirs():
+            directorio = str(directorio)
+            for raiz, carpetas, archivos in os.walk(directorio):
+                carpetas[:] = sorted(c for c in carpetas if not c.startswith('.'))
+                for archivo in sorted(archivos):
+                    if archivo.startswith('.'):
+                        continue
+                    nombre = os.path.relpath(os.path.join(raiz, archivo), directorio).replace(os.sep, '/')
+                    if nombre not in vistos:
+                        vistos.append(nombre)
+    return vistos
+
+def precompilar(prefijos=None):
+    """
+    Compila los templates de los engines de Django (con el cached loader
+    quedan en memoria); con `prefijos`, sólo los que empiezan así ('musica/').
+    Devuelve [(nombre, segundos, error o None)].
+    """
+    resultado = []
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for nombre in _nombres(backend.engine):
+            if prefijos and not nombre.startswith(prefijos):
+                continue
+            inicio = time.perf_counter()
+            error = None
+            try:
+                backend.engine.get_template(nombre)
+            except TemplateSyntaxError as exc:
+                error = str(exc)
+            except (TemplateDoesNotExist, UnicodeDecodeError) as exc:
+                error = f'no se pudo leer: {exc}'
+            resultado.append((nombre, time.perf_counter() - inicio, error))
+    return resultado
@@ -0,0 +1,167 @@
+"""
+Réplicas de lectura para los modelos de musica.
+
+Con réplicas configuradas (settings.MUSICA_REPLICAS, alias de DATABASES; ver
+DJ_REPLICAS en settings) el Enrutador manda a una réplica las lecturas de los
+modelos de musica que hacen las vistas de contenido (VISTAS: portada,
+ingresos, listados y detalles) en un GET. Todo lo demás va a la primaria:
+escrituras (comentarios, registro, admin), lecturas de otras apps (sesiones,
+usuarios), requests que no son GET/HEAD, y el código fuera de un request
+(worker, comandos), que lee para escribir o necesita ver todo lo confirmado
+(p.ej. los cambios incrementales de api_cambios).
+
+Leer lo propio: la réplica va atrasada. Cuando un request escribe en la
+primaria, la respuesta lleva la cookie COOKIE por settings.MUSICA_REPLICAS_FIJAR
+segundos, y mientras esté, los requests de ese navegador leen de la primaria
+(quien comenta ve su comentario; quien se registra, su sesión). La cookie no
+necesita firma: falsificarla sólo manda lecturas a la primaria. Una respuesta
+con cookies no entra al cache de páginas (musica/cache_paginas.py); una
+página que se lee de una réplica sí, y puede quedar ahí con su atraso hasta
+MUSICA_CACHE_PAGINAS.
+
+Cada request usa una sola réplica (al azar) para todas sus consultas: el
+sello del ETag y la página salen de la misma copia.
+
+En SQLite una réplica es una copia del archivo; `manage.py
+sincronizar_replicas` la actualiza (con la API de backup, mientras se lee).
+"""
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+from fnmatch import fnmatch
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+COOKIE = 'musica_primaria'
+# Vistas (view_name) que leen de una réplica en un GET.
+VISTAS = (
+    'musica:inicio', 'musica:ingresos', 'musica:lista_*',
+    'musica:*_detalle', 'musica:*_detail', 'musica:nota_comentarios',
+)
+_APPS = {'musica'}
+_SEGUROS = ('GET', 'HEAD')
+
+_actual = ContextVar('replicas_actual', default=None)
+
+
+def replicas():
+    return list(getattr(settings, 'MUSICA_REPLICAS', ()))
+
+def fijar():
+    return getattr(settings, 'MUSICA_REPLICAS_FIJAR', 10)
+
+
+class Estado:
+    """Lo que el Enrutador sabe del request en curso (se modifica en el lugar: viaja con sync_to_async)."""
+
+    __slots__ = ('fijado', 'lectura', 'escribio')
+
+    def __init__(self, fijado):
+        self.fijado = fijado  # lee de la primaria pase lo que pase
+        self.lectura = None   # réplica elegida para este request
+        self.escribio = False
+
+
+class Enrutador:
+
+    def db_for_read(self, model, **hints):
+        estado = _actual.get()
+        if estado is None or estado.lectura is None or model._meta.app_label not in _APPS:
+            return None  # la primaria ('default')
+        return estado.lectura
+
+    def db_for_write(self, model, **hints):
+        estado = _actual.get()
+        if estado is not None:
+            estado.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True  # son copias de la misma base
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False  # el esquema llega copiado de la primaria
+        return None
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+
+def _replicada(request):
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and any(fnmatch(match.view_name, patron) for patron in VISTAS)
+
+class ReplicasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def _estado(self, request):
+        return Estado(fijado=request.method not in _SEGUROS or COOKIE in request.COOKIES)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        estado = _actual.get()
+        if estado is not None and not estado.fijado and _replicada(request):
+            estado.lectura = random.choice(replicas())
+        return None
+
+    def _fijar(self, estado, response):
+        if estado.escribio:
+            response.set_cookie(COOKIE, '1', max_age=fijar(), httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        estado = self._estado(request)
+        token = _actual.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self._fijar(estado, response)
+
+    async def __acall__(self, request):
+        estado = self._estado(request)
+        token = _actual.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self._fijar(estado, response)
+
+
+# ----------------------------
+# Copia (SQLite)
+# ----------------------------
+
+def copiar(destino, origen=DEFAULT_DB_ALIAS):
+    """Copia la base `origen` sobre la réplica `destino` (API de backup de SQLite). Devuelve los segundos."""
+    fuente, copia = connections[origen], connections[destino]
+    if fuente.vendor != 'sqlite' or copia.vendor != 'sqlite':
+        raise ValueError("Sólo se copian bases SQLite; en otros motores la réplica la mantiene el servidor.")
+    inicio = time.perf_counter()
+    fuente.ensure_connection()
+    # Conexión propia a la réplica: las del sitio son de sólo lectura (query_only).
+    archivo = sqlite3.connect(copia.settings_dict['NAME'], timeout=30)
+    try:
+        fuente.connection.backup(archivo)
+    finally:
+        archivo.close()
+    return time.perf_counter() - inicio
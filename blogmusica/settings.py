@@ -36,6 +36,12 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    # Primero: mide el request completo (se desactiva solo con DJ_METRICAS_MUESTREO=0).
+    "blogmusica.metricas.MetricasMiddleware",
+    # Perfil de render de templates (opt-in con DJ_TEMPLATES_PERFIL; ver blogmusica/plantillas.py).
+    "blogmusica.plantillas.PerfilMiddleware",
+    # Lecturas de las vistas de contenido en réplicas (sólo con DJ_REPLICAS; ver blogmusica/replicas.py).
+    "blogmusica.replicas.ReplicasMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -65,6 +71,29 @@ TEMPLATES = [
     },
 ]
 
+# Fuera de DEBUG, loaders explícitos con cache: cada template se compila una vez por proceso
+# (y con DJ_TEMPLATES_PRECOMPILAR, todos al arrancar). Con loaders, APP_DIRS tiene que ir en False.
+if not DEBUG:
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
+# Templates (blogmusica/plantillas.py): compilar todos al arrancar el proceso (wsgi/asgi) y
+# fracción de requests con perfil de render por template, tag y filtro (0 = apagado, sin costo).
+TEMPLATES_PRECOMPILAR = os.environ.get("DJ_TEMPLATES_PRECOMPILAR", str(not DEBUG)) == "True"
+
+# Arranque (blogmusica/arranque.py): antes del primer request, importar el URLconf y abrir
+# las conexiones en wsgi.py / asgi.py (los workers se reciclan seguido).
+PRECARGA = os.environ.get("DJ_PRECARGA", str(not DEBUG)) == "True"
+TEMPLATES_PERFIL = float(os.environ.get("DJ_TEMPLATES_PERFIL", "0"))
+
 WSGI_APPLICATION = "blogmusica.wsgi.application"
 
 # Base de datos (sqlite por ahora)
@@ -72,7 +101,42 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Conexión persistente por thread (segundos; 0 = una por request), revisada antes de reusarla.
+        # Bajo ASGI va en 0 (ver asgi.py): los threads de sync_to_async no cierran las suyas.
+        "CONN_MAX_AGE": int(os.environ.get("DJ_CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            # BEGIN IMMEDIATE: el lock de escritura se pide al empezar la transacción y espera
+            # el busy_timeout (con DEFERRED, pasar de lectura a escritura falla al instante).
+            "transaction_mode": "IMMEDIATE",
+        },
+    }
+}
+
+# Réplicas de lectura (blogmusica/replicas.py): DJ_REPLICAS = rutas de copias de la base, separadas
+# por comas (alias replica1, replica2...; `manage.py sincronizar_replicas` las actualiza). Son de
+# sólo lectura; en los tests apuntan a la base de prueba. Después de escribir, un navegador lee de
+# la primaria por MUSICA_REPLICAS_FIJAR segundos (para ver lo que acaba de escribir).
+for _i, _ruta in enumerate(r for r in os.environ.get("DJ_REPLICAS", "").split(",") if r.strip()):
+    DATABASES[f"replica{_i + 1}"] = {
+        **DATABASES["default"],
+        "NAME": _ruta.strip(),
+        "OPTIONS": {"init_command": "PRAGMA query_only = ON"},
+        "TEST": {"MIRROR": "default"},
     }
+MUSICA_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+MUSICA_REPLICAS_FIJAR = int(os.environ.get("DJ_REPLICAS_FIJAR", "10"))
+DATABASE_ROUTERS = ["blogmusica.replicas.Enrutador"]
+
+# PRAGMAs de cada conexión SQLite (blogmusica/basedatos.py). WAL no funciona en sistemas de
+# archivos de red (p.ej. NFS): ahí DJ_SQLITE_WAL=False deja el rollback journal.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL" if os.environ.get("DJ_SQLITE_WAL", "True") == "True" else "DELETE",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "cache_size": -20000,  # KiB por conexión
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
 }
 
 # Password validators
@@ -94,12 +158,53 @@ STATIC_URL = "/static/"
 # Si tienes una carpeta de estáticos a nivel de proyecto, descomenta la siguiente línea:
 # STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"   # para collectstatic en producción
+# Los derivados de la portada (AVIF/WebP/JPEG) no se versionan: en el despliegue,
+# `python manage.py generar_derivados --estaticos` y después `collectstatic`.
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache: memoria local por defecto; con DJ_CACHE_DIR, en archivos (compartido entre procesos/workers)
+if os.environ.get("DJ_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["DJ_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "blogmusica",
+        }
+    }
+
+# Segundos que se cachean portada e ingresos para visitantes anónimos (0 = sin cache)
+MUSICA_CACHE_PAGINAS = int(os.environ.get("DJ_CACHE_PAGINAS", "300"))
+
+# Comentarios por usuario y por minuto (0 = sin límite)
+MUSICA_COMENTARIOS_POR_MINUTO = int(os.environ.get("DJ_COMENTARIOS_POR_MINUTO", "5"))
+
+# Cola de tareas (musica/tareas.py). Inmediatas = se ejecutan en el request, sin worker.
+# En producción: DJ_TAREAS_INMEDIATAS=False y `python manage.py run_worker` corriendo (pide DJ_CACHE_DIR:
+# sus invalidaciones tienen que llegar a los procesos web).
+MUSICA_TAREAS_INMEDIATAS = os.environ.get("DJ_TAREAS_INMEDIATAS", str(DEBUG)) == "True"
+
+# Sincronización incremental (musica/cambios.py): cada lectura llega hasta "ahora - margen",
+# para no saltear filas de transacciones que todavía no confirmaron (segundos).
+MUSICA_CAMBIOS_MARGEN = int(os.environ.get("DJ_CAMBIOS_MARGEN", "5"))
+
+# Métricas (blogmusica/metricas.py): fracción de requests que se miden (0 = desactivado, sin costo),
+# cuántos de los más lentos se guardan con su SQL (desde qué latencia, en ms) y token opcional para
+# que Prometheus lea /metricas/.
+METRICAS_MUESTREO = float(os.environ.get("DJ_METRICAS_MUESTREO", "0"))
+METRICAS_LENTAS = int(os.environ.get("DJ_METRICAS_LENTAS", "10"))
+METRICAS_LENTO_MS = float(os.environ.get("DJ_METRICAS_LENTO_MS", "500"))
+METRICAS_TOKEN = os.environ.get("DJ_METRICAS_TOKEN", "")
+
 # Auth
 # OJO: LOGIN_URL es una RUTA (path). Vamos a definir la URL /ingresar/ en urls.py con name='login'
 LOGIN_URL = "/ingresar/"
@@ -5,8 +5,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import metricas, plantillas
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Métricas de requests (sólo staff o con METRICAS_TOKEN)
+    path('metricas/', metricas.exposicion, name='metricas'),
+    path('metricas/lentas/', metricas.lentas, name='metricas_lentas'),
+    path('metricas/templates/', plantillas.perfil_vista, name='metricas_templates'),
     path('', include('musica.urls')),
 ]
 
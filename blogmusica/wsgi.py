@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogmusica.settings')
 
 application = get_wsgi_application()
+
+# Antes del primer request: URLs, conexiones y templates (ver blogmusica/arranque.py).
+from blogmusica import arranque  # noqa: E402
+
+arranque.precargar()
@@ -6,6 +6,7 @@ from .models import (
     Lanzamiento,
     Recomendacion,
     Comentario,
+    Tarea,
 )
 
 
@@ -37,6 +38,7 @@ class ConciertoAdmin(admin.ModelAdmin):
 @admin.register(Lanzamiento)
 class LanzamientoAdmin(admin.ModelAdmin):
     list_display = ("titulo", "artista", "fecha_lanzamiento", "created_at")
+    list_select_related = ("artista",)
     list_filter = ("fecha_lanzamiento", "artista")
     search_fields = ("titulo", "artista__nombre")
     ordering = ("-fecha_lanzamiento",)
@@ -45,6 +47,7 @@ class LanzamientoAdmin(admin.ModelAdmin):
 @admin.register(Recomendacion)
 class RecomendacionAdmin(admin.ModelAdmin):
     list_display = ("titulo", "artista", "fecha", "created_at")
+    list_select_related = ("artista",)
     list_filter = ("fecha", "artista")
     search_fields = ("titulo", "artista__nombre")
     ordering = ("-fecha",)
@@ -53,6 +56,14 @@ class RecomendacionAdmin(admin.ModelAdmin):
 @admin.register(Comentario)
 class ComentarioAdmin(admin.ModelAdmin):
     list_display = ("nota", "autor", "created_at")
+    list_select_related = ("nota", "autor")
     list_filter = ("created_at",)
     search_fields = ("nota__titulo", "autor__username", "contenido")
-    ordering = ("-created_at",)
\ No newline at end of file
+    ordering = ("-created_at",)
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ("nombre", "estado", "intentos", "disponible_en", "tomada_por", "updated_at")
+    list_filter = ("estado", "nombre")
+    search_fields = ("nombre", "clave", "ultimo_error")
+    ordering = ("-updated_at",)
@@ -0,0 +1,236 @@
+"""
+API JSON de sólo lectura (/api/v1/), para las apps que hoy leen el HTML.
+
+    GET /api/v1/<recurso>/                   página (cursor) de la colección
+    GET /api/v1/<recurso>/?ids=3,1,2         esos objetos, en ese orden, en una consulta
+    GET /api/v1/<recurso>/?formato=ndjson    toda la colección, en streaming (una línea por objeto)
+    GET /api/v1/<recurso>/<pk>/              un objeto
+
+    GET /api/v1/cambios/?desde=<marca>       lo que cambió desde la marca (musica/cambios.py)
+
+Recursos: artistas, notas, conciertos, lanzamientos, recomendaciones y feed
+(el timeline mezclado de la portada, desde FeedEntry).
+
+- ?fields=id,nombre: sólo esos campos, y sólo esas columnas en el SELECT
+  (.only()); sin fields, todos los de RECURSOS.
+- ?cursor= / ?limite= (máx. LIMITE_MAXIMO): paginación keyset con el mismo
+  orden e índices que los listados HTML; la respuesta trae "siguiente".
+- Las respuestas llevan ETag / Last-Modified (musica/condicional.py).
+"""
+import datetime
+import json
+
+from django.db.models.fields.files import FieldFile
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from . import feed
+from .condicional import condicional, objeto, portada, tablas
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion, FeedEntry
+from .paginacion import paginar
+
+LIMITE = 50
+LIMITE_MAXIMO = 200
+LIMITE_IDS = 100
+CHUNK_STREAMING = 500
+LIMITE_CAMBIOS = 500
+LIMITE_CAMBIOS_MAXIMO = 2000
+
+
+class Recurso:
+
+    def __init__(self, modelo, campos, orden, sello_lista, sello_detalle=None):
+        self.modelo = modelo
+        self.campos = tuple(campos)
+        self.orden = list(orden)
+        self.sello_lista = sello_lista
+        self.sello_detalle = sello_detalle
+
+    def columnas(self, campos):
+        """Columnas para .only(): las pedidas más las del orden (el cursor las necesita)."""
+        return list(dict.fromkeys([*campos, *(o.lstrip('-') for o in self.orden)]))
+
+    def queryset(self, campos):
+        return self.modelo.objects.only(*self.columnas(campos)).order_by(*self.orden)
+
+
+RECURSOS = {
+    'artistas': Recurso(
+        Artista,
+        ('id', 'nombre', 'slug', 'pais', 'genero_principal', 'biografia', 'sitio_web', 'imagen',
+         'video_youtube', 'created_at', 'updated_at'),
+        ['nombre', 'id'],
+        tablas(Artista), objeto(Artista),
+    ),
+    'notas': Recurso(
+        NotaBlog,
+        ('id', 'titulo', 'slug', 'contenido', 'imagen_destacada', 'tags', 'comentarios_count',
+         'ultimo_comentario_at', 'created_at', 'updated_at'),
+        ['-created_at', '-id'],
+        tablas(NotaBlog), objeto(NotaBlog),
+    ),
+    'conciertos': Recurso(
+        Concierto,
+        ('id', 'nombre', 'detalle', 'ubicacion', 'fecha', 'imagen', 'created_at', 'updated_at'),
+        ['-fecha', '-id'],
+        tablas(Concierto), objeto(Concierto),
+    ),
+    'lanzamientos': Recurso(
+        Lanzamiento,
+        ('id', 'titulo', 'descripcion', 'artista', 'fecha_lanzamiento', 'imagen', 'created_at', 'updated_at'),
+        ['-fecha_lanzamiento', '-id'],
+        tablas(Lanzamiento), objeto(Lanzamiento),
+    ),
+    'recomendaciones': Recurso(
+        Recomendacion,
+        ('id', 'titulo', 'descripcion', 'artista', 'fecha', 'created_at', 'updated_at'),
+        ['-id'],
+        tablas(Recomendacion), objeto(Recomendacion),
+    ),
+    'feed': Recurso(
+        FeedEntry,
+        ('id', 'tipo', 'objeto_id', 'titulo', 'preview', 'image_url', 'url', 'created_at'),
+        feed.ORDEN_FEED,
+        portada(),
+    ),
+}
+
+
+# ----------------------------
+# Serialización
+# ----------------------------
+
+def _valor(obj, campo):
+    field = obj._meta.get_field(campo)
+    if field.is_relation:
+        return getattr(obj, field.attname)  # "artista": el id, sin consultar al artista
+    valor = getattr(obj, campo)
+    if isinstance(valor, FieldFile):
+        return valor.url if valor else None
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return valor
+
+def _fila(obj, campos):
+    return {campo: _valor(obj, campo) for campo in campos}
+
+def _json(datos, status=200):
+    return JsonResponse(datos, status=status, json_dumps_params={'ensure_ascii': False})
+
+def _error(mensaje, status=400):
+    return _json({'error': mensaje}, status=status)
+
+
+# ----------------------------
+# Parámetros
+# ----------------------------
+
+class _ParametroInvalido(Exception):
+    pass
+
+def _campos(request, recurso):
+    pedidos = request.GET.get('fields')
+    if not pedidos:
+        return recurso.campos
+    campos = [c.strip() for c in pedidos.split(',') if c.strip()]
+    desconocidos = [c for c in campos if c not in recurso.campos]
+    if desconocidos or not campos:
+        raise _ParametroInvalido(f"Campos desconocidos: {', '.join(desconocidos) or '(vacío)'}. "
+                                 f"Disponibles: {', '.join(recurso.campos)}.")
+    return list(dict.fromkeys(campos))
+
+def _ids(valor):
+    try:
+        ids = [int(i) for i in valor.split(',') if i.strip()]
+    except ValueError:
+        raise _ParametroInvalido("ids tiene que ser una lista de números separados por comas.")
+    if not ids or len(ids) > LIMITE_IDS:
+        raise _ParametroInvalido(f"ids admite entre 1 y {LIMITE_IDS} valores.")
+    return ids
+
+def _limite(request, defecto=LIMITE, maximo=LIMITE_MAXIMO):
+    try:
+        limite = int(request.GET.get('limite', defecto))
+    except ValueError:
+        raise _ParametroInvalido("limite tiene que ser un número.")
+    return max(1, min(limite, maximo))
+
+
+# ----------------------------
+# Vistas
+# ----------------------------
+
+def _sello_lista(request, recurso):
+    r = RECURSOS.get(recurso)
+    return r.sello_lista(request) if r else None
+
+def _sello_detalle(request, recurso, pk):
+    r = RECURSOS.get(recurso)
+    return r.sello_detalle(request, pk=pk) if r and r.sello_detalle else None
+
+
+@condicional(_sello_lista)
+def lista(request, recurso):
+    r = RECURSOS.get(recurso)
+    if r is None:
+        return _error(f"Recurso desconocido: {recurso}.", status=404)
+    try:
+        campos = _campos(request, r)
+        if 'ids' in request.GET:
+            ids = _ids(request.GET['ids'])
+            # Una consulta (in_bulk) y el orden en que se pidieron; los que no existen van aparte.
+            encontrados = r.queryset(campos).in_bulk(ids)
+            return _json({
+                'resultados': [_fila(encontrados[i], campos) for i in ids if i in encontrados],
+                'faltantes': [i for i in ids if i not in encontrados],
+            })
+        if request.GET.get('formato') == 'ndjson':
+            filas = (
+                json.dumps(_fila(obj, campos), ensure_ascii=False) + '\n'
+                for obj in r.queryset(campos).iterator(chunk_size=CHUNK_STREAMING)
+            )
+            return StreamingHttpResponse(filas, content_type='application/x-ndjson; charset=utf-8')
+        pagina = paginar(r.queryset(campos), r.orden, request.GET.get('cursor'), limite=_limite(request))
+    except _ParametroInvalido as e:
+        return _error(str(e))
+    return _json({'resultados': [_fila(obj, campos) for obj in pagina], 'siguiente': pagina.siguiente})
+
+
+@condicional(_sello_detalle)
+def detalle(request, recurso, pk):
+    r = RECURSOS.get(recurso)
+    if r is None or r.sello_detalle is None:
+        return _error(f"Recurso desconocido: {recurso}.", status=404)
+    try:
+        campos = _campos(request, r)
+    except _ParametroInvalido as e:
+        return _error(str(e))
+    obj = r.queryset(campos).filter(pk=pk).first()
+    if obj is None:
+        return _error("No existe.", status=404)
+    return _json(_fila(obj, campos))
+
+
+def lista_cambios(request):
+    """
+    Sincronización incremental: ?desde=<marca ISO> (o nada, para todo) y
+    después ?cursor= hasta que "siguiente" sea null; ahí "marca" es el
+    ?desde= de la próxima vez. Los registros son los de export_cambios.
+    """
+    from . import cambios, catalogo  # sólo este endpoint: no se cargan al arrancar el worker
+
+    try:
+        limite = _limite(request, LIMITE_CAMBIOS, LIMITE_CAMBIOS_MAXIMO)
+        desde = cambios.marca(request.GET['desde']) if request.GET.get('desde') else None
+        lote = cambios.leer(desde, cursor=request.GET.get('cursor'), limite=limite)
+    except (_ParametroInvalido, ValueError) as e:
+        return _error(str(e))
+    datos = {
+        'cambios': lote.registros,
+        'siguiente': lote.siguiente,
+        'marca': lote.marca.isoformat() if lote.marca else None,
+    }
+    # Fechas con microsegundos (JsonResponse las corta a milisegundos y el espejo quedaría distinto).
+    return HttpResponse(
+        json.dumps(datos, ensure_ascii=False, default=catalogo.a_json),
+        content_type='application/json; charset=utf-8',
+    )
@@ -5,3 +5,9 @@ class MusicaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'musica'
 
+    def ready(self):
+        from blogmusica import basedatos
+        from . import signals  # noqa: F401  (registra los receivers)
+        from . import tarjetas
+        tarjetas.preparar()
+        basedatos.instalar()  # PRAGMAs de SQLite en cada conexión nueva
@@ -0,0 +1,231 @@
+"""
+Auditoría de índices (ver `manage.py auditar_indices`).
+
+Recorre las rutas de musica/urls.py con el cliente de pruebas, con los
+caches apagados y dentro de una transacción que se descarta, y guarda cada
+SELECT que ejecuta la base (con sus parámetros). Las vistas paginadas se
+piden dos veces: la segunda página agrega el filtro keyset del cursor.
+A eso se suman las consultas calientes que no salen de una vista
+(CONSULTAS_EXTRA: worker, cambios incrementales).
+
+Cada consulta distinta se pasa por EXPLAIN (EXPLAIN QUERY PLAN en SQLite)
+y se marca si el plan recorre una tabla entera o arma un B-tree temporal
+para ordenar: en los dos casos el costo crece con la tabla, aunque la
+página sea de 20 filas.
+
+En Postgres el planificador elige Seq Scan en tablas chicas aunque exista
+el índice: auditar con un volumen realista (seed_musica).
+"""
+import datetime
+import json
+import re
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from .models import Artista, Concierto, FeedEntry, Lanzamiento, NotaBlog, Recomendacion, Tarea
+from .paginacion import Pagina
+
+# Consultas que no pueden usar un índice para lo que se marca (patrón del SQL, motivo).
+ACEPTADAS = [
+    (r'\bMATCH\b.*\bbm25\(', 'el ranking de la búsqueda se calcula por consulta (FTS5)'),
+    (r'ts_rank', 'el ranking de la búsqueda se calcula por consulta (Postgres)'),
+]
+# Rutas que no se piden (motivo).
+OMITIDAS = {'logout': 'sólo POST'}
+# Query string extra por ruta: cada variante es otro request.
+VARIANTES = {
+    'inicio': [{}, {'q': 'rock'}],
+    'api_cambios': [{'desde': '2000-01-01T00:00:00+00:00', 'limite': 5}],
+}
+
+
+def _primero(modelo, orden='pk'):
+    return modelo.objects.order_by(orden).values_list('pk', flat=True).first()
+
+def _argumentos(nombre):
+    """[kwargs de reverse()] de ejemplo para cada ruta (con datos reales de la base)."""
+    from . import api
+
+    por_pk = {
+        'nota_detalle': NotaBlog, 'nota_comentarios': NotaBlog, 'artista_detalle': Artista,
+        'concierto_detalle': Concierto, 'lanzamiento_detalle': Lanzamiento, 'recomendacion_detalle': Recomendacion,
+    }
+    if nombre in ('nota_detalle', 'nota_comentarios'):
+        return [{'pk': _primero(NotaBlog, '-comentarios_count')}]
+    if nombre in por_pk:
+        return [{'pk': _primero(por_pk[nombre])}]
+    if nombre in ('nota_detail', 'artista_detail'):
+        modelo = NotaBlog if nombre == 'nota_detail' else Artista
+        return [{'slug': modelo.objects.order_by('pk').values_list('slug', flat=True).first()}]
+    if nombre == 'api_lista':
+        return [{'recurso': r} for r in api.RECURSOS]
+    if nombre == 'api_detalle':
+        return [{'recurso': r, 'pk': _primero(api.RECURSOS[r].modelo)} for r, rec in api.RECURSOS.items() if rec.sello_detalle]
+    return [{}]
+
+def _siguiente(response):
+    """Cursor de la página siguiente (JSON o contexto del template), si hay."""
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content).get('siguiente')
+    for contexto in response.context or []:
+        for valor in contexto.flatten().values():
+            if isinstance(valor, Pagina) and valor.siguiente:
+                return valor.siguiente
+    return None
+
+
+# ----------------------------
+# Captura
+# ----------------------------
+
+class _Registro:
+    """execute_wrapper que guarda (sql, params) de cada SELECT, con el origen que se está pidiendo."""
+
+    def __init__(self):
+        self.origen = ''
+        self.consultas = {}  # sql -> (params, [orígenes])
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            _params, origenes = self.consultas.setdefault(sql, (params, []))
+            if self.origen not in origenes:
+                origenes.append(self.origen)
+        return execute(sql, params, many, context)
+
+
+def _consultas_extra():
+    """Consultas calientes fuera de las vistas: {origen: queryset} (no se ejecutan, sólo se explican)."""
+    from . import cambios
+
+    ahora = timezone.now()
+    artista = _primero(Artista)
+    extra = {
+        'worker: tareas.tomar': Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_en__lte=ahora)
+                                .order_by('disponible_en', 'id').values_list('pk', flat=True)[:10],
+        'worker: resincronizar_artista (lanzamientos)': Lanzamiento.objects.filter(artista_id=artista),
+        'worker: resincronizar_artista (recomendaciones)': Recomendacion.objects.filter(artista_id=artista),
+        'feed: tarjeta por objeto': FeedEntry.objects.filter(tipo='nota', objeto_id=1),
+    }
+    desde = ahora - datetime.timedelta(days=1)
+    for label, modelo, campo in cambios._tablas():
+        extra[f'cambios: {label or "lápidas"}'] = cambios._consulta(
+            modelo, campo, desde, ahora, [desde.isoformat(), 0],
+        )[:100]
+    return extra
+
+def pedidos(urlpatterns):
+    """[(origen, url, params)] a pedir. Se arma antes de registrar: estas consultas no son de las vistas."""
+    resultado = []
+    for patron in urlpatterns:
+        if not isinstance(patron, URLPattern) or not patron.name or patron.name in OMITIDAS:
+            continue
+        for kwargs in _argumentos(patron.name):
+            if None in kwargs.values():
+                continue  # tabla vacía: no hay objeto para pedir
+            for params in VARIANTES.get(patron.name, [{}]):
+                url = reverse(f'musica:{patron.name}', kwargs=kwargs)
+                resultado.append((url + (f'?{urlencode(params)}' if params else ''), url, params))
+    return resultado
+
+@contextmanager
+def cliente_sin_cache():
+    """
+    Cliente de pruebas con los caches apagados (cada request llega a la vista y
+    al template), dentro de una transacción que se descarta al salir.
+    """
+    try:
+        setup_test_environment()  # response.context y el host 'testserver'
+        propio = True
+    except RuntimeError:
+        propio = False  # ya corre dentro de los tests
+    try:
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            MUSICA_CACHE_PAGINAS=0, MUSICA_TAREAS_INMEDIATAS=False,
+        ), transaction.atomic():
+            yield Client()
+            transaction.set_rollback(True)
+    finally:
+        if propio:
+            teardown_test_environment()
+
+def capturar(urlpatterns):
+    """{sql: (params, [orígenes])} de todas las rutas con name de `urlpatterns` y de las consultas extra."""
+    registro = _Registro()
+    lista = pedidos(urlpatterns)
+    extra = _consultas_extra()
+    with cliente_sin_cache() as cliente, connection.execute_wrapper(registro):
+        for origen, url, params in lista:
+            registro.origen = origen
+            response = cliente.get(url, params)
+            cursor = _siguiente(response) if response.status_code == 200 else None
+            if cursor:
+                registro.origen = f'{origen} (página 2)'
+                cliente.get(url, {**params, 'cursor': cursor})
+
+    for origen, qs in extra.items():
+        sql, params = qs.query.sql_with_params()
+        registro.consultas.setdefault(sql, (params, []))[1].append(origen)
+    return registro.consultas
+
+
+# ----------------------------
+# Planes
+# ----------------------------
+
+_SCAN_SQLITE = re.compile(r'^SCAN (?!CONSTANT ROW)(\w+)\b(?! USING| VIRTUAL TABLE)')
+
+def explicar(sql, params):
+    """Líneas del plan de la consulta."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [fila[-1] for fila in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return [fila[0] for fila in cursor.fetchall()]
+
+def _aceptada(sql):
+    for patron, _motivo in ACEPTADAS:
+        if re.search(patron, sql):
+            return True
+    return False
+
+def problemas(sql, plan):
+    """
+    Qué tiene de malo el plan: recorridos completos de tablas y ordenamientos
+    sin índice. En SQLite, un SCAN con LIMIT y sin B-tree temporal recorre la
+    tabla (o el índice de la PK) ya en el orden pedido y corta a las N filas: no cuenta.
+    """
+    if _aceptada(sql):
+        return []
+    hallados = []
+    ordena = any('USE TEMP B-TREE' in linea for linea in plan)
+    corta = ' LIMIT ' in sql
+    for linea in plan:
+        texto = linea.strip()
+        if connection.vendor == 'sqlite':
+            scan = _SCAN_SQLITE.match(texto)
+            if scan and (ordena or not corta):
+                hallados.append(f'recorre toda la tabla {scan.group(1)}')
+            if 'USE TEMP B-TREE' in texto:
+                hallados.append(f'ordena sin índice ({texto})')
+        else:
+            if 'Seq Scan on' in texto:
+                hallados.append(f'recorre toda la tabla ({texto})')
+            if re.search(r'(^|-> +)Sort ', texto):
+                hallados.append(f'ordena sin índice ({texto})')
+    return hallados
+
+def auditar(urlpatterns):
+    """[(sql, orígenes, plan, problemas)] de cada consulta distinta, las que tienen problemas primero."""
+    resultado = []
+    for sql, (params, origenes) in capturar(urlpatterns).items():
+        plan = explicar(sql, params)
+        resultado.append((sql, origenes, plan, problemas(sql, plan)))
+    return sorted(resultado, key=lambda r: (not r[3], r[1][0]))
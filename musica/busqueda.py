@@ -0,0 +1,311 @@
+"""
+Búsqueda de texto completo para el buscador de portada.
+
+Todo el texto buscable (notas, conciertos, lanzamientos, recomendaciones y
+artistas) se copia a un índice invertido que mantienen las señales, así una
+búsqueda es una consulta por índice con ranking en lugar de un
+LIKE '%q%' sobre cada columna de texto de cada tabla.
+
+Backends (misma interfaz, se elige según settings.MUSICA_BUSQUEDA_BACKEND o,
+si no está definido, según el motor de la base):
+- SQLiteFTS5Backend: tabla virtual FTS5 con tokenizer unicode61 y
+  remove_diacritics (insensible a tildes y mayúsculas), ranking bm25.
+- PostgresBackend: tabla con columna tsvector ('spanish') e índice GIN,
+  ranking ts_rank_cd. Las tildes se quitan en Python antes de indexar/buscar.
+La tabla de cada motor se crea en la migración 0005_busqueda.
+"""
+import asyncio
+import re
+import unicodedata
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from . import cache_paginas, tareas
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion
+
+TABLA = 'musica_busqueda'
+
+# Modelos indexados, por tipo de resultado.
+INDEXADOS = {
+    'nota': NotaBlog,
+    'concierto': Concierto,
+    'lanzamiento': Lanzamiento,
+    'recomendacion': Recomendacion,
+    'artista': Artista,
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, modelo in INDEXADOS.items()}
+
+_PALABRA_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _unir(*partes):
+    return ' '.join(str(p) for p in partes if p)
+
+def documento(tipo, obj):
+    """(titulo, cuerpo) que se indexan para `obj`."""
+    if tipo == 'nota':
+        return obj.titulo, _unir(strip_tags(obj.contenido), obj.tags)
+    if tipo == 'concierto':
+        return obj.nombre, _unir(obj.detalle, obj.ubicacion)
+    if tipo in ('lanzamiento', 'recomendacion'):
+        return obj.titulo, _unir(obj.descripcion, obj.artista.nombre)
+    if tipo == 'artista':
+        return obj.nombre, _unir(obj.biografia, obj.pais, obj.genero_principal)
+    raise ValueError(f"Tipo no indexable: {tipo}")
+
+def palabras(query):
+    """Palabras de la consulta del usuario (sin operadores ni comillas)."""
+    return _PALABRA_RE.findall(query or '')
+
+def sin_tildes(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+class Resultados:
+    """Página de resultados rankeados: `claves` es [(tipo, objeto_id), ...]."""
+
+    def __init__(self, claves, total, pagina, por_pagina):
+        self.claves = claves
+        self.total = total
+        self.pagina = pagina
+        self.por_pagina = por_pagina
+
+    @property
+    def tiene_siguiente(self):
+        return self.pagina * self.por_pagina < self.total
+
+    @property
+    def tiene_anterior(self):
+        return self.pagina > 1
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+
+class SQLiteFTS5Backend:
+    """
+    El rowid de la tabla FTS codifica (tipo, objeto_id) como objeto_id * 8 + código
+    del tipo: así actualizar o borrar un documento va por la clave primaria
+    (las columnas UNINDEXED de FTS5 no tienen índice).
+    """
+    CODIGOS = {'nota': 1, 'concierto': 2, 'lanzamiento': 3, 'recomendacion': 4, 'artista': 5}
+    TIPOS = {codigo: tipo for tipo, codigo in CODIGOS.items()}
+
+    def _rowid(self, tipo, objeto_id):
+        return int(objeto_id) * 8 + self.CODIGOS[tipo]
+
+    def crear_tabla(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} USING fts5("
+            "titulo, cuerpo, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def borrar_tabla(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+
+    def indexar(self, cursor, filas):
+        """filas: iterable de (tipo, objeto_id, titulo, cuerpo)."""
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {TABLA} (rowid, titulo, cuerpo) VALUES (%s, %s, %s)",
+            [(self._rowid(tipo, pk), titulo, cuerpo) for tipo, pk, titulo, cuerpo in filas],
+        )
+
+    def quitar(self, cursor, tipo, objeto_id):
+        cursor.execute(f"DELETE FROM {TABLA} WHERE rowid = %s", [self._rowid(tipo, objeto_id)])
+
+    def vaciar(self, cursor):
+        cursor.execute(f"DELETE FROM {TABLA}")
+
+    def buscar(self, cursor, query, limite, offset):
+        # Cada palabra como prefijo entre comillas: AND implícito, sin sintaxis FTS del usuario.
+        match = ' '.join('"%s"*' % p for p in palabras(query))
+        if not match:
+            return [], 0
+        cursor.execute(f"SELECT count(*) FROM {TABLA} WHERE {TABLA} MATCH %s", [match])
+        total = cursor.fetchone()[0]
+        # bm25 por columna (titulo, cuerpo): el título pesa más.
+        cursor.execute(
+            f"SELECT rowid FROM {TABLA} WHERE {TABLA} MATCH %s "
+            f"ORDER BY bm25({TABLA}, 10.0, 1.0) LIMIT %s OFFSET %s",
+            [match, limite, offset],
+        )
+        return [(self.TIPOS[rowid % 8], rowid // 8) for (rowid,) in cursor.fetchall()], total
+
+
+class PostgresBackend:
+
+    def crear_tabla(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLA} ("
+            "tipo varchar(20) NOT NULL, objeto_id bigint NOT NULL, "
+            "titulo text NOT NULL, cuerpo text NOT NULL, "
+            "documento tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('spanish', titulo), 'A') || "
+            "setweight(to_tsvector('spanish', cuerpo), 'B')) STORED, "
+            "PRIMARY KEY (tipo, objeto_id))"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {TABLA}_documento_idx ON {TABLA} USING GIN (documento)")
+
+    def borrar_tabla(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+
+    def indexar(self, cursor, filas):
+        cursor.executemany(
+            f"INSERT INTO {TABLA} (tipo, objeto_id, titulo, cuerpo) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (tipo, objeto_id) DO UPDATE SET titulo = EXCLUDED.titulo, cuerpo = EXCLUDED.cuerpo",
+            [(t, pk, sin_tildes(titulo), sin_tildes(cuerpo)) for t, pk, titulo, cuerpo in filas],
+        )
+
+    def quitar(self, cursor, tipo, objeto_id):
+        cursor.execute(f"DELETE FROM {TABLA} WHERE tipo = %s AND objeto_id = %s", [tipo, objeto_id])
+
+    def vaciar(self, cursor):
+        cursor.execute(f"TRUNCATE {TABLA}")
+
+    def buscar(self, cursor, query, limite, offset):
+        terminos = [sin_tildes(p) for p in palabras(query)]
+        if not terminos:
+            return [], 0
+        tsquery = ' & '.join(f"{t}:*" for t in terminos)
+        cursor.execute(
+            f"SELECT count(*) FROM {TABLA} WHERE documento @@ to_tsquery('spanish', %s)", [tsquery],
+        )
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT tipo, objeto_id FROM {TABLA} WHERE documento @@ to_tsquery('spanish', %s) "
+            "ORDER BY ts_rank_cd(documento, to_tsquery('spanish', %s)) DESC LIMIT %s OFFSET %s",
+            [tsquery, tsquery, limite, offset],
+        )
+        return list(cursor.fetchall()), total
+
+
+_BACKENDS_POR_MOTOR = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresBackend,
+}
+
+def backend_para(conn):
+    """Backend configurado en settings o, por defecto, el que corresponde al motor de `conn`."""
+    ruta = getattr(settings, 'MUSICA_BUSQUEDA_BACKEND', None)
+    if ruta:
+        return import_string(ruta)()
+    try:
+        return _BACKENDS_POR_MOTOR[conn.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"No hay backend de búsqueda para '{conn.vendor}'. Definí MUSICA_BUSQUEDA_BACKEND."
+        )
+
+
+# ----------------------------
+# API usada por señales, vistas y comandos
+# ----------------------------
+
+def indexar_objeto(obj):
+    tipo = TIPO_POR_MODELO[type(obj)]
+    titulo, cuerpo = documento(tipo, obj)
+    with connection.cursor() as cursor:
+        backend_para(connection).indexar(cursor, [(tipo, obj.pk, titulo, cuerpo)])
+
+@tareas.registrar('busqueda.indexar')
+def indexar_pk(label, pk):
+    """Tarea: reindexa el objeto (si todavía existe; si no, ya lo quitó la señal de borrado)."""
+    obj = apps.get_model(label)._default_manager.filter(pk=pk).first()
+    if obj is not None:
+        indexar_objeto(obj)
+        # Como en resincronizar_artista: la búsqueda pudo cachearse antes de reindexar.
+        cache_paginas.invalidar()
+
+def programar(obj):
+    """Encola la reindexación de `obj` (ver musica/tareas.py)."""
+    label = obj._meta.label_lower
+    tareas.encolar('busqueda.indexar', label, obj.pk, clave=f'busqueda:{label}:{obj.pk}')
+
+def quitar_objeto(obj):
+    tipo = TIPO_POR_MODELO[type(obj)]
+    with connection.cursor() as cursor:
+        backend_para(connection).quitar(cursor, tipo, obj.pk)
+
+def reconstruir(lote=500):
+    """Vacía el índice y lo vuelve a llenar. Devuelve {tipo: filas}."""
+    backend = backend_para(connection)
+    totales = {}
+    # Una sola transacción: en autocommit SQLite confirmaría (fsync) cada documento.
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.vaciar(cursor)
+        for tipo, modelo in INDEXADOS.items():
+            qs = modelo.objects.all()
+            if tipo in ('lanzamiento', 'recomendacion'):
+                qs = qs.select_related('artista')
+            filas = []
+            totales[tipo] = 0
+            for obj in qs.iterator(chunk_size=lote):
+                filas.append((tipo, obj.pk) + documento(tipo, obj))
+                if len(filas) >= lote:
+                    backend.indexar(cursor, filas)
+                    totales[tipo] += len(filas)
+                    filas = []
+            if filas:
+                backend.indexar(cursor, filas)
+                totales[tipo] += len(filas)
+    cache_paginas.invalidar()
+    return totales
+
+def buscar(query, pagina=1, por_pagina=12):
+    """Resultados rankeados de `query` (página 1-based)."""
+    pagina = max(int(pagina), 1)
+    with connection.cursor() as cursor:
+        claves, total = backend_para(connection).buscar(
+            cursor, query, por_pagina, (pagina - 1) * por_pagina,
+        )
+    return Resultados(claves, total, pagina, por_pagina)
+
+def del_request(request, por_pagina=12):
+    """
+    Resultados de ?q= y ?page= del request (None sin búsqueda). Se buscan una
+    sola vez: los piden el sello del GET condicional y la vista.
+    """
+    if not hasattr(request, '_resultados_busqueda'):
+        query = request.GET.get('q', '').strip()
+        try:
+            pagina = int(request.GET.get('page', 1))
+        except ValueError:
+            pagina = 1
+        request._resultados_busqueda = buscar(query, pagina, por_pagina) if query else None
+    return request._resultados_busqueda
+
+def _por_tipo(claves):
+    por_tipo = {}
+    for tipo, pk in claves:
+        por_tipo.setdefault(tipo, []).append(pk)
+    return por_tipo
+
+def _qs_cargar(tipo):
+    # Sin el ordering del modelo: el orden lo da el ranking, y el ORDER BY obligaba a ordenar en un B-tree temporal.
+    qs = INDEXADOS[tipo].objects.order_by()
+    if tipo in ('lanzamiento', 'recomendacion'):
+        qs = qs.select_related('artista')
+    return qs
+
+def _en_orden(claves, objetos):
+    return [(tipo, objetos[(tipo, pk)]) for tipo, pk in claves if (tipo, pk) in objetos]
+
+async def acargar(claves):
+    """
+    Instancias de los resultados en el orden del ranking, con una consulta
+    por tipo (lanzadas juntas con asyncio.gather). Devuelve [(tipo, obj)]
+    (omite las que ya no existan).
+    """
+    por_tipo = _por_tipo(claves)
+    lotes = await asyncio.gather(*(_qs_cargar(tipo).ain_bulk(pks) for tipo, pks in por_tipo.items()))
+    objetos = {}
+    for tipo, lote in zip(por_tipo, lotes):
+        for pk, obj in lote.items():
+            objetos[(tipo, pk)] = obj
+    return _en_orden(claves, objetos)
@@ -0,0 +1,125 @@
+"""
+Cache de páginas completas (portada e ingresos), una entrada por query string.
+
+Solo se cachean respuestas 200 a GET anónimos: la página de un usuario
+logueado lleva su nombre y los links de staff, y una respuesta que emite el
+token CSRF o tiene mensajes pendientes es de una sola persona.
+
+Invalidar no recorre claves (no se sabe qué query strings se pidieron): las
+claves llevan un número de generación y las señales lo incrementan cuando
+cambia el contenido (ver musica/signals.py). Las entradas viejas expiran solas.
+El número vive en el cache: con LocMem (uno por proceso) lo que invalida un
+proceso no lo ven los demás, así que `run_worker` exige un cache compartido
+(ver compartido()).
+
+Junto con el HTML se guardan el ETag y el Last-Modified de la respuesta
+(ver musica/condicional.py): un acierto de cache también puede ser un 304.
+
+Sirve tanto a vistas sync como async (portada e ingresos son async).
+
+El tiempo de vida se configura con settings.MUSICA_CACHE_PAGINAS (segundos;
+0 desactiva el cache).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+GENERACION = 'paginas:generacion'
+_ENCABEZADOS = ('ETag', 'Last-Modified')
+
+
+def _timeout():
+    return getattr(settings, 'MUSICA_CACHE_PAGINAS', 300)
+
+def _generacion():
+    generacion = cache.get(GENERACION)
+    if generacion is None:
+        # Arranca en el reloj (no en 1): si el contador se pierde, no se reusan generaciones viejas.
+        cache.add(GENERACION, time.time_ns(), None)
+        generacion = cache.get(GENERACION)
+    return generacion
+
+def invalidar():
+    """Descarta todas las páginas cacheadas (pasa a la generación siguiente)."""
+    try:
+        cache.incr(GENERACION)
+    except ValueError:
+        _generacion()
+
+def compartido():
+    """¿Ven los demás procesos lo que invalida éste? (sin cache de páginas no hay nada que invalidar)"""
+    return _timeout() <= 0 or not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+def _clave(request, nombre):
+    # Ruta completa tal cual: el template la repite (link "Ingresar" con ?next=).
+    digest = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'pagina:{nombre}:{_generacion()}:{digest}'
+
+def _cacheable(request):
+    return (
+        _timeout() > 0
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _consultar(request, nombre):
+    """(clave, respuesta cacheada) del request; clave None si no es cacheable."""
+    if not _cacheable(request):
+        return None, None
+    clave = _clave(request, nombre)
+    guardada = cache.get(clave)
+    if guardada is None:
+        return clave, None
+    contenido, encabezados = guardada
+    response = HttpResponse(contenido, headers=encabezados)
+    return clave, get_conditional_response(
+        request,
+        etag=encabezados.get('ETag'),
+        last_modified=parse_http_date_safe(encabezados.get('Last-Modified')),
+        response=response,
+    )
+
+def _guardar(request, clave, response):
+    if (
+        response.status_code == 200
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    ):
+        encabezados = {h: response[h] for h in _ENCABEZADOS if response.has_header(h)}
+        cache.set(clave, (response.content, encabezados), _timeout())
+
+
+def cachear(vista):
+    """Decorador: sirve la vista desde el cache de páginas cuando el request es cacheable."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def asincrona(request, *args, **kwargs):
+            # Sesión y cache son sincrónicos: fuera del event loop.
+            clave, response = await sync_to_async(_consultar)(request, vista.__name__)
+            if response is None:
+                response = await vista(request, *args, **kwargs)
+                if clave is not None:
+                    await sync_to_async(_guardar)(request, clave, response)
+            return response
+        return asincrona
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        clave, response = _consultar(request, vista.__name__)
+        if response is None:
+            response = vista(request, *args, **kwargs)
+            if clave is not None:
+                _guardar(request, clave, response)
+        return response
+    return envoltura
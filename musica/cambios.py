@@ -0,0 +1,160 @@
+"""
+Sincronización incremental del catálogo (el sitio espejo).
+
+En lugar de exportar todo (musica/catalogo.py), el espejo pide lo que cambió
+desde su última marca de agua:
+
+- Cada modelo de contenido tiene updated_at (auto_now) con un índice
+  (updated_at, id): "lo que cambió desde T" es un rango sobre el índice, y
+  cuesta según la cantidad de cambios, no el tamaño del catálogo.
+- Los borrados dejan una lápida (Borrado) desde las señales de post_delete.
+- leer() recorre primero las lápidas y después los modelos en orden de
+  dependencias (catalogo.ORDEN), por tandas de `limite` registros, con un
+  cursor keyset (updated_at, id) firmado. La ventana (desde, hasta] queda
+  fija al empezar: `hasta` es la marca de agua para la próxima vez.
+- `hasta` queda MARGEN segundos atrás de ahora: updated_at se fija antes
+  del COMMIT, y una transacción todavía abierta podría confirmar filas con
+  una fecha anterior a la marca ya entregada.
+
+Los registros tienen el formato de las líneas de export_musica, más
+{"modelo": ..., "borrado": id} para las lápidas: un archivo de cambios se
+aplica en el espejo con `manage.py import_musica`.
+
+Los usuarios no tienen fecha de modificación: viajan con la exportación
+completa (export_musica --modelos auth.user).
+"""
+import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import catalogo
+from .models import Borrado
+
+MODELOS = [label for label in catalogo.ORDEN if label != 'auth.user']
+_SALT = 'musica.cambios'
+
+
+def margen():
+    return datetime.timedelta(seconds=getattr(settings, 'MUSICA_CAMBIOS_MARGEN', 5))
+
+def marca(texto):
+    """Marca de agua ISO 8601 -> datetime aware (ValueError si no es válida)."""
+    valor = parse_datetime(texto or '')
+    if valor is None:
+        raise ValueError(f"Marca de agua inválida: {texto!r} (se espera una fecha ISO 8601).")
+    return valor if timezone.is_aware(valor) else timezone.make_aware(valor, datetime.timezone.utc)
+
+
+# ----------------------------
+# Lápidas
+# ----------------------------
+
+def registrar_borrado(obj):
+    Borrado.objects.create(modelo=obj._meta.label_lower, objeto_id=obj.pk)
+
+def purgar(dias):
+    """
+    Borra las lápidas de hace más de `dias` días. Un espejo que sincroniza con
+    menos frecuencia que eso tiene que volver a partir de una exportación completa.
+    """
+    limite = timezone.now() - datetime.timedelta(days=dias)
+    return Borrado.objects.filter(borrado_en__lt=limite).delete()[0]
+
+
+# ----------------------------
+# Lectura
+# ----------------------------
+
+# Tablas en el orden en que se recorren: primero lápidas (un objeto borrado y
+# vuelto a crear con otro id no choca) y después el contenido, padres antes que hijos.
+def _tablas():
+    return [(None, Borrado, 'borrado_en')] + [(label, apps.get_model(label), 'updated_at') for label in MODELOS]
+
+
+class Lote:
+    """Una tanda de cambios: `registros`, y `siguiente` (cursor) o, al terminar, `marca` (nueva marca de agua)."""
+
+    def __init__(self, registros, siguiente, hasta):
+        self.registros = registros
+        self.siguiente = siguiente
+        self.hasta = hasta
+
+    @property
+    def marca(self):
+        return None if self.siguiente else self.hasta
+
+
+def _estado(cursor):
+    try:
+        estado = signing.loads(cursor, salt=_SALT)
+        return (
+            marca(estado['desde']) if estado['desde'] else None, marca(estado['hasta']),
+            int(estado['tabla']), estado['ultimo'],
+        )
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise ValueError("Cursor inválido.")
+
+def _cursor(desde, hasta, tabla, ultimo):
+    return signing.dumps({
+        'desde': desde.isoformat() if desde else None, 'hasta': hasta.isoformat(),
+        'tabla': tabla, 'ultimo': ultimo,
+    }, salt=_SALT, compress=True)
+
+def _consulta(modelo, campo, desde, hasta, ultimo):
+    qs = modelo.objects.filter(**{f'{campo}__lte': hasta})
+    if desde:
+        qs = qs.filter(**{f'{campo}__gt': desde})
+    if ultimo:
+        fecha, pk = marca(ultimo[0]), ultimo[1]
+        qs = qs.filter(Q(**{f'{campo}__gt': fecha}) | Q(**{campo: fecha, 'id__gt': pk}))
+    return qs.order_by(campo, 'id')
+
+def leer(desde=None, cursor=None, limite=500):
+    """
+    Próxima tanda de cambios posteriores a la marca `desde` (None: todo), o la
+    que sigue a `cursor`. ValueError si el cursor no es válido.
+    """
+    if cursor:
+        desde, hasta, tabla, ultimo = _estado(cursor)
+    else:
+        hasta, tabla, ultimo = timezone.now() - margen(), 0, None
+        if desde and desde >= hasta:
+            return Lote([], None, desde)  # todavía no hay nada firme después de la marca
+
+    registros = []
+    tablas = _tablas()
+    while tabla < len(tablas):
+        label, modelo, campo = tablas[tabla]
+        restante = limite - len(registros)
+        qs = _consulta(modelo, campo, desde, hasta, ultimo)
+        if label is None:
+            filas = list(qs.values_list('modelo', 'objeto_id', campo, 'id')[:restante])
+            registros += [{'modelo': m, 'borrado': pk} for m, pk, _fecha, _id in filas]
+            ultima = filas[-1][2:] if filas else None
+        else:
+            filas = list(qs.values(*catalogo.columnas(modelo))[:restante])
+            registros += [{'modelo': label, 'fila': fila} for fila in filas]
+            ultima = (filas[-1][campo], filas[-1]['id']) if filas else None
+        if len(filas) == restante:
+            # Tanda llena: la tabla puede tener más; se sigue desde la última fila entregada.
+            return Lote(registros, _cursor(desde, hasta, tabla, [ultima[0].isoformat(), ultima[1]]), hasta)
+        tabla, ultimo = tabla + 1, None
+    return Lote(registros, None, hasta)
+
+def recorrer(desde=None, limite=500):
+    """(registros, marca): todos los registros de la ventana, pedidos tanda por tanda, y la nueva marca de agua."""
+    lote = leer(desde, limite=limite)
+    hasta = lote.hasta
+    def registros():
+        nonlocal lote
+        while True:
+            yield from lote.registros
+            if not lote.siguiente:
+                return
+            lote = leer(cursor=lote.siguiente, limite=limite)
+    return registros(), hasta
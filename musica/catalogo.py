@@ -0,0 +1,295 @@
+"""
+Exportación / importación del catálogo en NDJSON (ver `manage.py export_musica`
+e `import_musica`).
+
+Los backups con dumpdata eran un único array JSON: se cargan enteros en
+memoria y no se pueden procesar por partes. Acá cada línea es una fila:
+
+    {"formato": "musica-ndjson", "version": 1, "modelos": [...]}      (cabecera)
+    {"modelo": "musica.artista", "fila": {"id": 1, "nombre": "...", ...}}
+    ...
+
+- Exportar recorre cada tabla con .values().iterator(): memoria constante.
+- Los modelos van en orden de dependencias (ORDEN): usuarios, artistas,
+  notas, ..., comentarios; al importar, cada FK apunta a una fila ya cargada.
+- Importar arma lotes y hace bulk_create con upsert por id (reimportar el
+  mismo archivo actualiza en lugar de duplicar), sin señales; al final se
+  recalculan FeedEntry, el índice de búsqueda y los contadores de comentarios.
+- Los archivos de cambios (`export_cambios`, ver musica/cambios.py) usan el
+  mismo formato, con líneas {"modelo": ..., "borrado": id} para los borrados;
+  al importarlos sólo se recalcula lo derivado de las filas tocadas.
+- UTF-8 de punta a punta (ensure_ascii=False, decodificación estricta).
+  reparar_texto() corrige el mojibake de los backups viejos: UTF-8 leído
+  como cp850/cp1252 ("Ã¡", "├│") y vuelto a guardar.
+- .gz comprime con gzip; .zst con zstandard (dependencia opcional).
+"""
+import datetime
+import decimal
+import gzip
+import io
+import json
+import time
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from .semillas import sin_auto_now
+
+FORMATO = 'musica-ndjson'
+VERSION = 1
+
+# Orden de dependencias: cada modelo sólo apunta a modelos anteriores.
+ORDEN = [
+    'auth.user',
+    'musica.artista',
+    'musica.notablog',
+    'musica.concierto',
+    'musica.lanzamiento',
+    'musica.recomendacion',
+    'musica.comentario',
+]
+
+
+# ----------------------------
+# Archivos
+# ----------------------------
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Para archivos .zst hace falta el paquete zstandard (pip install zstandard).")
+    return zstandard
+
+def abrir(ruta, modo):
+    """Archivo binario de `ruta` ('rb' / 'wb'), comprimido según la extensión."""
+    if ruta.endswith('.gz'):
+        return gzip.open(ruta, modo, compresslevel=6)
+    if ruta.endswith('.zst'):
+        zstandard = _zstd()
+        crudo = open(ruta, modo)
+        if 'w' in modo:
+            return zstandard.ZstdCompressor(level=10).stream_writer(crudo, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(crudo, closefd=True)
+    return open(ruta, modo)
+
+
+# ----------------------------
+# Texto
+# ----------------------------
+
+# Secuencias que deja UTF-8 decodificado con cada página de códigos de un byte. Hay que
+# elegirla por las marcas: con la equivocada el texto también "mejora" ('mÃºsica' como cp850
+# da 'mǧsica').
+_MARCAS = {
+    'cp850': ('├', '┬', 'Ô'),
+    'cp1252': ('Ã', 'Â', 'â€'),
+    'latin-1': ('Ã', 'Â'),
+}
+
+def _marcas(texto, marcas):
+    return sum(texto.count(m) for m in marcas)
+
+def reparar_texto(texto):
+    """
+    Deshace el mojibake de `texto` si lo tiene: vuelve a los bytes originales
+    con la página de códigos cuyas marcas aparecen y los decodifica como
+    UTF-8; gana el candidato con menos marcas. Si ninguno lo deja mejor,
+    devuelve el texto sin cambios.
+    """
+    if not texto:
+        return texto
+    todas = [m for marcas in _MARCAS.values() for m in marcas]
+    mejor, minimo = texto, _marcas(texto, todas)
+    for codificacion, marcas in _MARCAS.items():
+        if not _marcas(texto, marcas):
+            continue
+        try:
+            candidato = texto.encode(codificacion).decode('utf-8')
+        except UnicodeError:
+            continue
+        restantes = _marcas(candidato, todas)
+        if restantes < minimo:
+            mejor, minimo = candidato, restantes
+    return mejor
+
+
+# ----------------------------
+# Exportar
+# ----------------------------
+
+def columnas(modelo):
+    return [f.attname for f in modelo._meta.concrete_fields]
+
+def a_json(valor):
+    """`default` de json.dumps para los valores de .values() (fechas, decimales)."""
+    if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return str(valor)
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+def linea(datos):
+    return (json.dumps(datos, ensure_ascii=False, default=a_json) + '\n').encode('utf-8')
+
+def exportar(salida, modelos=ORDEN, lote=2000, reparar=False, reportar=None):
+    """Escribe el catálogo en el archivo binario `salida`. Devuelve {modelo: filas}."""
+    salida.write(linea({'formato': FORMATO, 'version': VERSION, 'modelos': list(modelos)}))
+    totales = {}
+    for label in modelos:
+        modelo = apps.get_model(label)
+        campos = columnas(modelo)
+        inicio = time.perf_counter()
+        n = 0
+        for fila in modelo._default_manager.order_by('pk').values(*campos).iterator(chunk_size=lote):
+            if reparar:
+                fila = {k: reparar_texto(v) if isinstance(v, str) else v for k, v in fila.items()}
+            salida.write(linea({'modelo': label, 'fila': fila}))
+            n += 1
+        totales[label] = n
+        if reportar:
+            reportar(label, n, time.perf_counter() - inicio)
+    return totales
+
+
+# ----------------------------
+# Importar
+# ----------------------------
+
+class ArchivoInvalido(ValueError):
+    pass
+
+def _lineas(entrada):
+    texto = io.TextIOWrapper(entrada, encoding='utf-8-sig', errors='strict', newline='\n')
+    for numero, linea in enumerate(texto, 1):
+        if linea.strip():
+            try:
+                yield numero, json.loads(linea)
+            except json.JSONDecodeError as e:
+                raise ArchivoInvalido(f"Línea {numero}: JSON inválido ({e.msg}).")
+
+def _instancia(modelo, campos, fila, reparar):
+    datos = {}
+    for attname, valor in fila.items():
+        campo = campos.get(attname)
+        if campo is None:
+            continue  # columna que ya no existe: se ignora
+        if reparar and isinstance(valor, str):
+            valor = reparar_texto(valor)
+        datos[attname] = campo.to_python(valor) if valor is not None else None
+    return modelo(**datos)
+
+def _guardar(modelo, objs, lote):
+    pk = modelo._meta.pk
+    actualizables = [f.name for f in modelo._meta.concrete_fields if f is not pk]
+    modelo._default_manager.bulk_create(
+        objs, batch_size=lote,
+        update_conflicts=True, unique_fields=[pk.name], update_fields=actualizables,
+    )
+
+class Importacion:
+    """Resultado de importar(): filas por modelo y, en archivos de cambios, los pks tocados y borrados."""
+
+    def __init__(self, cabecera):
+        self.incremental = 'hasta' in cabecera  # archivo de export_cambios
+        self.totales = {label: 0 for label in cabecera['modelos']}
+        self.borrados = {label: 0 for label in cabecera['modelos']}
+        self.tocados = {label: set() for label in cabecera['modelos']} if self.incremental else None
+
+def _borrar(modelo, pks, lote):
+    """Borra con el ORM (no con SQL): las señales quitan feed, búsqueda, contadores y dejan la lápida."""
+    borrados = 0
+    for i in range(0, len(pks), lote):
+        borrados += modelo._default_manager.filter(pk__in=pks[i:i + lote]).delete()[1].get(modelo._meta.label, 0)
+    return borrados
+
+def importar(entrada, lote=2000, reparar=False, reportar=None):
+    """
+    Carga el archivo binario `entrada` (de exportar() o de export_cambios) en
+    una transacción. Devuelve una Importacion.
+    """
+    lineas = _lineas(entrada)
+    try:
+        _numero, cabecera = next(lineas)
+    except StopIteration:
+        raise ArchivoInvalido("El archivo está vacío.")
+    if not isinstance(cabecera, dict) or cabecera.get('formato') != FORMATO or cabecera.get('version') != VERSION:
+        raise ArchivoInvalido(f"No es un archivo {FORMATO} v{VERSION}.")
+    modelos = {label: apps.get_model(label) for label in cabecera['modelos']}
+    resultado = Importacion(cabecera)
+    totales = resultado.totales
+
+    actual, buffer, bajas, inicio = None, [], [], time.perf_counter()
+
+    def vaciar():
+        if buffer:
+            _guardar(modelos[actual], buffer, lote)
+            totales[actual] += len(buffer)
+            if resultado.tocados is not None:
+                resultado.tocados[actual].update(obj.pk for obj in buffer)
+            buffer.clear()
+        if bajas:
+            resultado.borrados[actual] += _borrar(modelos[actual], bajas, lote)
+            bajas.clear()
+
+    with transaction.atomic(), sin_auto_now(*modelos.values()):
+        campos_de = {label: {f.attname: f for f in m._meta.concrete_fields} for label, m in modelos.items()}
+        for numero, registro in lineas:
+            label = registro.get('modelo')
+            if label not in modelos:
+                raise ArchivoInvalido(f"Línea {numero}: modelo {label!r} no declarado en la cabecera.")
+            if label != actual or ('borrado' in registro) != bool(bajas):
+                vaciar()
+                if label != actual:
+                    if actual and reportar:
+                        reportar(actual, totales[actual], time.perf_counter() - inicio)
+                    actual, inicio = label, time.perf_counter()
+            if 'borrado' in registro:
+                bajas.append(registro['borrado'])
+            else:
+                buffer.append(_instancia(modelos[label], campos_de[label], registro['fila'], reparar))
+            if len(buffer) + len(bajas) >= lote:
+                vaciar()
+        vaciar()
+        if actual and reportar:
+            reportar(actual, totales[actual], time.perf_counter() - inicio)
+
+        # Los ids vinieron del archivo: las secuencias (Postgres) tienen que seguir desde el máximo.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(modelos.values())):
+                cursor.execute(sql)
+    return resultado
+
+def reconstruir_derivados(lote=2000):
+    """Lo que importar() no mantiene (no dispara señales): feed, búsqueda y contadores de comentarios."""
+    from . import busqueda, comentarios, feed
+
+    comentarios.recalcular()
+    feed.reconstruir(lote=lote)
+    busqueda.reconstruir(lote=lote)
+
+def actualizar_derivados(tocados, lote=500):
+    """
+    reconstruir_derivados() sólo para los objetos de `tocados` ({modelo: pks},
+    de un archivo de cambios): el costo sigue a la cantidad de cambios.
+    """
+    from . import busqueda, cache_paginas, comentarios, feed, tareas
+
+    for label, pks in tocados.items():
+        modelo = apps.get_model(label)
+        pks = sorted(pks)
+        for i in range(0, len(pks), lote):
+            qs = modelo._default_manager.filter(pk__in=pks[i:i + lote])
+            if label == 'musica.comentario':
+                comentarios.recalcular(qs.values_list('nota_id', flat=True))
+                continue
+            for obj in qs:
+                if type(obj) in feed.TIPO_POR_MODELO:
+                    feed.sincronizar(obj)
+                if type(obj) in busqueda.TIPO_POR_MODELO:
+                    busqueda.programar(obj)
+                if label == 'musica.artista':
+                    # Sus lanzamientos y recomendaciones muestran su nombre e imagen (ver musica/signals.py).
+                    tareas.encolar('artista.resincronizar', obj.pk, clave=f'artista:{obj.pk}')
+    cache_paginas.invalidar()
@@ -0,0 +1,113 @@
+"""
+Escritura y lectura de comentarios de notas.
+
+- NotaBlog.comentarios_count y ultimo_comentario_at se mantienen con UPDATEs
+  atómicos en la base (F(), sin leer-modificar-escribir en Python) cuando se
+  crea o borra un comentario (señales en musica/signals.py). La página de la
+  nota y su ETag los leen sin contar filas.
+- recalcular(): los contadores desde la tabla de comentarios, una consulta
+  por tanda de notas; para las cargas sin señales (seed_musica,
+  import_musica, loaddata).
+- permitido(): límite de comentarios por usuario y minuto, con contadores
+  en el cache (settings.MUSICA_COMENTARIOS_POR_MINUTO; 0 = sin límite).
+- pagina(): comentarios de una nota paginados por cursor (created_at, id);
+  la primera página va en el HTML y el resto se pide a la vista JSON.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import consultas
+from .models import Comentario, NotaBlog
+from .paginacion import paginar
+
+POR_PAGINA = 20
+ORDEN = ['-created_at', '-id']
+VENTANA = 60  # segundos
+# Notas por UPDATE en recalcular() (límite de parámetros de SQLite).
+_NOTAS_POR_CONSULTA = 500
+
+
+# ----------------------------
+# Contadores
+# ----------------------------
+
+def sumar(comentario):
+    """Un comentario nuevo: +1 y, si es el más reciente, su fecha como último comentario."""
+    NotaBlog.objects.filter(pk=comentario.nota_id).update(
+        comentarios_count=F('comentarios_count') + 1,
+        ultimo_comentario_at=Greatest(Coalesce('ultimo_comentario_at', Value(comentario.created_at)), Value(comentario.created_at)),
+    )
+
+def restar(comentario):
+    """Un comentario borrado: -1 y el último comentario que queda (puede ser el borrado)."""
+    NotaBlog.objects.filter(pk=comentario.nota_id).update(
+        comentarios_count=Greatest(F('comentarios_count') - 1, Value(0)),
+        ultimo_comentario_at=_ultimo(),
+    )
+
+def _ultimo():
+    return Subquery(
+        Comentario.objects.filter(nota=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+def recalcular(notas=None):
+    """Recalcula los contadores desde la tabla de comentarios (todas las notas, o los pks de `notas`)."""
+    cantidad = Subquery(
+        Comentario.objects.filter(nota=OuterRef('pk')).order_by().values('nota')
+        .annotate(n=Count('pk')).values('n')[:1]
+    )
+    valores = {'comentarios_count': Coalesce(cantidad, 0), 'ultimo_comentario_at': _ultimo()}
+    if notas is None:
+        return NotaBlog.objects.update(**valores)
+    notas = sorted(set(notas))
+    total = 0
+    for i in range(0, len(notas), _NOTAS_POR_CONSULTA):
+        total += NotaBlog.objects.filter(pk__in=notas[i:i + _NOTAS_POR_CONSULTA]).update(**valores)
+    return total
+
+
+# ----------------------------
+# Límite por usuario
+# ----------------------------
+
+def _limite():
+    return getattr(settings, 'MUSICA_COMENTARIOS_POR_MINUTO', 5)
+
+def permitido(usuario):
+    """
+    True si `usuario` todavía puede comentar en esta ventana (y la cuenta).
+    Ventanas fijas de VENTANA segundos: un contador por usuario y ventana.
+    """
+    limite = _limite()
+    if limite <= 0:
+        return True
+    clave = f'comentarios:limite:{usuario.pk}:{int(time.time() // VENTANA)}'
+    if cache.add(clave, 1, VENTANA * 2):
+        return True
+    try:
+        return cache.incr(clave) <= limite
+    except ValueError:  # expiró entre el add y el incr
+        cache.add(clave, 1, VENTANA * 2)
+        return True
+
+
+# ----------------------------
+# Lectura paginada
+# ----------------------------
+
+def pagina(nota_id, cursor=None, limite=POR_PAGINA):
+    """Página de comentarios de la nota, del más nuevo al más viejo (keyset sobre el índice (nota, created_at, id))."""
+    return paginar(consultas.para('comentarios_nota').filter(nota_id=nota_id), ORDEN, cursor=cursor, limite=limite)
+
+def a_dict(comentario):
+    autor = comentario.autor
+    return {
+        'id': comentario.pk,
+        'autor': autor.get_full_name() or autor.username,
+        'contenido': comentario.contenido,
+        'created_at': comentario.created_at.isoformat(),
+    }
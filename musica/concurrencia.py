@@ -0,0 +1,172 @@
+"""
+Lecturas con escrituras concurrentes (ver `manage.py medir_sqlite`).
+
+Sobre una copia de la base (la original no se toca) corren durante unos
+segundos N threads lectores, que repiten las consultas de la página de una
+nota (la nota y su primera página de comentarios), y M escritores, que
+comentan a un ritmo fijo como lo haría la vista (el save con sus señales:
+contadores de la nota, feed, caches). Cada iteración es un "request": al
+empezar y al terminar se llama a close_old_connections(), que respeta
+CONN_MAX_AGE igual que los signals de request_started/request_finished.
+
+Se mide con la configuración actual (blogmusica/basedatos.py) y con la de
+antes (ANTERIOR: rollback journal, una conexión por request, transacciones
+DEFERRED): lecturas por segundo, latencia de las lecturas y errores
+"database is locked".
+"""
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, close_old_connections, connections
+from django.test.utils import override_settings
+
+from . import comentarios, consultas
+from .models import Comentario, NotaBlog
+
+# La configuración sin ajustes: valores por defecto de SQLite y de Django.
+ANTERIOR = {
+    'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'cache_size': -2000, 'mmap_size': 0},
+    'CONN_MAX_AGE': 0,
+    'transaction_mode': None,
+}
+_NOTAS_POR_LECTOR = 50
+
+
+class Resultado:
+
+    def __init__(self, nombre, segundos):
+        self.nombre = nombre
+        self.segundos = segundos
+        self.latencias = []
+        self.escrituras = 0
+        self.bloqueos_lectura = 0
+        self.bloqueos_escritura = 0
+        self._lock = threading.Lock()
+
+    @property
+    def lecturas_por_segundo(self):
+        return len(self.latencias) / self.segundos
+
+    def percentil(self, p):
+        if len(self.latencias) < 2:
+            return self.latencias[0] if self.latencias else 0.0
+        return statistics.quantiles(self.latencias, n=100)[p - 1]
+
+
+@contextmanager
+def _copia(origen):
+    """Copia consistente de la base (API de backup de SQLite: sirve aunque esté en WAL)."""
+    directorio = tempfile.mkdtemp(prefix='medir_sqlite_')
+    destino = os.path.join(directorio, 'db.sqlite3')
+    fuente, copia = sqlite3.connect(origen), sqlite3.connect(destino)
+    try:
+        fuente.backup(copia)
+    finally:
+        fuente.close()
+        copia.close()
+    try:
+        yield destino
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+@contextmanager
+def _configuracion(nombre_base, config):
+    """Apunta 'default' a `nombre_base` con la configuración dada (None = la de settings)."""
+    connections.close_all()
+    ajustes = connections.settings['default']  # el mismo dict que usa cada conexión nueva
+    original = {'NAME': ajustes['NAME'], 'CONN_MAX_AGE': ajustes['CONN_MAX_AGE'], 'OPTIONS': ajustes['OPTIONS']}
+    ajustes['NAME'] = nombre_base
+    cambios = {}
+    if config is not None:
+        ajustes['CONN_MAX_AGE'] = config['CONN_MAX_AGE']
+        opciones = {k: v for k, v in ajustes['OPTIONS'].items() if k != 'transaction_mode'}
+        if config['transaction_mode']:
+            opciones['transaction_mode'] = config['transaction_mode']
+        ajustes['OPTIONS'] = opciones
+        cambios['SQLITE_PRAGMAS'] = config['pragmas']
+    try:
+        with override_settings(**cambios):
+            yield
+    finally:
+        connections.close_all()
+        ajustes.update(original)
+
+
+def _lector(resultado, notas, fin):
+    try:
+        while time.perf_counter() < fin:
+            close_old_connections()
+            nota = random.choice(notas)
+            inicio = time.perf_counter()
+            try:
+                consultas.para('nota_detalle').get(pk=nota)
+                comentarios.pagina(nota)
+            except OperationalError:
+                with resultado._lock:
+                    resultado.bloqueos_lectura += 1
+                continue
+            finally:
+                close_old_connections()
+            with resultado._lock:
+                resultado.latencias.append(time.perf_counter() - inicio)
+    finally:
+        connections.close_all()
+
+def _escritor(resultado, notas, autor, fin, intervalo):
+    try:
+        proxima = time.perf_counter()
+        while proxima < fin:
+            time.sleep(max(0.0, proxima - time.perf_counter()))
+            proxima += intervalo
+            close_old_connections()
+            try:
+                Comentario(nota_id=random.choice(notas), autor_id=autor, contenido='Comentario de prueba').save()
+            except OperationalError:
+                with resultado._lock:
+                    resultado.bloqueos_escritura += 1
+            else:
+                with resultado._lock:
+                    resultado.escrituras += 1
+            finally:
+                close_old_connections()
+    finally:
+        connections.close_all()
+
+def _correr(nombre, segundos, lectores, escritores, por_segundo):
+    notas = list(NotaBlog.objects.order_by('-comentarios_count').values_list('pk', flat=True)[:_NOTAS_POR_LECTOR])
+    autor = User.objects.order_by('pk').values_list('pk', flat=True).first()
+    if not notas or autor is None:
+        raise ValueError("La base no tiene notas o usuarios: cargar datos (p.ej. manage.py seed_musica).")
+    connections.close_all()
+
+    resultado = Resultado(nombre, segundos)
+    fin = time.perf_counter() + segundos
+    threads = [threading.Thread(target=_lector, args=(resultado, notas, fin)) for _ in range(lectores)]
+    threads += [
+        threading.Thread(target=_escritor, args=(resultado, notas, autor, fin, 1 / por_segundo))
+        for _ in range(escritores)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultado
+
+
+def medir(segundos=5, lectores=4, escritores=1, por_segundo=20, comparar=True):
+    """[Resultado] de la configuración anterior (si `comparar`) y de la actual, cada una sobre su copia."""
+    origen = connections['default'].settings_dict['NAME']
+    configuraciones = ([('anterior', ANTERIOR)] if comparar else []) + [('actual', None)]
+    resultados = []
+    for nombre, config in configuraciones:
+        with _copia(origen) as copia, _configuracion(copia, config):
+            resultados.append(_correr(nombre, segundos, lectores, escritores, por_segundo))
+    return resultados
@@ -0,0 +1,161 @@
+"""
+GET condicional (ETag / Last-Modified) para las vistas de contenido.
+
+Antes de renderizar, cada vista calcula un "sello" barato de lo que muestra
+(una consulta de agregados o por clave primaria): la última modificación
+(updated_at) y la cantidad de filas de las tablas involucradas, para las
+notas la cantidad y fecha del último comentario, y para una búsqueda sus
+resultados. Si el navegador ya tiene
+esa versión (If-None-Match / If-Modified-Since) se responde 304 sin
+ejecutar la vista ni el template.
+
+El ETag incluye además la versión de los templates y, con sesión iniciada,
+al usuario y la clave de la sesión: la barra de navegación y el formulario
+de comentarios cambian con la sesión, y el formulario lleva el token CSRF,
+que se renueva con cada login (un 304 dejaría en el navegador un formulario
+con el token viejo y el POST fallaría con 403). Esas respuestas no llevan
+Last-Modified, que es el mismo para todos los usuarios.
+
+Con vistas async el sello se calcula con el ORM asíncrono (las consultas de
+agregados van juntas con asyncio.gather) antes de entrar a `condition`, que
+llama a las funciones de ETag sin await.
+"""
+import asyncio
+import datetime
+import hashlib
+from functools import wraps
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+from . import busqueda
+from .models import Artista, FeedEntry
+
+# Cambia cuando se despliegan templates nuevos: el mismo contenido con otro HTML es otra versión.
+_TEMPLATES = Path(__file__).resolve().parent / 'templates'
+_DESPLIEGUE = max((p.stat().st_mtime_ns for p in _TEMPLATES.rglob('*.html')), default=0)
+
+
+_AGREGADOS = {'ultima': Max('updated_at'), 'filas': Count('pk')}
+
+def _agregado(modelo):
+    """(última modificación, cantidad de filas) de la tabla, en una consulta."""
+    datos = modelo.objects.aggregate(**_AGREGADOS)
+    return datos['ultima'], datos['filas']
+
+async def _aagregado(modelo):
+    datos = await modelo.objects.aaggregate(**_AGREGADOS)
+    return datos['ultima'], datos['filas']
+
+def _sello_tablas(partes):
+    return list(partes), max((ultima for ultima, _filas in partes if ultima), default=None)
+
+def tablas(*modelos):
+    """Sello de un listado: agregados de cada tabla que muestra (las filas cuentan los borrados)."""
+    def sello(request, *args, **kwargs):
+        return _sello_tablas([_agregado(m) for m in modelos])
+    async def asincrono(request, *args, **kwargs):
+        return _sello_tablas(await asyncio.gather(*(_aagregado(m) for m in modelos)))
+    sello.asincrono = asincrono
+    return sello
+
+def portada(buscador=False):
+    """
+    Portada e ingresos: FeedEntry se renueva con cada cambio de contenido;
+    Artista por la búsqueda. Con `buscador`, un ?q= suma los resultados
+    (claves y total): el índice se actualiza en una tarea, después que las
+    tablas, y sin ellos el ETag no cambiaría al reindexar. Esas respuestas
+    van sin Last-Modified por lo mismo.
+    """
+    base = tablas(FeedEntry, Artista)
+    if not buscador:
+        return base
+    def con_resultados(datos, resultados):
+        if resultados is None:
+            return datos
+        return datos[0] + [(list(map(tuple, resultados.claves)), resultados.total)], None
+    def sello(request, *args, **kwargs):
+        return con_resultados(base(request, *args, **kwargs), busqueda.del_request(request))
+    async def asincrono(request, *args, **kwargs):
+        datos, resultados = await asyncio.gather(
+            base.asincrono(request, *args, **kwargs), sync_to_async(busqueda.del_request)(request),
+        )
+        return con_resultados(datos, resultados)
+    sello.asincrono = asincrono
+    return sello
+
+def objeto(modelo, relacionados=(), comentarios=False):
+    """Sello de un detalle (por pk o slug): su updated_at, el de sus relaciones y (notas) los comentarios."""
+    campos = ['updated_at'] + [f'{r}__updated_at' for r in relacionados]
+    if comentarios:
+        campos += ['comentarios_count', 'ultimo_comentario_at']  # desnormalizados: sin JOIN a comentarios
+    def consulta(pk, slug):
+        qs = modelo.objects.filter(pk=pk) if slug is None else modelo.objects.filter(slug=slug)
+        return qs.values_list(*campos)
+    def resultado(fila):
+        if fila is None:
+            return None  # la vista responde 404
+        return fila, max(v for v in fila if isinstance(v, datetime.datetime))
+    def sello(request, pk=None, slug=None):
+        return resultado(consulta(pk, slug).first())
+    async def asincrono(request, pk=None, slug=None):
+        return resultado(await consulta(pk, slug).afirst())
+    sello.asincrono = asincrono
+    return sello
+
+
+def _hay_mensajes(request):
+    # Lee la sesión; de paso resuelve request.user (lo usa el ETag), que también sale de ella.
+    request.user.is_authenticated
+    return bool(len(messages.get_messages(request)))
+
+def _sello_de(request, sello, args, kwargs):
+    """El sello se calcula una sola vez por request (lo piden el ETag y el Last-Modified)."""
+    if not hasattr(request, '_sello_condicional'):
+        datos = None
+        # Sólo lecturas sin mensajes pendientes: un 304 no mostraría el mensaje.
+        if request.method in ('GET', 'HEAD') and not _hay_mensajes(request):
+            datos = sello(request, *args, **kwargs)
+        request._sello_condicional = datos
+    return request._sello_condicional
+
+async def _asello_de(request, sello, args, kwargs):
+    if not hasattr(request, '_sello_condicional'):
+        datos = None
+        if request.method in ('GET', 'HEAD') and not await sync_to_async(_hay_mensajes)(request):
+            datos = await sello.asincrono(request, *args, **kwargs)
+        request._sello_condicional = datos
+    return request._sello_condicional
+
+
+def condicional(sello):
+    """Decorador: aplica `condition` con ETag y Last-Modified calculados a partir de `sello`."""
+    def etag(request, *args, **kwargs):
+        datos = _sello_de(request, sello, args, kwargs)
+        if datos is None:
+            return None
+        usuario = (request.user.pk, request.session.session_key) if request.user.is_authenticated else 0
+        return hashlib.md5(repr((_DESPLIEGUE, usuario, datos[0])).encode('utf-8')).hexdigest()
+
+    def ultima_modificacion(request, *args, **kwargs):
+        datos = _sello_de(request, sello, args, kwargs)
+        if not datos or request.user.is_authenticated:
+            return None  # por usuario: sólo el ETag (ver arriba)
+        return datos[1]
+
+    decorador = condition(etag_func=etag, last_modified_func=ultima_modificacion)
+
+    def aplicar(vista):
+        envuelta = decorador(vista)
+        if not iscoroutinefunction(vista):
+            return envuelta
+
+        @wraps(vista)
+        async def asincrona(request, *args, **kwargs):
+            await _asello_de(request, sello, args, kwargs)  # después, etag() lo encuentra memoizado
+            return await envuelta(request, *args, **kwargs)
+        return asincrona
+    return aplicar
@@ -0,0 +1,68 @@
+"""
+Planes de consulta por vista.
+
+Cada vista declara qué relaciones y columnas renderiza su template; el plan
+aplica select_related / prefetch_related / only() al queryset, así la
+cantidad de consultas no crece con la cantidad de filas (sin N+1) y no se
+traen columnas grandes que el template no usa.
+
+Los planes quedan registrados por nombre de vista en PLANES (los usan los
+tests de consultas acotadas y las auditorías).
+"""
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion, Comentario
+
+
+class Plan:
+
+    def __init__(self, modelo, select=(), prefetch=(), only=()):
+        self.modelo = modelo
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+        self.only = tuple(only)
+
+    def aplicar(self, qs):
+        if self.select:
+            qs = qs.select_related(*self.select)
+        if self.prefetch:
+            # Un Prefetch con queryset se arma de nuevo en cada uso (pueden venir como funciones).
+            qs = qs.prefetch_related(*[p() if callable(p) else p for p in self.prefetch])
+        if self.only:
+            qs = qs.only(*self.only)
+        return qs
+
+    def queryset(self):
+        return self.aplicar(self.modelo.objects.all())
+
+
+PLANES = {
+    'lista_artistas': Plan(Artista, only=('id', 'nombre', 'imagen', 'genero_principal')),
+    'lista_conciertos': Plan(Concierto, only=('id', 'nombre', 'imagen', 'fecha')),
+    'lista_lanzamientos': Plan(
+        Lanzamiento,
+        select=('artista',),
+        only=('id', 'titulo', 'fecha_lanzamiento', 'artista__id', 'artista__nombre', 'artista__imagen'),
+    ),
+    'lista_recomendaciones': Plan(
+        Recomendacion,
+        select=('artista',),
+        only=('id', 'titulo', 'descripcion', 'fecha', 'artista__id', 'artista__nombre'),
+    ),
+    'ultimas_notas': Plan(NotaBlog, only=('id', 'titulo', 'slug', 'created_at')),
+    'artista_detalle': Plan(Artista),
+    'concierto_detalle': Plan(Concierto),
+    'lanzamiento_detalle': Plan(Lanzamiento, select=('artista',)),
+    'recomendacion_detalle': Plan(Recomendacion, select=('artista',)),
+    'nota_detalle': Plan(NotaBlog),
+    # Páginas de comentarios (ver musica/comentarios.py): la nota muestra la primera.
+    'comentarios_nota': Plan(
+        Comentario,
+        select=('autor',),
+        only=('id', 'nota_id', 'contenido', 'created_at',
+              'autor__id', 'autor__username', 'autor__first_name', 'autor__last_name'),
+    ),
+}
+
+
+def para(vista):
+    """Queryset base de `vista` con su plan aplicado."""
+    return PLANES[vista].queryset()
@@ -0,0 +1,85 @@
+"""
+Feed de portada e ingresos.
+
+El timeline se lee de FeedEntry, una tabla desnormalizada con una fila por
+nota, concierto, lanzamiento y recomendación (título, preview, imagen, url y
+created_at ya calculados). Las señales la mantienen al día con sincronizar()
+y quitar(); `manage.py backfill_feed` la reconstruye entera. Las páginas se
+leen por cursor sobre el índice (created_at, id): una sola consulta, sin
+importar cuántos elementos haya cargados.
+"""
+from django.db import transaction
+
+from . import cache_paginas, tarjetas
+from .models import FeedEntry, NotaBlog, Concierto, Lanzamiento, Recomendacion
+from .paginacion import apaginar
+
+
+# Modelos que alimentan el timeline, por tipo de tarjeta.
+FUENTES = {
+    'nota': NotaBlog,
+    'concierto': Concierto,
+    'lanzamiento': Lanzamiento,
+    'recomendacion': Recomendacion,
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, modelo in FUENTES.items()}
+
+
+# ----------------------------
+# Tabla materializada (FeedEntry)
+# ----------------------------
+
+def _valores_entrada(tipo, obj):
+    """Campos de FeedEntry calculados a partir del objeto de contenido."""
+    datos = tarjetas.calcular(tipo, obj)
+    return {
+        'titulo': datos['titulo'][:255],
+        'preview': datos['preview'],
+        'image_url': datos['image_url'] or '',
+        'url': datos['url'],
+        'created_at': obj.created_at,
+    }
+
+def sincronizar(obj):
+    """Crea o actualiza la entrada del feed de `obj`."""
+    tipo = TIPO_POR_MODELO[type(obj)]
+    FeedEntry.objects.update_or_create(
+        tipo=tipo, objeto_id=obj.pk, defaults=_valores_entrada(tipo, obj),
+    )
+
+def quitar(obj):
+    """Borra la entrada del feed de `obj` (si existe)."""
+    tipo = TIPO_POR_MODELO[type(obj)]
+    FeedEntry.objects.filter(tipo=tipo, objeto_id=obj.pk).delete()
+
+def reconstruir(lote=500):
+    """
+    Regenera la tabla completa a partir de los modelos de contenido.
+    Devuelve un dict {tipo: filas}.
+    """
+    totales = {}
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        for tipo, modelo in FUENTES.items():
+            qs = modelo.objects.all()
+            if any(f.name == 'artista' for f in modelo._meta.get_fields()):
+                qs = qs.select_related('artista')
+            buffer = []
+            totales[tipo] = 0
+            for obj in qs.iterator(chunk_size=lote):
+                buffer.append(FeedEntry(tipo=tipo, objeto_id=obj.pk, **_valores_entrada(tipo, obj)))
+                if len(buffer) >= lote:
+                    FeedEntry.objects.bulk_create(buffer)
+                    totales[tipo] += len(buffer)
+                    buffer = []
+            if buffer:
+                FeedEntry.objects.bulk_create(buffer)
+                totales[tipo] += len(buffer)
+    cache_paginas.invalidar()
+    return totales
+
+ORDEN_FEED = ['-created_at', '-id']
+
+async def apagina(cursor=None, limite=30):
+    """Página del timeline ordenada por (created_at, id) descendente (keyset), para las vistas async."""
+    return await apaginar(FeedEntry.objects.all(), ORDEN_FEED, cursor=cursor, limite=limite)
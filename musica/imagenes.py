@@ -0,0 +1,190 @@
+"""
+Derivados de imágenes subidas (miniaturas responsive).
+
+Las tarjetas y los detalles servían el archivo original tal como se subió.
+Ahora, al guardar un objeto con una imagen nueva, se generan versiones de
+ancho fijo (ANCHOS) en AVIF, WebP y JPEG junto al original:
+
+    artistas/foto.jpg -> artistas/foto-320w.avif, artistas/foto-320w.webp, ...
+                         artistas/foto.derivados.json   (manifiesto)
+
+El template tag `{% imagen %}` (templatetags/musica_imagenes.py) lee el
+manifiesto y arma un <picture> con srcset por formato; mientras no haya
+derivados, sigue mostrando el original.
+
+La generación no corre en el request que sube la imagen: es una tarea de la
+cola (musica/tareas.py, `manage.py run_worker`). Al terminar, el objeto se
+vuelve a guardar (update_fields=['updated_at']) para que las señales renueven
+tarjetas, fragmentos, páginas cacheadas y ETags.
+
+Pillow se importa recién al generar: los procesos web importan este módulo
+(señales, template tag) pero sólo leen manifiestos, y así no lo cargan al
+arrancar.
+"""
+import json
+import posixpath
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+
+from . import tareas
+
+ANCHOS = (320, 640, 1280)
+# Formato -> (extensión, nombre en Pillow, opciones de encode). En orden de preferencia para <picture>.
+FORMATOS = {
+    'avif': ('avif', 'AVIF', {'quality': 50}),
+    'webp': ('webp', 'WEBP', {'quality': 75, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+MIME = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+# Campos de imagen con derivados, por modelo ('app_label.modelo').
+CAMPOS = {
+    'musica.artista': ('imagen',),
+    'musica.notablog': ('imagen_destacada',),
+    'musica.concierto': ('imagen',),
+    'musica.lanzamiento': ('imagen',),
+}
+
+TIMEOUT = 60 * 60 * 24
+# Un original sin manifiesto se vuelve a mirar pronto (la generación puede estar en curso).
+TIMEOUT_SIN_DERIVADOS = 60
+
+
+def formatos_disponibles():
+    """Formatos que el Pillow instalado sabe escribir (AVIF depende de cómo se compiló)."""
+    from PIL import features
+
+    return [f for f in FORMATOS if f == 'jpeg' or features.check(f)]
+
+def _base(nombre):
+    return posixpath.splitext(nombre)[0]
+
+def ruta_manifiesto(nombre):
+    return f'{_base(nombre)}.derivados.json'
+
+def ruta_derivado(nombre, ancho, formato):
+    return f'{_base(nombre)}-{ancho}w.{FORMATOS[formato][0]}'
+
+def _clave(nombre):
+    return f'derivados:{nombre}'
+
+def estaticos():
+    """Storage sobre musica/static (p.ej. la portada), con URLs bajo STATIC_URL."""
+    return FileSystemStorage(location=Path(__file__).resolve().parent / 'static', base_url=settings.STATIC_URL)
+
+
+# ----------------------------
+# Generación
+# ----------------------------
+
+def _para_formato(img, formato):
+    from PIL import Image
+
+    if formato == 'jpeg' and img.mode != 'RGB':
+        # JPEG no tiene alfa: se aplana sobre blanco.
+        fondo = Image.new('RGB', img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.getchannel('A') if 'A' in img.getbands() else None)
+        return fondo
+    if img.mode not in ('RGB', 'RGBA'):
+        return img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    return img
+
+def _guardar(storage, ruta, contenido):
+    if storage.exists(ruta):
+        storage.delete(ruta)  # mismo nombre: si no, el storage agrega un sufijo al azar
+    storage.save(ruta, ContentFile(contenido))
+
+def generar(nombre, storage=default_storage):
+    """
+    Genera los derivados de la imagen `nombre` y su manifiesto. Cada ancho se
+    redimensiona una vez y se codifica en todos los formatos. Devuelve el manifiesto.
+    """
+    from PIL import Image, ImageOps
+
+    with storage.open(nombre, 'rb') as fh:
+        original = Image.open(fh)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    ancho, alto = original.size
+    anchos = [a for a in ANCHOS if a <= ancho] or [ancho]
+
+    manifiesto = {'ancho': ancho, 'alto': alto, 'derivados': {}}
+    for a in anchos:
+        img = original if a == ancho else original.resize((a, max(1, round(alto * a / ancho))), Image.LANCZOS)
+        for formato in formatos_disponibles():
+            _ext, nombre_pil, opciones = FORMATOS[formato]
+            buffer = BytesIO()
+            _para_formato(img, formato).save(buffer, format=nombre_pil, **opciones)
+            ruta = ruta_derivado(nombre, a, formato)
+            _guardar(storage, ruta, buffer.getvalue())
+            manifiesto['derivados'].setdefault(formato, []).append([a, ruta])
+
+    _guardar(storage, ruta_manifiesto(nombre), json.dumps(manifiesto).encode('utf-8'))
+    cache.set(_clave(nombre), manifiesto, TIMEOUT)
+    return manifiesto
+
+
+# ----------------------------
+# Lectura (templates)
+# ----------------------------
+
+def manifiesto(nombre, storage=default_storage):
+    """Manifiesto de derivados de `nombre` ({} si todavía no hay). Cacheado."""
+    datos = cache.get(_clave(nombre))
+    if datos is None:
+        datos = {}
+        ruta = ruta_manifiesto(nombre)
+        if storage.exists(ruta):
+            with storage.open(ruta, 'rb') as fh:
+                datos = json.loads(fh.read())
+        cache.set(_clave(nombre), datos, TIMEOUT if datos else TIMEOUT_SIN_DERIVADOS)
+    return datos
+
+def nombre_de_url(url):
+    """'/media/artistas/x.jpg' -> 'artistas/x.jpg' (None si no es un archivo de MEDIA)."""
+    if url and settings.MEDIA_URL and url.startswith(settings.MEDIA_URL):
+        return unquote(url[len(settings.MEDIA_URL):])
+    return None
+
+def srcsets(nombre, storage=default_storage):
+    """[(formato, mime, 'url 320w, url 640w'), ...] en orden de preferencia, o [] si no hay derivados."""
+    derivados = manifiesto(nombre, storage).get('derivados', {})
+    return [
+        (formato, MIME[formato], ', '.join(f'{storage.url(ruta)} {ancho}w' for ancho, ruta in derivados[formato]))
+        for formato in FORMATOS if derivados.get(formato)
+    ]
+
+
+# ----------------------------
+# Programación (al subir)
+# ----------------------------
+
+@tareas.registrar('imagenes.procesar')
+def procesar(label, pk, campo):
+    """Tarea: genera los derivados de `campo` del objeto y lo vuelve a guardar para renovar caches."""
+    modelo = apps.get_model(label)
+    obj = modelo._default_manager.filter(pk=pk).first()
+    if obj is None:
+        return
+    archivo = getattr(obj, campo)
+    if not archivo or not archivo.storage.exists(archivo.name):
+        return  # sin imagen, o el archivo no está (p.ej. una base restaurada sin media/): reintentar no sirve
+    generar(archivo.name, archivo.storage)
+    obj.save(update_fields=['updated_at'])
+
+def programar(obj):
+    """Encola los derivados que le falten a las imágenes de `obj` (ver musica/tareas.py)."""
+    label = obj._meta.label_lower
+    for campo in CAMPOS.get(label, ()):
+        archivo = getattr(obj, campo)
+        if not archivo or manifiesto(archivo.name, archivo.storage):
+            continue
+        # La clave lleva el archivo: otra imagen subida mientras tanto es otra tarea.
+        tareas.encolar('imagenes.procesar', label, obj.pk, campo, clave=f'imagenes:{label}:{obj.pk}:{archivo.name}')
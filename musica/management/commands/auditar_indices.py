@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import auditoria
+from musica import urls as musica_urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre cada consulta que hacen las vistas de musica (y las del worker y los "
+        "cambios incrementales) y marca las que recorren tablas enteras u ordenan sin índice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--planes", action="store_true", help="Mostrar también el plan de las consultas sin problemas.")
+        parser.add_argument(
+            "--estricto",
+            action="store_true",
+            help="Terminar con error si alguna consulta tiene problemas (para CI).",
+        )
+
+    def handle(self, *args, **opts):
+        self.stdout.write(self.style.NOTICE("=== AUDITORÍA DE ÍNDICES ==="))
+        resultado = auditoria.auditar(musica_urls.urlpatterns)
+        con_problemas = [r for r in resultado if r[3]]
+
+        for sql, origenes, plan, problemas in resultado:
+            if not problemas and not opts["planes"]:
+                continue
+            estilo = self.style.ERROR if problemas else self.style.SUCCESS
+            self.stdout.write(estilo(f"\n{'✘' if problemas else '✔'} {', '.join(origenes[:3])}{' ...' if len(origenes) > 3 else ''}"))
+            self.stdout.write(f"  {sql[:300]}{'...' if len(sql) > 300 else ''}")
+            for linea in plan:
+                self.stdout.write(f"    {linea}")
+            for problema in problemas:
+                self.stdout.write(self.style.WARNING(f"  → {problema}"))
+
+        self.stdout.write(f"\nConsultas distintas: {len(resultado)}. Con problemas: {len(con_problemas)}.")
+        if con_problemas and opts["estricto"]:
+            raise CommandError(f"{len(con_problemas)} consultas recorren tablas enteras u ordenan sin índice.")
+        if not con_problemas:
+            self.stdout.write(self.style.SUCCESS("✔ Todas las consultas usan índices."))
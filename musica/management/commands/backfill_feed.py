@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from musica import feed
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla FeedEntry (timeline de portada/ingresos) a partir del contenido existente."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Cantidad de filas por bulk_create (por defecto 500).",
+        )
+
+    def handle(self, *args, **opts):
+        totales = feed.reconstruir(lote=opts["lote"])
+        for tipo, n in totales.items():
+            self.stdout.write(f"{tipo}: {n}")
+        self.stdout.write(self.style.SUCCESS(f"✔ FeedEntry reconstruida ({sum(totales.values())} filas)."))
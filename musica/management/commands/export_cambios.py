@@ -0,0 +1,67 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import cambios, catalogo
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta como NDJSON lo que cambió (filas nuevas o modificadas y borrados) desde una marca "
+        "de agua, para aplicarlo en el espejo con import_musica. Imprime la nueva marca."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Archivo de salida (.ndjson, .ndjson.gz, .ndjson.zst) o - para stdout.")
+        parser.add_argument("--desde", help="Marca de agua (ISO 8601) de la sincronización anterior. Sin marca: todo.")
+        parser.add_argument(
+            "--estado",
+            help="Archivo con la marca de agua: se lee como --desde y, si la exportación termina, se reescribe con la nueva.",
+        )
+        parser.add_argument("--lote", type=int, default=1000, help="Registros por consulta (por defecto 1000).")
+        parser.add_argument(
+            "--purgar-borrados",
+            type=int,
+            metavar="DIAS",
+            help="Además, borrar las lápidas de más de DIAS días.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["lote"] <= 0:
+            raise CommandError("--lote tiene que ser positivo.")
+        estado = Path(opts["estado"]) if opts["estado"] else None
+        texto = opts["desde"]
+        if texto is None and estado and estado.exists():
+            texto = estado.read_text(encoding="utf-8").strip()
+        try:
+            desde = cambios.marca(texto) if texto else None
+            salida = sys.stdout.buffer if opts["archivo"] == "-" else catalogo.abrir(opts["archivo"], "wb")
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        inicio = time.perf_counter()
+        registros, hasta = cambios.recorrer(desde, limite=opts["lote"])
+        n = 0
+        try:
+            salida.write(catalogo.linea({
+                "formato": catalogo.FORMATO, "version": catalogo.VERSION, "modelos": cambios.MODELOS,
+                "desde": desde.isoformat() if desde else None, "hasta": hasta.isoformat(),
+            }))
+            for registro in registros:
+                salida.write(catalogo.linea(registro))
+                n += 1
+        finally:
+            if salida is not sys.stdout.buffer:
+                salida.close()
+        segundos = time.perf_counter() - inicio
+
+        if estado:
+            estado.write_text(hasta.isoformat() + "\n", encoding="utf-8")
+        if opts["purgar_borrados"] is not None:
+            self.stderr.write(f"Lápidas purgadas: {cambios.purgar(opts['purgar_borrados'])}")
+        # El resumen va a stderr: con "-" stdout es el archivo.
+        self.stderr.write(self.style.SUCCESS(
+            f"✔ {n} cambios exportados en {segundos:.1f}s ({n / segundos if segundos else 0:.0f}/s). Marca: {hasta.isoformat()}"
+        ))
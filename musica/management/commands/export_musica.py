@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import catalogo
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta el catálogo (usuarios, artistas, notas, conciertos, lanzamientos, recomendaciones "
+        "y comentarios) como NDJSON, una fila por línea. Comprime según la extensión (.gz, .zst)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Archivo de salida (.ndjson, .ndjson.gz, .ndjson.zst) o - para stdout.")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por lectura (por defecto 2000).")
+        parser.add_argument(
+            "--modelos",
+            nargs="+",
+            choices=catalogo.ORDEN,
+            metavar="MODELO",
+            help="Exportar sólo estos modelos (app_label.modelo); se mantiene el orden de dependencias.",
+        )
+        parser.add_argument(
+            "--reparar-mojibake",
+            action="store_true",
+            help="Corregir textos con mojibake (UTF-8 leído como cp850/cp1252) al exportar.",
+        )
+
+    def _reportar(self, modelo, filas, segundos):
+        self.stderr.write(f"{modelo}: {filas} filas en {segundos:.1f}s ({filas / segundos if segundos else 0:.0f} filas/s)")
+
+    def handle(self, *args, **opts):
+        if opts["lote"] <= 0:
+            raise CommandError("--lote tiene que ser positivo.")
+        modelos = [m for m in catalogo.ORDEN if not opts["modelos"] or m in opts["modelos"]]
+        inicio = time.perf_counter()
+        try:
+            salida = sys.stdout.buffer if opts["archivo"] == "-" else catalogo.abrir(opts["archivo"], "wb")
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+        try:
+            totales = catalogo.exportar(
+                salida, modelos, lote=opts["lote"], reparar=opts["reparar_mojibake"], reportar=self._reportar,
+            )
+        finally:
+            if salida is not sys.stdout.buffer:
+                salida.close()
+        segundos = time.perf_counter() - inicio
+        total = sum(totales.values())
+        # El resumen va a stderr: con "-" stdout es el archivo.
+        self.stderr.write(self.style.SUCCESS(
+            f"✔ {total} filas exportadas en {segundos:.1f}s ({total / segundos if segundos else 0:.0f} filas/s)."
+        ))
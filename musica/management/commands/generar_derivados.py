@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from musica import imagenes
+
+
+class Command(BaseCommand):
+    help = "Genera los derivados responsive (AVIF/WebP/JPEG) de las imágenes subidas que no los tienen."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Regenera también las imágenes que ya tienen derivados.",
+        )
+        parser.add_argument(
+            "--estaticos",
+            nargs="*",
+            metavar="RUTA",
+            help="Genera los derivados de estáticos del app (por defecto musica/portada.png) en musica/static; va antes de collectstatic en el despliegue.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["estaticos"] is not None:
+            storage = imagenes.estaticos()
+            for ruta in opts["estaticos"] or ["musica/portada.png"]:
+                imagenes.generar(ruta, storage)
+                self.stdout.write(f"{ruta}")
+            return
+
+        total = 0
+        for label, campos in imagenes.CAMPOS.items():
+            modelo = apps.get_model(label)
+            n = 0
+            for obj in modelo.objects.only("pk", *campos).iterator():
+                for campo in campos:
+                    archivo = getattr(obj, campo)
+                    if not archivo:
+                        continue
+                    if not opts["todos"] and imagenes.manifiesto(archivo.name, archivo.storage):
+                        continue
+                    if not archivo.storage.exists(archivo.name):
+                        self.stderr.write(f"Falta el archivo {archivo.name} ({label} {obj.pk})")
+                        continue
+                    # Vuelve a guardar el objeto: tarjetas, páginas y ETags pasan a usar los derivados.
+                    imagenes.procesar(label, obj.pk, campo)
+                    n += 1
+            self.stdout.write(f"{label}: {n}")
+            total += n
+        self.stdout.write(self.style.SUCCESS(f"✔ Derivados generados para {total} imágenes."))
@@ -0,0 +1,64 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import catalogo
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa un catálogo NDJSON generado con export_musica o export_cambios (.gz y .zst se "
+        "descomprimen). Las filas existentes (mismo id) se actualizan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", help="Archivo de entrada o - para stdin.")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por bulk_create (por defecto 2000).")
+        parser.add_argument(
+            "--reparar-mojibake",
+            action="store_true",
+            help="Corregir textos con mojibake (UTF-8 leído como cp850/cp1252) al importar.",
+        )
+        parser.add_argument(
+            "--sin-indices",
+            action="store_true",
+            help="No reconstruir FeedEntry, el índice de búsqueda ni los contadores de comentarios al terminar.",
+        )
+
+    def _reportar(self, modelo, filas, segundos):
+        self.stdout.write(f"{modelo}: {filas} filas en {segundos:.1f}s ({filas / segundos if segundos else 0:.0f} filas/s)")
+
+    def handle(self, *args, **opts):
+        if opts["lote"] <= 0:
+            raise CommandError("--lote tiene que ser positivo.")
+        inicio = time.perf_counter()
+        try:
+            entrada = sys.stdin.buffer if opts["archivo"] == "-" else catalogo.abrir(opts["archivo"], "rb")
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+        try:
+            resultado = catalogo.importar(
+                entrada, lote=opts["lote"], reparar=opts["reparar_mojibake"], reportar=self._reportar,
+            )
+        except (catalogo.ArchivoInvalido, UnicodeDecodeError) as e:
+            raise CommandError(f"No se pudo importar {opts['archivo']}: {e}")
+        finally:
+            if entrada is not sys.stdin.buffer:
+                entrada.close()
+        segundos = time.perf_counter() - inicio
+        total = sum(resultado.totales.values())
+        borrados = sum(resultado.borrados.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {total} filas importadas{f' y {borrados} borradas' if borrados else ''} en {segundos:.1f}s "
+            f"({total / segundos if segundos else 0:.0f} filas/s)."
+        ))
+        if opts["sin_indices"]:
+            return
+        if resultado.incremental:
+            # Archivo de cambios: sólo lo derivado de las filas que trajo.
+            catalogo.actualizar_derivados(resultado.tocados)
+            self.stdout.write(self.style.SUCCESS("✔ FeedEntry, búsqueda y contadores actualizados para las filas importadas."))
+        else:
+            catalogo.reconstruir_derivados(lote=opts["lote"])
+            self.stdout.write(self.style.SUCCESS("✔ FeedEntry, búsqueda y contadores de comentarios reconstruidos."))
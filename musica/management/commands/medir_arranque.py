@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogmusica import arranque
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque de un worker en procesos nuevos (python -X importtime): importar wsgi.py, "
+        "el primer response y el segundo, y qué paquetes y módulos se llevan el tiempo de los imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ruta", default="/", help="Ruta que se pide (por defecto la portada).")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Procesos a medir; se informa la mediana.")
+        parser.add_argument("--top", type=int, default=10, help="Paquetes y módulos a mostrar.")
+        parser.add_argument(
+            "--sin-precarga",
+            action="store_true",
+            help="Medir con DJ_PRECARGA y DJ_TEMPLATES_PRECOMPILAR en False (para comparar).",
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            medido = arranque.medir(opts["ruta"], opts["repeticiones"], precarga=not opts["sin_precarga"])
+        except RuntimeError as exc:
+            raise CommandError(f"No se pudo medir: {exc}")
+        t = medido["tiempos"]
+        self.stdout.write(self.style.NOTICE(
+            f"=== ARRANQUE: GET {opts['ruta']} ({medido['status']}), mediana de {opts['repeticiones']} procesos"
+            f"{', sin precarga' if opts['sin_precarga'] else ''} ==="
+        ))
+        self.stdout.write(f"  importar wsgi.py     {t['importar'] * 1000:8.1f} ms")
+        self.stdout.write(f"  primer response      {t['primer_response'] * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"  hasta el 1er response {(t['importar'] + t['primer_response']) * 1000:7.1f} ms"
+        ))
+        self.stdout.write(f"  segundo response     {t['segundo_response'] * 1000:8.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nImports por paquete (tiempo propio)"))
+        for paquete, segundos in sorted(medido["paquetes"].items(), key=lambda x: -x[1])[:opts["top"]]:
+            self.stdout.write(f"  {segundos * 1000:8.1f} ms  {paquete}")
+        self.stdout.write(self.style.MIGRATE_HEADING("\nMódulos del proyecto (acumulado)"))
+        propios = [(m, s) for m, s in medido["modulos"].items() if m.split(".")[0] in ("musica", "blogmusica")]
+        for modulo, segundos in sorted(propios, key=lambda x: -x[1])[:opts["top"]]:
+            self.stdout.write(f"  {segundos * 1000:8.1f} ms  {modulo}")
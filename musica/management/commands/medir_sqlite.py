@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blogmusica import basedatos
+from musica import concurrencia
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide lecturas (página de una nota) con escrituras de comentarios concurrentes sobre una copia de la "
+        "base, con la configuración de SQLite actual (WAL, PRAGMAs, conexiones persistentes) y con la anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--segundos", type=float, default=5, help="Duración de cada medición (por defecto 5).")
+        parser.add_argument("--lectores", type=int, default=4, help="Threads que leen (por defecto 4).")
+        parser.add_argument("--escritores", type=int, default=1, help="Threads que comentan (por defecto 1).")
+        parser.add_argument(
+            "--escrituras-por-segundo",
+            type=float,
+            default=20,
+            help="Comentarios por segundo de cada escritor (por defecto 20).",
+        )
+        parser.add_argument("--solo-actual", action="store_true", help="No medir la configuración anterior.")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("Esta medición es para SQLite.")
+        self.stdout.write(self.style.NOTICE(
+            f"=== LECTURAS CON ESCRITURAS CONCURRENTES: {opts['lectores']} lectores, {opts['escritores']} "
+            f"escritores a {opts['escrituras_por_segundo']:g}/s, {opts['segundos']:g} s ==="
+        ))
+        self.stdout.write(f"PRAGMAs actuales: {basedatos.pragmas()}")
+        try:
+            resultados = concurrencia.medir(
+                opts["segundos"], opts["lectores"], opts["escritores"], opts["escrituras_por_segundo"],
+                comparar=not opts["solo_actual"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"\n{'configuración':<14}{'lecturas/s':>12}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'escrituras':>12}{'bloqueos L/E':>14}"
+        )
+        for r in resultados:
+            self.stdout.write(
+                f"{r.nombre:<14}{r.lecturas_por_segundo:>12.0f}{r.percentil(50) * 1000:>9.2f}"
+                f"{r.percentil(95) * 1000:>9.2f}{r.percentil(99) * 1000:>9.2f}{r.escrituras:>12}"
+                f"{f'{r.bloqueos_lectura}/{r.bloqueos_escritura}':>14}"
+            )
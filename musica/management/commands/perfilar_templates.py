@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from blogmusica import plantillas
+from musica import auditoria
+from musica import urls as musica_urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Pide cada ruta de musica con el cliente de pruebas (sin caches) con el perfil de templates "
+        "activo y muestra dónde se va el tiempo de render: por template, por tag/variable y por filtro."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5, help="Veces que se pide cada ruta (por defecto 5).")
+        parser.add_argument("--top", type=int, default=15, help="Filas por tabla (por defecto 15).")
+        parser.add_argument(
+            "--orden",
+            choices=("propio", "total", "llamadas"),
+            default="propio",
+            help="Orden de las tablas: tiempo propio (sin lo anidado), total o cantidad de llamadas.",
+        )
+
+    def handle(self, *args, **opts):
+        pedidos = auditoria.pedidos(musica_urls.urlpatterns)
+        perfil = plantillas.Perfil()
+        with auditoria.cliente_sin_cache() as cliente:
+            plantillas.instalar()  # adentro: el entorno de pruebas reemplaza Template._render
+            for _origen, url, params in pedidos:
+                cliente.get(url, params)  # el primero compila los templates: no se cuenta
+            for _ in range(opts["repeticiones"]):
+                for _origen, url, params in pedidos:
+                    with plantillas.perfilar() as medido:
+                        cliente.get(url, params)
+                    perfil.sumar(medido)
+
+        self.stdout.write(self.style.NOTICE(
+            f"=== PERFIL DE TEMPLATES ({len(pedidos)} rutas x {opts['repeticiones']}) ==="
+        ))
+        for tipo, titulo in (("template", "Templates"), ("nodo", "Tags y variables"), ("filtro", "Filtros")):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{titulo}"))
+            self.stdout.write(f"  {'llamadas':>8}  {'total ms':>9}  {'propio ms':>9}")
+            for fila in perfil.filas(tipo, opts["orden"])[:opts["top"]]:
+                self.stdout.write(
+                    f"  {fila['llamadas']:>8}  {fila['total_ms']:>9.2f}  {fila['propio_ms']:>9.2f}  {fila['nombre']}"
+                )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogmusica import plantillas
+
+
+class Command(BaseCommand):
+    help = (
+        "Compila todos los templates (los del proyecto y los de las apps) y falla si alguno tiene errores "
+        "de sintaxis. En el servidor lo mismo corre al arrancar con DJ_TEMPLATES_PRECOMPILAR=True."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lentos", type=int, default=5, help="Cuántos de los más lentos de compilar mostrar.")
+
+    def handle(self, *args, **opts):
+        resultado = plantillas.precompilar()
+        errores = [(nombre, error) for nombre, _s, error in resultado if error]
+        for nombre, error in errores:
+            self.stderr.write(self.style.ERROR(f"✘ {nombre}: {error}"))
+
+        for nombre, segundos, _error in sorted(resultado, key=lambda r: -r[1])[:opts["lentos"]]:
+            self.stdout.write(f"  {segundos * 1000:7.2f} ms  {nombre}")
+        total = sum(segundos for _n, segundos, _e in resultado)
+        self.stdout.write(f"Templates: {len(resultado)} en {total * 1000:.0f} ms.")
+        if errores:
+            raise CommandError(f"{len(errores)} templates no compilan.")
+        self.stdout.write(self.style.SUCCESS("✔ Todos los templates compilan."))
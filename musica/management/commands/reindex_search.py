@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from musica import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de texto completo (notas, conciertos, lanzamientos, recomendaciones y artistas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Cantidad de documentos por tanda (por defecto 500).",
+        )
+
+    def handle(self, *args, **opts):
+        totales = busqueda.reconstruir(lote=opts["lote"])
+        for tipo, n in totales.items():
+            self.stdout.write(f"{tipo}: {n}")
+        self.stdout.write(self.style.SUCCESS(f"✔ Índice de búsqueda reconstruido ({sum(totales.values())} documentos)."))
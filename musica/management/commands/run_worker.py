@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import cache_paginas, tareas
+
+
+class Command(BaseCommand):
+    help = "Ejecuta las tareas encoladas (derivados de imágenes, índice de búsqueda, ...) con un pool de threads o procesos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Tareas en paralelo (por defecto 2).",
+        )
+        parser.add_argument(
+            "--procesos",
+            action="store_true",
+            help="Usa un pool de procesos en lugar de threads (tareas de CPU, como los derivados).",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando la cola está vacía (por defecto 1).",
+        )
+        parser.add_argument(
+            "--una-vez",
+            action="store_true",
+            help="Vacía la cola (lo disponible ahora) y termina; útil desde cron.",
+        )
+        parser.add_argument(
+            "--purgar",
+            type=int,
+            metavar="DIAS",
+            help="Antes de empezar, borra las tareas hechas hace más de DIAS días.",
+        )
+
+    def handle(self, *args, **opts):
+        if not cache_paginas.compartido():
+            # Las tareas reindexan y resincronizan: su invalidación quedaría en la memoria del worker
+            # y los procesos web seguirían sirviendo las páginas viejas hasta que venzan.
+            raise CommandError(
+                "El cache es de memoria local (uno por proceso): los procesos web no verían lo que "
+                "invalidan las tareas. Configurar DJ_CACHE_DIR (u otro cache compartido), o DJ_CACHE_PAGINAS=0."
+            )
+        if opts["purgar"] is not None:
+            self.stdout.write(f"Purgadas: {tareas.purgar(opts['purgar'])}")
+
+        workers = max(1, opts["workers"])
+        if opts["procesos"]:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=tareas.inicializar_proceso,
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="musica-worker")
+
+        worker = tareas.identificador()
+        totales = {}
+        self.stdout.write(f"Worker {worker} ({workers} {'procesos' if opts['procesos'] else 'threads'})")
+        try:
+            with pool:
+                while True:
+                    recuperadas = tareas.recuperar_vencidas()
+                    if recuperadas:
+                        self.stdout.write(f"Tareas vencidas devueltas a la cola: {recuperadas}")
+                    pks = tareas.tomar(worker, workers * 2)
+                    if not pks:
+                        if opts["una_vez"]:
+                            break
+                        time.sleep(opts["intervalo"])
+                        continue
+                    for futuro in wait([pool.submit(tareas.ejecutar_en_pool, pk) for pk in pks]).done:
+                        estado = futuro.result()
+                        totales[estado] = totales.get(estado, 0) + 1
+        except KeyboardInterrupt:
+            pass
+        resumen = ", ".join(f"{estado}: {n}" for estado, n in sorted(totales.items())) or "sin tareas"
+        self.stdout.write(self.style.SUCCESS(f"✔ Worker detenido ({resumen})."))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from musica import semillas
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos (artistas, notas, conciertos, lanzamientos, recomendaciones, "
+        "usuarios y comentarios) con bulk_create, para pruebas de carga."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--escala",
+            type=float,
+            default=1.0,
+            help="Factor sobre el volumen base (escala 1 = 10k notas, 50k comentarios, 2k artistas...).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Semilla del generador (por defecto 0).")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas por bulk_create (por defecto 2000).")
+        parser.add_argument(
+            "--sin-indices",
+            action="store_true",
+            help="No reconstruir FeedEntry ni el índice de búsqueda al terminar.",
+        )
+        for clave in semillas.VOLUMEN_BASE:
+            parser.add_argument(
+                f"--{clave}",
+                type=int,
+                default=None,
+                help=f"Cantidad exacta de {clave} (pisa la escala).",
+            )
+
+    def handle(self, *args, **opts):
+        if opts["escala"] <= 0 or opts["lote"] <= 0:
+            raise CommandError("--escala y --lote tienen que ser positivos.")
+        volumen = semillas.escalar(opts["escala"])
+        for clave in semillas.VOLUMEN_BASE:
+            if opts[clave] is not None:
+                volumen[clave] = opts[clave]
+
+        self.stdout.write(self.style.NOTICE(f"=== SEED (seed={opts['seed']}, escala={opts['escala']}) ==="))
+        inicio = time.perf_counter()
+        hecho = semillas.generar(
+            volumen,
+            seed=opts["seed"],
+            lote=opts["lote"],
+            reportar=self.stdout.write,
+            reconstruir_indices=not opts["sin_indices"],
+        )
+        segundos = time.perf_counter() - inicio
+        total = sum(hecho.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {total} filas en {segundos:.1f}s ({total / segundos if segundos else 0:.0f} filas/s)."
+        ))
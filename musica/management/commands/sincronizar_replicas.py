@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blogmusica import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia la base primaria sobre las réplicas de lectura (DJ_REPLICAS) con la API de backup de SQLite; "
+        "se puede correr mientras el sitio lee de ellas. Con --cada, repite la copia cada N segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cada",
+            type=float,
+            metavar="SEGUNDOS",
+            help="Copiar cada SEGUNDOS segundos hasta que se corte (el atraso máximo de las réplicas).",
+        )
+
+    def _copiar(self, alias):
+        try:
+            segundos = replicas.copiar(alias)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f"{alias}: copiada en {segundos * 1000:.0f} ms")
+
+    def handle(self, *args, **opts):
+        aliases = replicas.replicas()
+        if not aliases:
+            raise CommandError("No hay réplicas configuradas (DJ_REPLICAS).")
+        while True:
+            for alias in aliases:
+                self._copiar(alias)
+            if opts["cada"] is None:
+                break
+            time.sleep(opts["cada"])
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0002_slug_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('nota', 'Nota'), ('concierto', 'Concierto'), ('lanzamiento', 'Lanzamiento'), ('recomendacion', 'Recomendación')], max_length=20)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('titulo', models.CharField(max_length=255)),
+                ('preview', models.CharField(blank=True, max_length=200)),
+                ('image_url', models.CharField(blank=True, max_length=500)),
+                ('url', models.CharField(blank=True, max_length=500)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='feedentry_created_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='feedentry_tipo_objeto_uniq')],
+            },
+        ),
+    ]
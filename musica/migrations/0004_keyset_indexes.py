@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0003_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artista',
+            index=models.Index(fields=['nombre', 'id'], name='artista_nombre_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concierto',
+            index=models.Index(fields=['fecha', 'id'], name='concierto_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lanzamiento',
+            index=models.Index(fields=['fecha_lanzamiento', 'id'], name='lanzamiento_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# SQL copiado acá (y no importado de musica.busqueda): cambiar el módulo no tiene que cambiar
+# lo que hace una migración ya aplicada.
+CREAR = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS musica_busqueda USING fts5("
+        "titulo, cuerpo, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS musica_busqueda ("
+        "tipo varchar(20) NOT NULL, objeto_id bigint NOT NULL, "
+        "titulo text NOT NULL, cuerpo text NOT NULL, "
+        "documento tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('spanish', titulo), 'A') || "
+        "setweight(to_tsvector('spanish', cuerpo), 'B')) STORED, "
+        "PRIMARY KEY (tipo, objeto_id))",
+        "CREATE INDEX IF NOT EXISTS musica_busqueda_documento_idx ON musica_busqueda USING GIN (documento)",
+    ],
+}
+BORRAR = "DROP TABLE IF EXISTS musica_busqueda"
+
+
+def crear_indice(apps, schema_editor):
+    # Otros motores: la tabla la crea el backend de MUSICA_BUSQUEDA_BACKEND.
+    for sql in CREAR.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor in CREAR:
+        schema_editor.execute(BORRAR)
+
+
+class Migration(migrations.Migration):
+    """
+    Tabla del índice de texto completo (FTS5 en SQLite, tsvector en Postgres).
+    No es un modelo: la administra musica.busqueda. Para llenarla con el
+    contenido existente: `manage.py reindex_search`.
+    """
+
+    dependencies = [
+        ('musica', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
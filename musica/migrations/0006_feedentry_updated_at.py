@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0005_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:32
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copiar_created_at(apps, schema_editor):
+    # Las filas existentes toman la fecha de carga (no la de la migración).
+    for nombre in ('Artista', 'Concierto', 'Lanzamiento', 'NotaBlog', 'Recomendacion'):
+        apps.get_model('musica', nombre).objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0006_feedentry_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artista',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='concierto',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='lanzamiento',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='notablog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recomendacion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copiar_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+def completar_slugs(apps, schema_editor):
+    from musica import slugs
+
+    Artista = apps.get_model('musica', 'Artista')
+    artistas = list(Artista.objects.filter(slug__isnull=True).only('id', 'nombre', 'slug'))
+    slugs.asignar(artistas, 'slug', 'nombre', 'artista')
+    Artista.objects.bulk_update(artistas, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    """
+    Slug de Artista (URL canónica /artista/<slug>/). Igual que con NotaBlog en
+    0001/0002: se agrega nullable, se completa y recién entonces pasa a único.
+    """
+
+    dependencies = [
+        ('musica', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artista',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=220, null=True),
+        ),
+        migrations.RunPython(completar_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='artista',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=220, unique=True),
+        ),
+    ]
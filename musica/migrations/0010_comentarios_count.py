@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_comentarios(apps, schema_editor):
+    NotaBlog = apps.get_model('musica', 'NotaBlog')
+    Comentario = apps.get_model('musica', 'Comentario')
+    de_la_nota = Comentario.objects.filter(nota=OuterRef('pk')).order_by()
+    NotaBlog.objects.update(
+        comentarios_count=Coalesce(Subquery(de_la_nota.values('nota').annotate(n=Count('pk')).values('n')[:1]), 0),
+        ultimo_comentario_at=Subquery(de_la_nota.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0009_tarea'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notablog',
+            name='comentarios_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='notablog',
+            name='ultimo_comentario_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['nota', '-created_at', '-id'], name='comentario_nota_idx'),
+        ),
+        migrations.RunPython(contar_comentarios, migrations.RunPython.noop),
+    ]
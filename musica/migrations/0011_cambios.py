@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:58
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copiar_created_at(apps, schema_editor):
+    # Como en 0007: los comentarios existentes toman su fecha de creación.
+    apps.get_model('musica', 'Comentario').objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('musica', '0010_comentarios_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Borrado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=50)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('borrado_en', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['borrado_en', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='comentario',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copiar_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='artista',
+            index=models.Index(fields=['updated_at', 'id'], name='artista_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['updated_at', 'id'], name='comentario_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concierto',
+            index=models.Index(fields=['updated_at', 'id'], name='concierto_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lanzamiento',
+            index=models.Index(fields=['updated_at', 'id'], name='lanzamiento_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notablog',
+            index=models.Index(fields=['updated_at', 'id'], name='notablog_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacion',
+            index=models.Index(fields=['updated_at', 'id'], name='recomendacion_cambios_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrado',
+            index=models.Index(fields=['borrado_en', 'id'], name='borrado_cambios_idx'),
+        ),
+    ]
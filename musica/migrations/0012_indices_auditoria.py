@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Índices que marcó `manage.py auditar_indices`. Los compuestos por artista
+    se crean antes de quitar el índice simple de la FK, que pasan a cubrir.
+    """
+
+    dependencies = [
+        ('musica', '0011_cambios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['updated_at'], name='feedentry_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notablog',
+            index=models.Index(fields=['created_at', 'id'], name='notablog_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lanzamiento',
+            index=models.Index(fields=['artista', 'fecha_lanzamiento'], name='lanzamiento_artista_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacion',
+            index=models.Index(fields=['artista', 'fecha'], name='recomendacion_artista_idx'),
+        ),
+        migrations.AlterField(
+            model_name='lanzamiento',
+            name='artista',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lanzamientos', to='musica.artista'),
+        ),
+        migrations.AlterField(
+            model_name='recomendacion',
+            name='artista',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recomendaciones', to='musica.artista'),
+        ),
+    ]
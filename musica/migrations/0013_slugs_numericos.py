@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# (modelo, texto por defecto del slug): el mismo que usa cada save().
+MODELOS = (('NotaBlog', 'nota'), ('Artista', 'artista'))
+
+
+def corregir(apps, schema_editor):
+    for nombre, default in MODELOS:
+        modelo = apps.get_model('musica', nombre)
+        for obj in modelo.objects.filter(slug__regex=r'^[0-9]+$'):
+            slug = f'{obj.slug}-{default}'
+            if modelo.objects.filter(slug=slug).exists():
+                slug = f'{slug}-{obj.pk}'
+            modelo.objects.filter(pk=obj.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+    """
+    Slugs sólo de dígitos ("2024"): su URL la resolvía la ruta por pk. Pasan a
+    "2024-nota" / "1-artista", como los genera ahora musica.slugs.base_de().
+    """
+
+    dependencies = [
+        ('musica', '0012_indices_auditoria'),
+    ]
+
+    operations = [
+        migrations.RunPython(corregir, migrations.RunPython.noop),
+    ]
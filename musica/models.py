@@ -1,11 +1,14 @@
 from django.db import models
 from django.conf import settings
 from django.urls import reverse
-from django.utils.text import slugify
+from django.utils import timezone
+
+from . import slugs
 
 
 class Artista(models.Model):
     nombre = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=220, unique=True, blank=True)
     pais = models.CharField(max_length=100, blank=True)
     genero_principal = models.CharField(max_length=100, blank=True)
     biografia = models.TextField(blank=True)
@@ -13,9 +16,22 @@ class Artista(models.Model):
     imagen = models.ImageField(upload_to='artistas/', blank=True, null=True)
     video_youtube = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='artista_nombre_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='artista_cambios_idx'),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        if self.slug:
+            return super().save(*args, **kwargs)
+        slugs.guardar(self, 'slug', self.nombre, 'artista', lambda: super(Artista, self).save(*args, **kwargs))
+
+    def get_absolute_url(self) -> str:
+        return reverse('musica:artista_detail', kwargs={'slug': self.slug})
 
     def __str__(self) -> str:
         return self.nombre
@@ -28,20 +44,23 @@ class NotaBlog(models.Model):
     imagen_destacada = models.ImageField(upload_to='notas/', blank=True, null=True)
     tags = models.CharField(max_length=200, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Desnormalizados: los mantienen las señales de Comentario (ver musica/comentarios.py).
+    comentarios_count = models.PositiveIntegerField(default=0, editable=False)
+    ultimo_comentario_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='notablog_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='notablog_cambios_idx'),
+        ]
 
     def save(self, *args, **kwargs) -> None:
-        if not self.slug:
-            base = slugify(self.titulo) or "nota"
-            s = base
-            n = 1
-            while NotaBlog.objects.filter(slug=s).exists():
-                n += 1
-                s = f"{base}-{n}"
-            self.slug = s
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        # Siguiente sufijo libre en una consulta; reintenta si otro proceso lo ganó (ver musica/slugs.py).
+        slugs.guardar(self, 'slug', self.titulo, 'nota', lambda: super(NotaBlog, self).save(*args, **kwargs))
 
     def get_absolute_url(self) -> str:
         return reverse('musica:nota_detail', kwargs={'slug': self.slug})
@@ -57,9 +76,14 @@ class Concierto(models.Model):
     fecha = models.DateTimeField()
     imagen = models.ImageField(upload_to='conciertos/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha', 'id'], name='concierto_fecha_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='concierto_cambios_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.nombre
@@ -68,13 +92,21 @@ class Concierto(models.Model):
 class Lanzamiento(models.Model):
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField(blank=True)
-    artista = models.ForeignKey(Artista, on_delete=models.CASCADE, related_name='lanzamientos')
+    # Sin índice propio: lo cubre lanzamiento_artista_fecha_idx (artista, fecha_lanzamiento).
+    artista = models.ForeignKey(Artista, on_delete=models.CASCADE, related_name='lanzamientos', db_index=False)
     fecha_lanzamiento = models.DateField()
     imagen = models.ImageField(upload_to='lanzamientos/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-fecha_lanzamiento']
+        indexes = [
+            models.Index(fields=['fecha_lanzamiento', 'id'], name='lanzamiento_fecha_id_idx'),
+            # artista.lanzamientos.all() (orden del modelo) al resincronizar un artista.
+            models.Index(fields=['artista', 'fecha_lanzamiento'], name='lanzamiento_artista_fecha_idx'),
+            models.Index(fields=['updated_at', 'id'], name='lanzamiento_cambios_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.titulo} - {self.artista.nombre}"
@@ -83,12 +115,18 @@ class Lanzamiento(models.Model):
 class Recomendacion(models.Model):
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField(blank=True)
-    artista = models.ForeignKey(Artista, on_delete=models.CASCADE, related_name='recomendaciones')
+    # Sin índice propio: lo cubre recomendacion_artista_idx (artista, fecha).
+    artista = models.ForeignKey(Artista, on_delete=models.CASCADE, related_name='recomendaciones', db_index=False)
     fecha = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['artista', 'fecha'], name='recomendacion_artista_idx'),
+            models.Index(fields=['updated_at', 'id'], name='recomendacion_cambios_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.titulo
@@ -99,9 +137,118 @@ class Comentario(models.Model):
     autor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     contenido = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Página de comentarios de una nota (keyset por created_at, id).
+            models.Index(fields=['nota', '-created_at', '-id'], name='comentario_nota_idx'),
+            models.Index(fields=['updated_at', 'id'], name='comentario_cambios_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.autor} - {self.nota.titulo[:20]}"
+
+class FeedEntry(models.Model):
+    """
+    Fila desnormalizada del timeline (portada / ingresos).
+    Se mantiene sincronizada por señales (ver musica/signals.py) y se puede
+    reconstruir con `manage.py backfill_feed`.
+    """
+    TIPOS = [
+        ('nota', 'Nota'),
+        ('concierto', 'Concierto'),
+        ('lanzamiento', 'Lanzamiento'),
+        ('recomendacion', 'Recomendación'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    objeto_id = models.PositiveBigIntegerField()
+    titulo = models.CharField(max_length=255)
+    preview = models.CharField(max_length=200, blank=True)
+    image_url = models.CharField(max_length=500, blank=True)
+    url = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField()
+    # Se renueva en cada sincronización: versiona el fragmento HTML cacheado de la tarjeta.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], name='feedentry_tipo_objeto_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='feedentry_created_idx'),
+            # Sello de portada e ingresos (Max(updated_at), Count): se resuelve recorriendo sólo este índice.
+            models.Index(fields=['updated_at'], name='feedentry_updated_idx'),
+        ]
+
+    @property
+    def orden(self):
+        return self.created_at
+
+    def __str__(self) -> str:
+        return f"{self.tipo}: {self.titulo}"
+
+
+class Tarea(models.Model):
+    """
+    Trabajo diferido (derivados de imágenes, índice de búsqueda, ...) que
+    las señales encolan al guardar. Lo ejecuta `manage.py run_worker`
+    (ver musica/tareas.py).
+    """
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    HECHA = 'hecha'
+    FALLIDA = 'fallida'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (HECHA, 'Hecha'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=list, blank=True)
+    # Dos tareas pendientes con la misma clave hacen lo mismo: se encola una sola.
+    clave = models.CharField(max_length=255, blank=True)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    tomada_por = models.CharField(max_length=100, blank=True)
+    tomada_en = models.DateTimeField(null=True, blank=True)
+    ultimo_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['disponible_en', 'id']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_en', 'id'], name='tarea_cola_idx'),
+            models.Index(fields=['clave', 'estado'], name='tarea_clave_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.nombre}{tuple(self.argumentos)} [{self.estado}]"
+
+
+class Borrado(models.Model):
+    """
+    Lápida de un objeto de contenido borrado: la sincronización incremental
+    (musica/cambios.py) la informa para que el espejo también lo borre. La
+    escriben las señales de post_delete.
+    """
+    modelo = models.CharField(max_length=50)  # 'app_label.modelo'
+    objeto_id = models.PositiveBigIntegerField()
+    borrado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['borrado_en', 'id']
+        indexes = [
+            models.Index(fields=['borrado_en', 'id'], name='borrado_cambios_idx'),
+        ]
 
     def __str__(self) -> str:
-        return f"{self.autor} - {self.nota.titulo[:20]}"
\ No newline at end of file
+        return f"{self.modelo}#{self.objeto_id} ({self.borrado_en:%Y-%m-%d %H:%M})"
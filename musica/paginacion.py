@@ -0,0 +1,129 @@
+"""
+Paginación por cursor (keyset).
+
+En lugar de OFFSET, cada página se pide como "las N filas que vienen después
+de la última que ya mostré", filtrando por los valores de las columnas de
+orden. Con un índice compuesto sobre esas columnas el costo de la página 1 y
+de la página 1000 es el mismo.
+
+El cursor que viaja en la URL es opaco: los valores de orden de la última fila,
+firmados con django.core.signing (no se puede fabricar ni adulterar).
+"""
+import datetime
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+_SALT = 'musica.paginacion'
+
+
+class Pagina:
+    """Resultado de paginar: `items`, y el cursor `siguiente` (None si no hay más)."""
+
+    def __init__(self, items, siguiente=None, cursor=None):
+        self.items = items
+        self.siguiente = siguiente
+        self.cursor = cursor
+
+    @property
+    def es_primera(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _campos(orden):
+    """['-fecha', 'id'] -> [('fecha', True), ('id', False)]  (nombre, descendente)."""
+    return [(o.lstrip('-'), o.startswith('-')) for o in orden]
+
+def _valor(obj, nombre):
+    valor = obj.pk if nombre == 'pk' else getattr(obj, nombre)
+    # Fechas con microsegundos: DjangoJSONEncoder las corta a milisegundos y el cursor saltearía filas.
+    return valor.isoformat() if isinstance(valor, datetime.datetime) else valor
+
+def codificar(obj, orden):
+    """Cursor opaco con los valores de orden de `obj`."""
+    valores = [_valor(obj, nombre) for nombre, _desc in _campos(orden)]
+    return signing.dumps(valores, salt=_SALT, serializer=_Serializer, compress=True)
+
+def decodificar(cursor, modelo, orden):
+    """Valores de orden (ya convertidos al tipo del campo) o None si el cursor no es válido."""
+    if not cursor:
+        return None
+    try:
+        valores = signing.loads(cursor, salt=_SALT, serializer=_Serializer)
+    except signing.BadSignature:
+        return None
+    campos = _campos(orden)
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+    try:
+        return [
+            modelo._meta.pk.to_python(v) if nombre == 'pk' else modelo._meta.get_field(nombre).to_python(v)
+            for (nombre, _desc), v in zip(campos, valores)
+        ]
+    except Exception:
+        return None
+
+def _filtro_despues(orden, valores):
+    """
+    (a, b, c) > (va, vb, vc) expandido como
+    a > va  OR  (a = va AND b > vb)  OR  (a = va AND b = vb AND c > vc)
+    respetando la dirección de cada columna.
+    """
+    campos = _campos(orden)
+    filtro = Q()
+    for i, (nombre, desc) in enumerate(campos):
+        cond = Q(**{f"{nombre}__{'lt' if desc else 'gt'}": valores[i]})
+        for j in range(i):
+            cond &= Q(**{campos[j][0]: valores[j]})
+        filtro |= cond
+    return filtro
+
+def _consulta(qs, orden, cursor):
+    """(queryset de la página, cursor válido o None)."""
+    valores = decodificar(cursor, qs.model, orden)
+    qs = qs.order_by(*orden)
+    if valores is None:
+        return qs, None
+    return qs.filter(_filtro_despues(orden, valores)), cursor
+
+def _cortar(filas, orden, limite, cursor):
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar(filas[-1], orden)
+    return Pagina(filas, siguiente=siguiente, cursor=cursor)
+
+def paginar(qs, orden, cursor=None, limite=30):
+    """
+    Devuelve una Pagina de `qs` ordenado por `orden` (la última columna debe
+    ser única, normalmente 'id', para desempatar).
+    Un cursor inválido o adulterado simplemente vuelve a la primera página.
+    """
+    qs, cursor = _consulta(qs, orden, cursor)
+    return _cortar(list(qs[:limite + 1]), orden, limite, cursor)
+
+async def apaginar(qs, orden, cursor=None, limite=30):
+    """paginar() con el ORM asíncrono (vistas async)."""
+    qs, cursor = _consulta(qs, orden, cursor)
+    return _cortar([obj async for obj in qs[:limite + 1]], orden, limite, cursor)
+
+
+class _Serializer:
+    """JSON con soporte de fechas/decimales para los valores del cursor."""
+
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
@@ -0,0 +1,212 @@
+"""
+Generador de datos sintéticos para pruebas de carga (ver `manage.py seed_musica`).
+
+- Determinístico: mismo `seed` y mismo volumen producen los mismos datos
+  (fechas incluidas, calculadas desde una fecha base fija).
+- Rápido: bulk_create por lotes dentro de transacciones, sin señales; los
+  textos se arman a partir de un pool de párrafos pre-generados y las
+  contraseñas de los usuarios comparten un único hash.
+- FeedEntry y el índice de búsqueda se reconstruyen una sola vez al final.
+"""
+import datetime
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from . import comentarios, slugs
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion, Comentario
+
+# Volumen con escala 1; `escalar()` lo multiplica.
+VOLUMEN_BASE = {
+    'usuarios': 500,
+    'artistas': 2000,
+    'notas': 10000,
+    'conciertos': 2000,
+    'lanzamientos': 5000,
+    'recomendaciones': 5000,
+    'comentarios': 50000,
+}
+
+FECHA_BASE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+_PALABRAS = (
+    "música canción disco álbum banda guitarra batería bajo voz escenario público gira "
+    "festival concierto entradas estreno sencillo videoclip productor estudio grabación "
+    "letra melodía ritmo cumbia rock tango folklore trap cuarteto pop jazz reggaetón "
+    "argentina buenos aires córdoba rosario mendoza noche ciudad barrio historia "
+    "artista cantante compositor carrera éxito nuevo primer último año semana "
+    "presentó anunció lanzó grabó tocó celebró recorrió sorprendió emocionó volvió "
+    "con de en por para sobre entre desde hasta durante junto también además "
+    "el la los las un una su sus este esta ese esa muy más gran mejor"
+).split()
+_GENEROS = ['Rock', 'Pop', 'Cumbia', 'Tango', 'Folklore', 'Trap', 'Cuarteto', 'Jazz', 'Reggaetón', 'Electrónica']
+_PAISES = ['Argentina', 'Uruguay', 'Chile', 'México', 'España', 'Colombia', 'Perú', 'Estados Unidos']
+_CIUDADES = ['Buenos Aires', 'Córdoba', 'Rosario', 'Mendoza', 'La Plata', 'Montevideo', 'Santiago', 'Tucumán']
+_TITULOS_NOTA = [
+    'Novedades de la semana', 'Entrevista exclusiva', 'Lo mejor del mes', 'Crónica de un show',
+    'Discos para escuchar', 'Detrás de escena', 'Agenda de conciertos',
+]
+
+
+def escalar(factor):
+    """Volumen base multiplicado por `factor` (acepta fracciones)."""
+    return {k: max(1, int(v * factor)) for k, v in VOLUMEN_BASE.items()}
+
+
+@contextmanager
+def sin_auto_now(*modelos):
+    """
+    Desactiva auto_now_add (created_at) y auto_now (updated_at) para poder fijar
+    las fechas a mano (bulk_create los aplicaría igual); _insertar copia
+    created_at en updated_at. También lo usa la importación (musica/catalogo.py).
+    """
+    campos = [
+        (f, attr)
+        for m in modelos for f in m._meta.concrete_fields
+        for attr in ('auto_now', 'auto_now_add') if getattr(f, attr, False)
+    ]
+    for f, attr in campos:
+        setattr(f, attr, False)
+    try:
+        yield
+    finally:
+        for f, attr in campos:
+            setattr(f, attr, True)
+
+
+class Generador:
+
+    def __init__(self, seed=0, lote=2000, reportar=None):
+        self.rng = random.Random(seed)
+        self.lote = lote
+        self.reportar = reportar or (lambda mensaje: None)
+        # Pool de oraciones/párrafos: cada texto es una combinación, no se genera palabra por palabra.
+        self._oraciones = [self._oracion() for _ in range(400)]
+        self._parrafos = [' '.join(self.rng.choices(self._oraciones, k=self.rng.randint(3, 7))) for _ in range(200)]
+
+    # --- textos ---
+
+    def _oracion(self):
+        palabras = self.rng.choices(_PALABRAS, k=self.rng.randint(8, 22))
+        return ' '.join(palabras).capitalize() + '.'
+
+    def parrafos(self, minimo, maximo):
+        return '\n\n'.join(self.rng.choices(self._parrafos, k=self.rng.randint(minimo, maximo)))
+
+    def frase(self, minimo=2, maximo=6):
+        return ' '.join(self.rng.choices(_PALABRAS, k=self.rng.randint(minimo, maximo))).capitalize()
+
+    def fecha(self, dias=5 * 365):
+        return FECHA_BASE + datetime.timedelta(seconds=self.rng.randint(0, dias * 86400))
+
+    # --- carga por lotes ---
+
+    def _insertar(self, modelo, cantidad, fabrica, preparar=None):
+        """Crea `cantidad` filas con fabrica(i) en lotes (preparar(lote) antes de cada insert); devuelve los pks."""
+        pks = []
+        inicio = time.perf_counter()
+        for desde in range(0, cantidad, self.lote):
+            objs = [fabrica(i) for i in range(desde, min(desde + self.lote, cantidad))]
+            for obj in objs:
+                if getattr(obj, 'updated_at', False) is None:
+                    obj.updated_at = obj.created_at
+            if preparar:
+                preparar(objs)
+            with transaction.atomic():
+                creados = modelo.objects.bulk_create(objs)
+            pks.extend(o.pk for o in creados)
+        segundos = time.perf_counter() - inicio
+        self.reportar(f"{modelo._meta.verbose_name_plural}: {cantidad} filas en {segundos:.1f}s "
+                      f"({cantidad / segundos if segundos else 0:.0f} filas/s)")
+        return pks
+
+    @staticmethod
+    def _siguiente_id(modelo):
+        return (modelo.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+
+    def generar(self, volumen):
+        """Carga `volumen` ({'notas': n, ...}; claves faltantes = 0). Devuelve {clave: filas}."""
+        rng = self.rng
+        v = {k: volumen.get(k, 0) for k in VOLUMEN_BASE}
+
+        base_usuario = self._siguiente_id(User)
+        password = make_password('musica')  # un solo hash para todos
+        usuarios = self._insertar(User, v['usuarios'], lambda i: User(
+            username=f'usuario{base_usuario + i}', password=password, date_joined=FECHA_BASE,
+        ))
+        usuarios = usuarios or list(User.objects.values_list('pk', flat=True)[:1000])
+
+        with sin_auto_now(Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion, Comentario):
+            base = self._siguiente_id(Artista)
+            artistas = self._insertar(Artista, v['artistas'], lambda i: Artista(
+                nombre=f'{self.frase(1, 3)} {base + i}',
+                pais=rng.choice(_PAISES),
+                genero_principal=rng.choice(_GENEROS),
+                biografia=self.parrafos(2, 5),
+                created_at=self.fecha(),
+            ), preparar=lambda objs: slugs.asignar(objs, 'slug', 'nombre', 'artista'))
+            artistas = artistas or list(Artista.objects.values_list('pk', flat=True)[:1000])
+
+            def _nota(i):
+                # Un tercio son columnas periódicas con el mismo título (slugs con sufijo -2, -3, ...).
+                titulo = rng.choice(_TITULOS_NOTA)
+                if rng.random() > 1 / 3:
+                    titulo = f'{titulo}: {self.frase()}'
+                return NotaBlog(
+                    titulo=titulo,
+                    contenido=''.join(f'<p>{p}</p>' for p in self.parrafos(3, 12).split('\n\n')),
+                    tags=', '.join(rng.sample(_GENEROS, 3)).lower(),
+                    created_at=self.fecha(),
+                )
+            notas = self._insertar(NotaBlog, v['notas'], _nota,
+                                   preparar=lambda objs: slugs.asignar(objs, 'slug', 'titulo', 'nota'))
+
+            self._insertar(Concierto, v['conciertos'], lambda i: Concierto(
+                nombre=f'{self.frase(2, 4)} en vivo',
+                detalle=self.parrafos(1, 3),
+                ubicacion=rng.choice(_CIUDADES),
+                fecha=self.fecha(6 * 365),
+                created_at=self.fecha(),
+            ))
+            self._insertar(Lanzamiento, v['lanzamientos'], lambda i: Lanzamiento(
+                titulo=self.frase(1, 4),
+                descripcion=self.parrafos(1, 3),
+                artista_id=rng.choice(artistas),
+                fecha_lanzamiento=self.fecha().date(),
+                created_at=self.fecha(),
+            ))
+            self._insertar(Recomendacion, v['recomendaciones'], lambda i: Recomendacion(
+                titulo=self.frase(2, 5),
+                descripcion=self.parrafos(1, 2),
+                artista_id=rng.choice(artistas),
+                fecha=self.fecha().date(),
+                created_at=self.fecha(),
+            ))
+            if notas and v['comentarios']:
+                # Distribución sesgada: las primeras notas concentran muchos comentarios
+                # (P(índice < k) = (k/n)^(1/3): el 0,1% de las notas recibe el 10%).
+                self._insertar(Comentario, v['comentarios'], lambda i: Comentario(
+                    nota_id=notas[int(len(notas) * rng.random() ** 3)],
+                    autor_id=rng.choice(usuarios),
+                    contenido=self._oraciones[rng.randrange(len(self._oraciones))],
+                    created_at=self.fecha(),
+                ))
+                # bulk_create no dispara señales: contadores desnormalizados de las notas.
+                comentarios.recalcular()
+        return v
+
+
+def generar(volumen, seed=0, lote=2000, reportar=None, reconstruir_indices=True):
+    """Atajo: genera `volumen` y (por defecto) reconstruye FeedEntry y el índice de búsqueda."""
+    from . import busqueda, feed
+
+    hecho = Generador(seed=seed, lote=lote, reportar=reportar).generar(volumen)
+    if reconstruir_indices:
+        feed.reconstruir(lote=lote)
+        busqueda.reconstruir(lote=lote)
+    return hecho
@@ -0,0 +1,132 @@
+"""
+Señales del app: mantienen FeedEntry, el índice de búsqueda, el cache de
+páginas, los contadores de comentarios, los derivados de imágenes y las
+lápidas de la sincronización incremental al día con los modelos de
+contenido (las tarjetas cacheadas se versionan solas, ver
+musica/tarjetas.py). Lo caro (índice, derivados, resincronizar un artista)
+se encola en musica/tareas.py. Se registran en MusicaConfig.ready().
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import busqueda, cache_paginas, comentarios, feed, imagenes, slugs, tareas, tarjetas
+from .models import Artista, Comentario, NotaBlog
+
+
+def _completar_fixture(sender, instance, raw=False, **kwargs):
+    # Los backups (backup_musica.json) son anteriores a updated_at y al slug de
+    # Artista (y tienen notas sin slug); en loaddata ni auto_now ni save() corren.
+    if not raw:
+        return
+    if instance.updated_at is None:
+        instance.updated_at = instance.created_at
+    if sender in (Artista, NotaBlog) and not instance.slug:
+        texto = instance.nombre if sender is Artista else instance.titulo
+        instance.slug = slugs.siguiente(sender, 'slug', texto, sender._meta.model_name)
+
+for _modelo in (*tarjetas.MODELOS.values(), Comentario):
+    pre_save.connect(_completar_fixture, sender=_modelo, dispatch_uid=f'fixture_{_modelo.__name__}')
+
+
+def _slug_cambiado(sender, instance, **kwargs):
+    slugs.olvidar(sender, instance.pk)
+
+for _modelo in (Artista, NotaBlog):
+    post_save.connect(_slug_cambiado, sender=_modelo, dispatch_uid=f'slug_guardado_{_modelo.__name__}')
+    post_delete.connect(_slug_cambiado, sender=_modelo, dispatch_uid=f'slug_borrado_{_modelo.__name__}')
+
+
+def _feed_guardado(sender, instance, raw=False, **kwargs):
+    # En loaddata (raw) las relaciones pueden no existir todavía: usar backfill_feed.
+    if raw:
+        return
+    feed.sincronizar(instance)
+
+def _feed_borrado(sender, instance, **kwargs):
+    feed.quitar(instance)
+
+for _modelo in feed.FUENTES.values():
+    post_save.connect(_feed_guardado, sender=_modelo, dispatch_uid=f'feed_guardado_{_modelo.__name__}')
+    post_delete.connect(_feed_borrado, sender=_modelo, dispatch_uid=f'feed_borrado_{_modelo.__name__}')
+
+
+def _busqueda_guardado(sender, instance, raw=False, **kwargs):
+    # Igual que el feed: después de loaddata, `manage.py reindex_search`.
+    if raw:
+        return
+    busqueda.programar(instance)
+
+def _busqueda_borrado(sender, instance, **kwargs):
+    busqueda.quitar_objeto(instance)
+
+for _modelo in busqueda.INDEXADOS.values():
+    post_save.connect(_busqueda_guardado, sender=_modelo, dispatch_uid=f'busqueda_guardado_{_modelo.__name__}')
+    post_delete.connect(_busqueda_borrado, sender=_modelo, dispatch_uid=f'busqueda_borrado_{_modelo.__name__}')
+
+
+@receiver(post_save, sender=Comentario, dispatch_uid='comentario_guardado')
+def _comentario_guardado(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        # loaddata: el backup puede traer (o no) los contadores; se recalculan desde la tabla.
+        comentarios.recalcular([instance.nota_id])
+    elif created:
+        comentarios.sumar(instance)
+
+@receiver(post_delete, sender=Comentario, dispatch_uid='comentario_borrado')
+def _comentario_borrado(sender, instance, **kwargs):
+    comentarios.restar(instance)
+
+
+# Los modelos de contenido: los que muestran las páginas y los que exporta la sincronización
+# incremental (cambios.MODELOS, sin los usuarios).
+CONTENIDO = (Artista, *feed.FUENTES.values(), Comentario)
+
+
+def _paginas_invalidadas(sender, **kwargs):
+    cache_paginas.invalidar()
+
+for _modelo in CONTENIDO:
+    post_save.connect(_paginas_invalidadas, sender=_modelo, dispatch_uid=f'paginas_guardado_{_modelo.__name__}')
+    post_delete.connect(_paginas_invalidadas, sender=_modelo, dispatch_uid=f'paginas_borrado_{_modelo.__name__}')
+
+
+def _lapida(sender, instance, **kwargs):
+    # Importado acá: cambios trae catalogo y semillas, que un worker web no necesita al arrancar.
+    from . import cambios
+    cambios.registrar_borrado(instance)
+
+for _modelo in CONTENIDO:
+    post_delete.connect(_lapida, sender=_modelo, dispatch_uid=f'lapida_{_modelo._meta.label_lower}')
+
+
+def _imagen_guardada(sender, instance, raw=False, **kwargs):
+    # Después de loaddata: `manage.py generar_derivados`.
+    if raw:
+        return
+    imagenes.programar(instance)
+
+for _label in imagenes.CAMPOS:
+    post_save.connect(_imagen_guardada, sender=_label, dispatch_uid=f'imagenes_{_label}')
+
+
+@receiver(post_save, sender=Artista, dispatch_uid='feed_artista_guardado')
+def _feed_artista_guardado(sender, instance, raw=False, **kwargs):
+    """
+    Lanzamientos y recomendaciones usan la imagen del artista como fallback
+    en el feed, y su nombre como texto buscable.
+    """
+    if raw:
+        return
+    tareas.encolar('artista.resincronizar', instance.pk, clave=f'artista:{instance.pk}')
+
+@tareas.registrar('artista.resincronizar')
+def resincronizar_artista(pk):
+    artista = Artista.objects.filter(pk=pk).first()
+    if artista is None:
+        return
+    for obj in (*artista.lanzamientos.all(), *artista.recomendaciones.all()):
+        feed.sincronizar(obj)
+        busqueda.indexar_objeto(obj)
+    # El guardado del artista ya pasó de generación, pero un request de la portada pudo
+    # volver a cachearla con las tarjetas viejas antes de que corriera esta tarea.
+    cache_paginas.invalidar()
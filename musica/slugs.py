@@ -0,0 +1,172 @@
+"""
+Slugs únicos con sufijo numérico: "novedades-de-la-semana", "...-2", "...-3".
+
+Antes NotaBlog.save probaba `filter(slug=s).exists()` con -2, -3, ... hasta
+encontrar uno libre: la N-ésima nota con el mismo título costaba N consultas.
+
+- siguiente(): una sola consulta por rango sobre el índice único del slug
+  (prefijo "base-"), que devuelve sólo la base y el slug con el sufijo más alto.
+- guardar(): si otro proceso tomó el mismo slug entre la consulta y el
+  INSERT, el índice único lo rechaza; se reintenta dentro de un savepoint.
+- asignar(): slugs para una lista de objetos nuevos (bulk_create), con una
+  consulta por lote de bases en lugar de una por objeto.
+- objeto(): resuelve una URL por slug con un cache LRU en proceso slug -> pk
+  (la búsqueda por pk es la más barata); las señales lo invalidan al guardar.
+"""
+import threading
+from collections import OrderedDict
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Q, When
+from django.db.models.functions import Length
+from django.utils.text import slugify
+
+INTENTOS = 5
+# Lugar reservado para el sufijo ("-" + dígitos) dentro del max_length del campo.
+_RESERVA_SUFIJO = 10
+# Bases por consulta en asignar() (límite de parámetros/profundidad de SQLite).
+_BASES_POR_CONSULTA = 200
+
+
+def base_de(texto, max_length, default):
+    base = slugify(texto)[:max_length - _RESERVA_SUFIJO].strip('-') or default
+    # Sólo dígitos: la URL la tomaría la ruta por pk (<int:pk>), que va antes que la de slug.
+    if base.isdigit():
+        base = f"{base[:max_length - _RESERVA_SUFIJO - len(default) - 1]}-{default}"
+    return base
+
+def _sufijo(slug, base):
+    """1 para la base sola, n para "base-n", None si no es de la serie."""
+    if slug == base:
+        return 1
+    resto = slug[len(base) + 1:]
+    return int(resto) if slug.startswith(base + '-') and resto.isdigit() else None
+
+def _serie(campo, base):
+    """Q de la base y todos los "base-...". Rango (no LIKE) en SQLite para que use el índice."""
+    if connection.vendor == 'sqlite':
+        prefijo = Q(**{f'{campo}__gte': base + '-', f'{campo}__lt': base + '.'})  # '.' sigue a '-' en ASCII
+    else:
+        prefijo = Q(**{f'{campo}__startswith': base + '-'})  # varchar_pattern_ops en Postgres
+    return Q(**{campo: base}) | prefijo
+
+
+def siguiente(modelo, campo, texto, default):
+    """
+    Primer slug libre para `texto`, en una consulta: trae a lo sumo dos filas,
+    la base (si existe) y el "base-n" con el n más alto.
+    """
+    base = base_de(texto, modelo._meta.get_field(campo).max_length, default)
+    filas = list(
+        modelo._default_manager
+        .filter(_serie(campo, base), **{f'{campo}__regex': rf'^{base}(-[0-9]+)?$'})
+        .order_by(Case(When(**{campo: base}, then=0), default=1), Length(campo).desc(), f'-{campo}')
+        .values_list(campo, flat=True)[:2]
+    )
+    if not filas or filas[0] != base:
+        return base
+    return f'{base}-{_sufijo(filas[-1], base) + 1}'
+
+
+def guardar(obj, campo, texto, default, guardar_fila):
+    """
+    Asigna a `obj` el siguiente slug libre y llama a guardar_fila() (el save del
+    modelo). Si el INSERT choca con el índice único por ese slug, calcula otro.
+    """
+    for intento in range(INTENTOS):
+        setattr(obj, campo, siguiente(type(obj), campo, texto, default))
+        try:
+            with transaction.atomic():
+                return guardar_fila()
+        except IntegrityError:
+            ocupado = type(obj)._default_manager.filter(**{campo: getattr(obj, campo)}).exists()
+            if not ocupado or intento == INTENTOS - 1:
+                raise
+
+
+def asignar(objs, campo, fuente, default):
+    """
+    Completa el slug de los objetos que no lo tienen (antes de un bulk_create),
+    sin repetir entre ellos ni con los existentes. Devuelve `objs`.
+    """
+    max_length = objs[0]._meta.get_field(campo).max_length if objs else 0
+    pendientes = [(obj, base_de(getattr(obj, fuente), max_length, default)) for obj in objs if not getattr(obj, campo)]
+    bases = sorted({base for _obj, base in pendientes})
+    tomados = {getattr(obj, campo) for obj in objs if getattr(obj, campo)}
+
+    ultimo = dict.fromkeys(bases, 0)
+    for i in range(0, len(bases), _BASES_POR_CONSULTA):
+        tanda = bases[i:i + _BASES_POR_CONSULTA]
+        filtro = Q()
+        for base in tanda:
+            filtro |= _serie(campo, base)
+        existentes = objs[0]._meta.model._default_manager.filter(filtro).values_list(campo, flat=True)
+        tomados.update(existentes)
+    for slug in tomados:
+        # Un slug puede ser de varias series ("a-2" es "a" con sufijo 2 y también la base "a-2").
+        for base in (slug, slug.rsplit('-', 1)[0]):
+            n = _sufijo(slug, base) if base in ultimo else None
+            if n:
+                ultimo[base] = max(ultimo[base], n)
+
+    for obj, base in pendientes:
+        if base in tomados:
+            n = max(ultimo[base], 1) + 1
+            slug = f'{base}-{n}'
+            while slug in tomados:  # p.ej. "a-2" ya asignado en este lote como base de otro título
+                n += 1
+                slug = f'{base}-{n}'
+            ultimo[base] = n
+        else:
+            slug = base
+        tomados.add(slug)
+        setattr(obj, campo, slug)
+    return objs
+
+
+# ----------------------------
+# slug -> pk (LRU en proceso)
+# ----------------------------
+
+TAMANO_LRU = 2048
+
+_pks = OrderedDict()  # (app_label.modelo, slug) -> pk
+_lock = threading.Lock()
+
+
+def _clave(modelo, slug):
+    return (modelo._meta.label_lower, slug)
+
+def recordar(modelo, slug, pk):
+    with _lock:
+        _pks[_clave(modelo, slug)] = pk
+        _pks.move_to_end(_clave(modelo, slug))
+        while len(_pks) > TAMANO_LRU:
+            _pks.popitem(last=False)
+
+def olvidar(modelo, pk):
+    """Descarta los slugs cacheados de `pk` (su slug pudo cambiar o el objeto ya no existe)."""
+    label = modelo._meta.label_lower
+    with _lock:
+        for clave in [c for c, valor in _pks.items() if c[0] == label and valor == pk]:
+            del _pks[clave]
+
+def objeto(qs, slug):
+    """
+    Objeto de `qs` con ese slug, en una consulta: por pk si el slug está en el
+    LRU, por slug si no. None si no existe.
+    """
+    modelo = qs.model
+    with _lock:
+        pk = _pks.get(_clave(modelo, slug))
+    if pk is not None:
+        obj = qs.filter(pk=pk).first()
+        # Otro proceso pudo cambiar el slug (o borrarlo y dárselo a otro objeto).
+        if obj is not None and obj.slug == slug:
+            recordar(modelo, slug, pk)
+            return obj
+        olvidar(modelo, pk)
+    obj = qs.filter(slug=slug).first()
+    if obj is not None:
+        recordar(modelo, slug, obj.pk)
+    return obj
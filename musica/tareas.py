@@ -0,0 +1,163 @@
+"""
+Cola de tareas en la base (sin Redis ni Celery): los efectos caros de
+guardar contenido (derivados de imágenes, índice de búsqueda, resincronizar
+lo que depende de un artista) se encolan y los ejecuta `manage.py run_worker`.
+
+    @tareas.registrar('busqueda.indexar')
+    def indexar(label, pk): ...
+
+    tareas.encolar('busqueda.indexar', 'musica.nota', 7, clave='busqueda:musica.nota:7')
+
+- La fila se crea en el momento, con la conexión del guardado (las señales
+  no abren una transacción): si el guardado está dentro de un atomic() que
+  se revierte, la tarea tampoco queda; fuera de un atomic, cada uno se
+  confirma por su lado. Con tareas inmediatas (ver abajo) no hay fila.
+- `clave` evita encolar dos veces el mismo trabajo mientras sigue pendiente.
+- Un worker toma tareas con un UPDATE condicionado al estado (funciona igual
+  con varios workers sobre SQLite). Una tarea que falla se reintenta con
+  espera exponencial (REINTENTO_BASE * 2**intentos, con jitter) hasta
+  max_intentos; después queda como fallida con el último error.
+- Si un worker muere a mitad de una tarea, vuelve a la cola al pasar VENCIMIENTO.
+
+settings.MUSICA_TAREAS_INMEDIATAS (por defecto igual a DEBUG): no encola,
+ejecuta la tarea en el momento, dentro del guardado que la pidió (como antes
+de la cola).
+"""
+import datetime
+import logging
+import os
+import random
+import socket
+import traceback
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+REINTENTO_BASE = 5           # segundos
+REINTENTO_MAXIMO = 60 * 60   # tope de la espera entre intentos
+VENCIMIENTO = 10 * 60        # una tarea "en curso" hace más que esto se da por abandonada
+
+_REGISTRO = {}
+
+
+def registrar(nombre):
+    """Decorador: registra la función como tarea `nombre` (sus argumentos tienen que ser JSON)."""
+    def decorador(funcion):
+        _REGISTRO[nombre] = funcion
+        return funcion
+    return decorador
+
+def inmediatas():
+    return getattr(settings, 'MUSICA_TAREAS_INMEDIATAS', settings.DEBUG)
+
+
+# ----------------------------
+# Encolar
+# ----------------------------
+
+def encolar(nombre, *argumentos, clave='', demora=0):
+    """
+    Encola la tarea `nombre` (o la ejecuta ya, si son inmediatas). Devuelve
+    la Tarea, o None si no se encoló (inmediata o ya pendiente con esa clave).
+    """
+    if nombre not in _REGISTRO:
+        raise KeyError(f"Tarea no registrada: {nombre}")
+    argumentos = list(argumentos)
+    if inmediatas():
+        _REGISTRO[nombre](*argumentos)
+        return None
+    if clave and Tarea.objects.filter(clave=clave, estado=Tarea.PENDIENTE).exists():
+        return None
+    return Tarea.objects.create(
+        nombre=nombre,
+        argumentos=argumentos,
+        clave=clave,
+        disponible_en=timezone.now() + datetime.timedelta(seconds=demora),
+    )
+
+
+# ----------------------------
+# Worker
+# ----------------------------
+
+def identificador():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+def recuperar_vencidas():
+    """Devuelve a la cola las tareas tomadas por un worker que no terminó (se cayó o lo mataron)."""
+    limite = timezone.now() - datetime.timedelta(seconds=VENCIMIENTO)
+    return Tarea.objects.filter(estado=Tarea.EN_CURSO, tomada_en__lt=limite).update(
+        estado=Tarea.PENDIENTE, tomada_por='', tomada_en=None, updated_at=timezone.now(),
+    )
+
+def tomar(worker, cantidad):
+    """
+    Reserva hasta `cantidad` tareas disponibles para `worker` y devuelve sus ids.
+    Cada una se toma con un UPDATE ... WHERE estado='pendiente': si otro
+    worker la tomó primero, no actualiza ninguna fila y se saltea.
+    """
+    ahora = timezone.now()
+    candidatas = list(
+        Tarea.objects.filter(estado=Tarea.PENDIENTE, disponible_en__lte=ahora)
+        .order_by('disponible_en', 'id').values_list('pk', flat=True)[:cantidad]
+    )
+    tomadas = []
+    for pk in candidatas:
+        if Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_CURSO, tomada_por=worker, tomada_en=ahora, updated_at=ahora,
+        ):
+            tomadas.append(pk)
+    return tomadas
+
+def _espera(intentos):
+    segundos = min(REINTENTO_MAXIMO, REINTENTO_BASE * 2 ** (intentos - 1))
+    return datetime.timedelta(seconds=segundos * random.uniform(0.8, 1.2))
+
+def ejecutar(pk):
+    """Ejecuta una tarea ya tomada y registra el resultado. Devuelve el estado final."""
+    tarea = Tarea.objects.get(pk=pk)
+    try:
+        funcion = _REGISTRO[tarea.nombre]
+        funcion(*tarea.argumentos)
+    except Exception:
+        tarea.intentos += 1
+        tarea.ultimo_error = traceback.format_exc()
+        if tarea.intentos >= tarea.max_intentos:
+            tarea.estado = Tarea.FALLIDA
+            logger.error("La tarea %s falló %s veces; no se reintenta.", tarea, tarea.intentos)
+        else:
+            tarea.estado = Tarea.PENDIENTE
+            tarea.disponible_en = timezone.now() + _espera(tarea.intentos)
+            logger.warning("La tarea %s falló (intento %s); se reintenta.", tarea, tarea.intentos)
+    else:
+        tarea.estado = Tarea.HECHA
+    tarea.tomada_por = ''
+    tarea.tomada_en = None
+    tarea.save(update_fields=['estado', 'intentos', 'ultimo_error', 'disponible_en', 'tomada_por', 'tomada_en', 'updated_at'])
+    return tarea.estado
+
+def ejecutar_en_pool(pk):
+    """ejecutar() para un thread o proceso del pool: cierra sus conexiones al terminar."""
+    try:
+        return ejecutar(pk)
+    finally:
+        connections.close_all()
+
+def inicializar_proceso():
+    """
+    initializer del ProcessPoolExecutor (fork): el hijo hereda las conexiones
+    abiertas del padre. No se cierran (cerraría la del padre): se olvidan y
+    el hijo abre las suyas.
+    """
+    for conexion in connections.all(initialized_only=True):
+        conexion.connection = None
+
+def purgar(dias):
+    """Borra las tareas hechas hace más de `dias` días. Devuelve cuántas."""
+    limite = timezone.now() - datetime.timedelta(days=dias)
+    return Tarea.objects.filter(estado=Tarea.HECHA, updated_at__lt=limite).delete()[0]
@@ -0,0 +1,238 @@
+"""
+Tarjetas (cards) de portada, ingresos y resultados de búsqueda.
+
+Antes cada tarjeta se armaba por reflexión: probar ocho nombres de campo de
+imagen, recorrer _meta.get_fields(), caer en la imagen del artista, y truncar
+el cuerpo completo con Truncator, en cada fila y en cada request.
+
+Ahora:
+- CardSpec resuelve UNA vez por modelo (en MusicaConfig.ready) qué campos
+  dan la imagen, el texto de preview, el título y la URL de detalle.
+- La tarjeta ya calculada de cada objeto (titulo, preview, image_url, url)
+  queda en el cache con una clave versionada por su updated_at y, si cae en
+  la imagen del artista, el del artista (`tarjeta:<tipo>:<pk>:<versión>`).
+  Un cambio hecho en otro proceso (otro worker web, run_worker) cambia la
+  clave, sin depender de borrar nada en caches que no se comparten; las
+  versiones viejas vencen solas (TIMEOUT). Los objetos con artista tienen
+  que llegar con él cargado (select_related). Armar una tarjeta es, en el
+  caso normal, un cache.get.
+- El HTML de cada tarjeta (_tarjeta.html) también se cachea, con una clave
+  que incluye la versión de sus datos: al cambiar el objeto la clave cambia
+  y el fragmento viejo simplemente deja de usarse.
+"""
+from django.core.cache import cache
+from django.db import models
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion
+
+TIMEOUT = 60 * 60 * 24
+
+MODELOS = {
+    'nota': NotaBlog,
+    'concierto': Concierto,
+    'lanzamiento': Lanzamiento,
+    'recomendacion': Recomendacion,
+    'artista': Artista,
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, modelo in MODELOS.items()}
+
+# Nombres "conocidos" de imagen, en orden de preferencia (luego cualquier otro Image/FileField).
+_NOMBRES_IMAGEN = ('imagen', 'image', 'portada', 'cover', 'foto', 'thumb', 'imagen_principal', 'imagen_nota')
+
+# Campos de texto candidatos para el preview, por tipo.
+_NOMBRES_PREVIEW = {
+    'nota': ('contenido', 'descripcion', 'texto', 'resumen'),
+    'concierto': ('descripcion', 'detalle', 'texto'),
+    'lanzamiento': ('descripcion', 'detalle', 'texto'),
+    'recomendacion': ('descripcion', 'detalle', 'texto', 'resumen'),
+    'artista': ('biografia',),
+}
+_TITULO_DEFAULT = {
+    'nota': 'Nota',
+    'concierto': 'Concierto',
+    'lanzamiento': 'Lanzamiento',
+    'recomendacion': 'Recomendación',
+    'artista': 'Artista',
+}
+_URL_NAMES = {
+    'nota': 'musica:nota_detalle',
+    'concierto': 'musica:concierto_detalle',
+    'lanzamiento': 'musica:lanzamiento_detalle',
+    'recomendacion': 'musica:recomendacion_detalle',
+    'artista': 'musica:artista_detalle',
+}
+
+
+def _campos_archivo(modelo):
+    return [f.name for f in modelo._meta.get_fields() if isinstance(f, (models.ImageField, models.FileField))]
+
+def _existentes(modelo, nombres):
+    concretos = {f.name for f in modelo._meta.get_fields() if getattr(f, 'concrete', False)}
+    return tuple(n for n in nombres if n in concretos)
+
+def _url_de(fileobj):
+    if fileobj:
+        try:
+            return fileobj.url or None
+        except ValueError:
+            return None
+    return None
+
+
+class CardSpec:
+    """Cómo arma su tarjeta un modelo, resuelto una sola vez a partir de _meta."""
+
+    def __init__(self, tipo, modelo):
+        self.tipo = tipo
+        self.modelo = modelo
+        archivos = _campos_archivo(modelo)
+        conocidos = [n for n in _NOMBRES_IMAGEN if n in archivos]
+        self.campos_imagen = tuple(conocidos + [n for n in archivos if n not in conocidos])
+        self.usa_artista = 'artista' in {f.name for f in modelo._meta.get_fields() if f.is_relation}
+        self.campos_imagen_artista = tuple(_campos_archivo(Artista))
+        self.campos_preview = _existentes(modelo, _NOMBRES_PREVIEW.get(tipo, ()))
+        self.campo_titulo = _existentes(modelo, ('nombre', 'titulo') if tipo in ('concierto', 'artista') else ('titulo',))
+        self.usa_get_absolute_url = hasattr(modelo, 'get_absolute_url')
+        self.url_name = _URL_NAMES.get(tipo)
+
+    def titulo(self, obj):
+        for nombre in self.campo_titulo:
+            valor = getattr(obj, nombre)
+            if valor:
+                return str(valor)
+        return _TITULO_DEFAULT.get(self.tipo, '')
+
+    def image_url(self, obj):
+        for nombre in self.campos_imagen:
+            url = _url_de(getattr(obj, nombre))
+            if url:
+                return url
+        if self.usa_artista:
+            artista = obj.artista
+            if artista:
+                for nombre in self.campos_imagen_artista:
+                    url = _url_de(getattr(artista, nombre))
+                    if url:
+                        return url
+        return None
+
+    def preview(self, obj):
+        texto = ''
+        for nombre in self.campos_preview:
+            valor = getattr(obj, nombre)
+            if valor:
+                texto = str(valor)
+                break
+        if not texto and self.tipo == 'concierto' and obj.fecha:
+            texto = f"Fecha: {obj.fecha.strftime('%d/%m/%Y')}"
+        return Truncator(texto).chars(160)
+
+    def url(self, obj):
+        if self.usa_get_absolute_url:
+            try:
+                url = obj.get_absolute_url()
+                if url:
+                    return url
+            except Exception:
+                pass
+        if self.url_name:
+            return reverse(self.url_name, kwargs={'pk': obj.pk})
+        return '#'
+
+    def calcular(self, obj):
+        return {
+            'titulo': self.titulo(obj),
+            'preview': self.preview(obj),
+            'image_url': self.image_url(obj),
+            'url': self.url(obj),
+        }
+
+
+SPECS = {}
+
+def preparar():
+    """Resuelve las CardSpec de todos los modelos (se llama desde MusicaConfig.ready)."""
+    for tipo, modelo in MODELOS.items():
+        SPECS[tipo] = CardSpec(tipo, modelo)
+
+def spec(tipo):
+    if tipo not in SPECS:
+        preparar()
+    return SPECS[tipo]
+
+
+# ----------------------------
+# Cache por objeto
+# ----------------------------
+
+def _version(tipo, obj):
+    partes = [obj.updated_at]
+    if spec(tipo).usa_artista and obj.artista_id:
+        partes.append(obj.artista.updated_at)
+    return ':'.join(f'{p.timestamp():.6f}' if p else '0' for p in partes)
+
+def _clave(tipo, obj, version=None):
+    return f'tarjeta:{tipo}:{obj.pk}:{version or _version(tipo, obj)}'
+
+def calcular(tipo, obj):
+    """Tarjeta fresca de `obj` (sin cache); la deja guardada para las lecturas."""
+    datos = spec(tipo).calcular(obj)
+    datos['version'] = _version(tipo, obj)
+    cache.set(_clave(tipo, obj, datos['version']), datos, TIMEOUT)
+    return datos
+
+def tarjeta(tipo, obj):
+    datos = cache.get(_clave(tipo, obj))
+    if datos is None:
+        datos = calcular(tipo, obj)
+    return datos
+
+def items(pares):
+    """
+    [(tipo, obj)] -> dicts de tarjeta para los templates (tipo, obj, orden,
+    titulo, preview, image_url, url). Las tarjetas cacheadas se traen con un
+    único cache.get_many.
+    """
+    pares = [(tipo, obj, _clave(tipo, obj)) for tipo, obj in pares]
+    cacheadas = cache.get_many([clave for _tipo, _obj, clave in pares])
+    resultado = []
+    for tipo, obj, clave in pares:
+        datos = cacheadas.get(clave)
+        if datos is None:
+            datos = calcular(tipo, obj)
+        resultado.append(dict(datos, tipo=tipo, obj=obj, orden=timezone.make_naive(obj.created_at)))
+    return resultado
+
+
+# ----------------------------
+# Fragmentos HTML
+# ----------------------------
+
+FRAGMENTO = 'musica/_tarjeta.html'
+
+def _clave_fragmento(it):
+    """
+    tipo + pk + sello de actualización. Los items son dicts de items() o
+    FeedEntry (cuyo updated_at se renueva en cada sincronización).
+    """
+    if isinstance(it, dict):
+        return f"fragmento:{it['tipo']}:{it['obj'].pk}:{it['version']}"
+    return f"fragmento:{it.tipo}:{it.objeto_id}:{it.updated_at.timestamp()}"
+
+def renderizar(items):
+    """HTML de cada tarjeta, en orden. Los fragmentos cacheados se traen con un único get_many."""
+    items = list(items)
+    claves = [_clave_fragmento(it) for it in items]
+    cacheados = cache.get_many(claves)
+    nuevos = {}
+    for it, clave in zip(items, claves):
+        if clave not in cacheados:
+            nuevos[clave] = render_to_string(FRAGMENTO, {'it': it})
+    if nuevos:
+        cache.set_many(nuevos, TIMEOUT)
+    return [mark_safe(cacheados.get(clave) or nuevos[clave]) for clave in claves]
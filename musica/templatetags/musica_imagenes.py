@@ -0,0 +1,48 @@
+"""
+{% imagen %}: <picture> con srcset AVIF/WebP/JPEG a partir de los derivados
+de musica/imagenes.py; sin derivados, el <img> de siempre con el original.
+
+    {% load musica_imagenes %}
+    {% imagen artista.imagen alt=artista.nombre class="img-fluid rounded" sizes="(min-width: 992px) 50vw, 100vw" %}
+    {% imagen_estatica 'musica/portada.png' alt="Portada" loading="eager" %}
+
+`fuente` puede ser un FieldFile o una URL de MEDIA (p.ej. el image_url de las
+tarjetas). El resto de los argumentos con nombre pasan como atributos del <img>.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from .. import imagenes
+
+register = template.Library()
+
+
+def _html(url, fuentes, alt, sizes, atributos):
+    if not fuentes:
+        return format_html('<img src="{}" alt="{}"{}>', url, alt, format_html_join('', ' {}="{}"', atributos.items()))
+    atributos = {'loading': 'lazy', 'decoding': 'async', **atributos}
+    # El último formato (JPEG) va en el <img>: es el que entiende cualquier navegador.
+    *modernos, (_formato, _mime, srcset_img) = fuentes
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', ((m, s, sizes) for _f, m, s in modernos)),
+        url, srcset_img, sizes, alt, format_html_join('', ' {}="{}"', atributos.items()),
+    )
+
+
+@register.simple_tag
+def imagen(fuente, alt='', sizes='100vw', **atributos):
+    if not fuente:
+        return ''
+    if isinstance(fuente, str):
+        nombre = imagenes.nombre_de_url(fuente)
+        fuentes = imagenes.srcsets(nombre) if nombre else []
+        return _html(fuente, fuentes, alt, sizes, atributos)
+    return _html(fuente.url, imagenes.srcsets(fuente.name, fuente.storage), alt, sizes, atributos)
+
+
+@register.simple_tag
+def imagen_estatica(ruta, alt='', sizes='100vw', **atributos):
+    """Igual que {% imagen %} para los estáticos del app (derivados con `generar_derivados --estaticos`)."""
+    return _html(static(ruta), imagenes.srcsets(ruta, imagenes.estaticos()), alt, sizes, atributos)
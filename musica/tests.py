@@ -1,3 +1,1468 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections
+from django.db.models import Count
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, URLPattern
+from django.utils import timezone
+from PIL import Image
+
+from blogmusica import arranque, basedatos, metricas, plantillas, replicas
+
+from . import (
+    auditoria, busqueda, cache_paginas, cambios, catalogo, comentarios, feed, imagenes, paginacion, semillas,
+    signals, slugs, tareas, tarjetas, views,
+)
+from . import urls as musica_urls
+from .models import Artista, NotaBlog, Concierto, Lanzamiento, Recomendacion, Comentario, Tarea, Borrado, FeedEntry
+
+
+def _contar_consultas(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200, (url, response.status_code)
+    return len(ctx)
+
+
+# Estas suites miden el costo de las vistas: sin el cache de páginas completas.
+@override_settings(MUSICA_CACHE_PAGINAS=0)
+class ConsultasAcotadasTests(TestCase):
+    """
+    Cada vista ejecuta una cantidad constante de consultas: con pocas filas y
+    con muchas (sin pasar el tamaño de página) el número tiene que ser el mismo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('lector', password='x')
+        cls.nota = NotaBlog.objects.create(titulo='Nota con comentarios', contenido='<p>Texto</p>')
+        cls.artista = Artista.objects.create(nombre='Artista 0')
+
+    def _sembrar(self, n):
+        hoy = datetime.date.today()
+        for i in range(n):
+            artista = Artista.objects.create(nombre=f'Artista {i}-{Artista.objects.count()}')
+            Concierto.objects.create(nombre=f'Concierto {i}', fecha=timezone.now())
+            Lanzamiento.objects.create(titulo=f'Lanzamiento {i}', artista=artista, fecha_lanzamiento=hoy)
+            Recomendacion.objects.create(titulo=f'Recomendación {i}', artista=artista, fecha=hoy)
+            NotaBlog.objects.create(titulo=f'Nota {i}', contenido='x')
+            Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido=f'Comentario {i}')
+
+    def _urls(self):
+        lanzamiento = Lanzamiento.objects.first()
+        recomendacion = Recomendacion.objects.first()
+        return [
+            reverse('musica:inicio'),
+            reverse('musica:inicio') + '?q=nota',
+            reverse('musica:ingresos'),
+            reverse('musica:lista_artistas'),
+            reverse('musica:lista_conciertos'),
+            reverse('musica:lista_lanzamientos'),
+            reverse('musica:lista_recomendaciones'),
+            reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk}),
+            reverse('musica:artista_detalle', kwargs={'pk': self.artista.pk}),
+            reverse('musica:lanzamiento_detalle', kwargs={'pk': lanzamiento.pk}),
+            reverse('musica:recomendacion_detalle', kwargs={'pk': recomendacion.pk}),
+        ]
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        self._sembrar(2)
+        urls = self._urls()
+        # Primera pasada para calentar caches (tarjetas, sesión, etc.)
+        for url in urls:
+            _contar_consultas(self.client, url)
+        pocas = {url: _contar_consultas(self.client, url) for url in urls}
+
+        self._sembrar(10)
+        muchas = {url: _contar_consultas(self.client, url) for url in urls}
+
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(pocas[url], muchas[url])
+                self.assertLessEqual(muchas[url], 6)
+
+
+# ----------------------------
+# Feed materializado (FeedEntry)
+# ----------------------------
+
+class FeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artista = Artista.objects.create(nombre='Banda')
+        hoy = datetime.date.today()
+        self.objetos = {
+            'nota': NotaBlog.objects.create(titulo='Nota', contenido='Texto de la nota'),
+            'concierto': Concierto.objects.create(nombre='Concierto', fecha=timezone.now()),
+            'lanzamiento': Lanzamiento.objects.create(titulo='Disco', artista=self.artista, fecha_lanzamiento=hoy),
+            'recomendacion': Recomendacion.objects.create(titulo='Escuchá', artista=self.artista, fecha=hoy),
+        }
+
+    def _filas(self):
+        return {
+            (e.tipo, e.objeto_id): (e.titulo, e.preview, e.image_url, e.url, e.created_at)
+            for e in FeedEntry.objects.all()
+        }
+
+    def test_alta_cambio_y_baja_de_cada_tipo(self):
+        for tipo, obj in self.objetos.items():
+            with self.subTest(tipo=tipo):
+                entrada = FeedEntry.objects.get(tipo=tipo, objeto_id=obj.pk)
+                self.assertEqual(entrada.created_at, obj.created_at)
+                self.assertEqual(entrada.url, tarjetas.calcular(tipo, obj)['url'])
+
+                campo = 'nombre' if tipo == 'concierto' else 'titulo'
+                setattr(obj, campo, f'{tipo} corregido')
+                obj.save()
+                self.assertEqual(FeedEntry.objects.get(tipo=tipo, objeto_id=obj.pk).titulo, f'{tipo} corregido')
+
+                obj.delete()
+                self.assertFalse(FeedEntry.objects.filter(tipo=tipo, objeto_id=obj.pk).exists())
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_reconstruir_coincide_con_las_tablas(self):
+        vivas = self._filas()
+        self.assertEqual(set(vivas), {(tipo, obj.pk) for tipo, obj in self.objetos.items()})
+
+        # Desincronizada: una fila de menos, una desactualizada y una huérfana.
+        FeedEntry.objects.filter(tipo='nota').delete()
+        FeedEntry.objects.filter(tipo='concierto').update(titulo='viejo')
+        FeedEntry.objects.create(tipo='nota', objeto_id=999, titulo='Huérfana', created_at=timezone.now())
+
+        out = StringIO()
+        call_command('backfill_feed', '--lote', '2', stdout=out)
+        self.assertEqual(self._filas(), vivas)
+        self.assertIn('4 filas', out.getvalue())
+        self.assertEqual(feed.reconstruir(), {'nota': 1, 'concierto': 1, 'lanzamiento': 1, 'recomendacion': 1})
+        self.assertEqual(self._filas(), vivas)
+
+
+# ----------------------------
+# Paginación por cursor
+# ----------------------------
+
+class PaginacionTests(TestCase):
+    ORDEN = ['-created_at', '-id']
+
+    def _entradas(self, fechas):
+        FeedEntry.objects.bulk_create(
+            FeedEntry(tipo='nota', objeto_id=i, titulo=f'Entrada {i}', created_at=fecha)
+            for i, fecha in enumerate(fechas)
+        )
+        return list(FeedEntry.objects.order_by(*self.ORDEN).values_list('pk', flat=True))
+
+    def _recorrer(self, limite):
+        vistos, cursor = [], None
+        while True:
+            pagina = paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, cursor, limite=limite)
+            vistos += [e.pk for e in pagina]
+            cursor = pagina.siguiente
+            if cursor is None:
+                return vistos
+
+    def test_cursor_ida_y_vuelta(self):
+        self._entradas([timezone.now()])
+        entrada = FeedEntry.objects.get()
+        cursor = paginacion.codificar(entrada, self.ORDEN)
+        self.assertEqual(paginacion.decodificar(cursor, FeedEntry, self.ORDEN), [entrada.created_at, entrada.pk])
+
+    def test_empates_se_desempatan_por_id(self):
+        ahora = timezone.now().replace(microsecond=0)
+        # La misma fecha, y fechas distintas dentro del mismo milisegundo.
+        esperados = self._entradas([ahora] * 4 + [ahora + datetime.timedelta(microseconds=i) for i in range(1, 6)])
+        self.assertEqual(self._recorrer(limite=2), esperados)
+
+    def test_cursor_adulterado_vuelve_a_la_primera(self):
+        self._entradas([timezone.now() - datetime.timedelta(minutes=i) for i in range(3)])
+        primera = paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, limite=2)
+        for cursor in (primera.siguiente[:-2] + 'xx', 'basura'):
+            with self.subTest(cursor=cursor):
+                pagina = paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, cursor, limite=2)
+                self.assertTrue(pagina.es_primera)
+                self.assertEqual([e.pk for e in pagina], [e.pk for e in primera])
+
+    def test_ultima_pagina_sin_siguiente(self):
+        self._entradas([timezone.now() - datetime.timedelta(minutes=i) for i in range(4)])
+        primera = paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, limite=2)
+        ultima = paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, primera.siguiente, limite=2)
+        self.assertEqual(len(ultima), 2)
+        self.assertIsNone(ultima.siguiente)
+        self.assertIsNone(paginacion.paginar(FeedEntry.objects.all(), self.ORDEN, limite=4).siguiente)
+
+
+# ----------------------------
+# Búsqueda de texto completo
+# ----------------------------
+
+@override_settings(MUSICA_TAREAS_INMEDIATAS=True)
+class BusquedaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_el_titulo_pesa_mas(self):
+        en_cuerpo = NotaBlog.objects.create(titulo='Otra nota', contenido='<p>jazz, jazz y más jazz</p>')
+        en_titulo = NotaBlog.objects.create(titulo='Jazz en el sur', contenido='Crónica del festival')
+        self.assertEqual(busqueda.buscar('jazz').claves, [('nota', en_titulo.pk), ('nota', en_cuerpo.pk)])
+
+    def test_sin_tildes_ni_mayusculas(self):
+        nota = NotaBlog.objects.create(titulo='Ñandú', contenido='x')
+        artista = Artista.objects.create(nombre='Canción Animal')
+        for query in ('nandu', 'ÑANDÚ', 'Nan'):
+            self.assertEqual(busqueda.buscar(query).claves, [('nota', nota.pk)], query)
+        self.assertEqual(busqueda.buscar('cancion animal').claves, [('artista', artista.pk)])
+        self.assertEqual(busqueda.buscar('"OR" *').total, 0)  # sin sintaxis FTS del usuario
+
+    def test_paginas_y_total(self):
+        for i in range(5):
+            Concierto.objects.create(nombre=f'Festival {i}', fecha=timezone.now())
+        segunda = busqueda.buscar('festival', pagina=2, por_pagina=2)
+        self.assertEqual((segunda.total, len(segunda.claves)), (5, 2))
+        self.assertTrue(segunda.tiene_anterior and segunda.tiene_siguiente)
+        ultima = busqueda.buscar('festival', pagina=3, por_pagina=2)
+        self.assertEqual(len(ultima.claves), 1)
+        self.assertFalse(ultima.tiene_siguiente)
+        todas = {c for p in (1, 2, 3) for c in busqueda.buscar('festival', pagina=p, por_pagina=2).claves}
+        self.assertEqual(len(todas), 5)
+
+    def test_borrar_quita_del_indice(self):
+        artista = Artista.objects.create(nombre='Banda')
+        lanzamiento = Lanzamiento.objects.create(
+            titulo='Disco', artista=artista, fecha_lanzamiento=datetime.date.today(),
+        )
+        self.assertEqual(busqueda.buscar('banda').total, 2)  # el nombre del artista se indexa con el disco
+        lanzamiento.delete()
+        self.assertEqual(busqueda.buscar('banda').claves, [('artista', artista.pk)])
+        artista.delete()
+        self.assertEqual(busqueda.buscar('banda').total, 0)
+
+
+# ----------------------------
+# Presupuestos de performance por vista
+# ----------------------------
+#
+# Volúmenes y salida configurables por entorno, p.ej.:
+#   MUSICA_PERF_NOTAS=10000 MUSICA_PERF_COMENTARIOS=50000 MUSICA_PERF_ARTISTAS=2000 \
+#   MUSICA_PERF_REPORTE=perf.json python manage.py test musica.tests.PresupuestoVistasTests
+#
+# El reporte JSON (una fila por vista y volumen) sirve para comparar corridas entre commits.
+
+def _env_int(nombre, default):
+    return int(os.environ.get(nombre, default))
+
+VOLUMEN = {
+    'usuarios': _env_int('MUSICA_PERF_USUARIOS', 20),
+    'artistas': _env_int('MUSICA_PERF_ARTISTAS', 40),
+    'notas': _env_int('MUSICA_PERF_NOTAS', 200),
+    'comentarios': _env_int('MUSICA_PERF_COMENTARIOS', 300),
+    'conciertos': _env_int('MUSICA_PERF_CONCIERTOS', 100),
+    'lanzamientos': _env_int('MUSICA_PERF_LANZAMIENTOS', 100),
+    'recomendaciones': _env_int('MUSICA_PERF_RECOMENDACIONES', 100),
+}
+# La segunda medición se hace con el volumen multiplicado por este factor.
+FACTOR_CRECIMIENTO = _env_int('MUSICA_PERF_FACTOR', 3)
+REPETICIONES = _env_int('MUSICA_PERF_REPETICIONES', 3)
+MAX_MS = float(os.environ.get('MUSICA_PERF_MAX_MS', 1500))
+
+# Máximo de consultas por vista (name de musica/urls.py). Toda ruta nueva necesita su presupuesto.
+PRESUPUESTOS = {
+    'inicio': 4,
+    'login': 2,
+    'logout': 2,
+    'register': 2,
+    'lista_artistas': 2,
+    'lista_conciertos': 2,
+    'lista_lanzamientos': 3,
+    'lista_recomendaciones': 3,
+    'ingresos': 3,
+    'quienes_somos': 1,
+    'nota_detalle': 3,
+    'nota_comentarios': 3,
+    'artista_detalle': 2,
+    'concierto_detalle': 2,
+    'lanzamiento_detalle': 2,
+    'recomendacion_detalle': 2,
+    'nota_detail': 3,
+    'artista_detail': 2,
+    'api_lista': 2,
+    'api_detalle': 2,
+    'api_cambios': 7,
+}
+# Rutas que hoy no responden 200 y por eso no se miden (motivo).
+OMITIDAS = {}
+# Rutas que se ejercitan con POST en lugar de GET.
+METODO_POST = {'logout'}
+# Query string de la medición. api_cambios corta la tanda en `limite` registros: con el
+# límite por defecto, cuántas tablas recorre depende del volumen sembrado.
+PARAMETROS = {'api_cambios': {'limite': 1}}
+
+
+class _RelojSQL:
+    """execute_wrapper que cuenta consultas y acumula su tiempo."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def _sembrar_volumen(volumen, seed=0):
+    """Carga masiva con el generador de seed_musica; luego reconstruye feed e índice."""
+    semillas.generar(volumen, seed=seed, lote=1000)
+
+
+def _nota_mas_comentada():
+    # El generador concentra comentarios en pocas notas: el peor caso para su página de detalle.
+    return NotaBlog.objects.order_by('-comentarios_count', 'pk').first()
+
+
+def _argumentos(nombre):
+    """kwargs para reverse() de cada ruta con parámetros."""
+    por_pk = {
+        'nota_detalle': NotaBlog,
+        'artista_detalle': Artista,
+        'concierto_detalle': Concierto,
+        'lanzamiento_detalle': Lanzamiento,
+        'recomendacion_detalle': Recomendacion,
+    }
+    if nombre in ('nota_detalle', 'nota_comentarios'):
+        return {'pk': _nota_mas_comentada().pk}
+    if nombre in por_pk:
+        return {'pk': por_pk[nombre].objects.order_by('pk').values_list('pk', flat=True).first()}
+    if nombre == 'nota_detail':
+        return {'slug': _nota_mas_comentada().slug}
+    if nombre == 'artista_detail':
+        return {'slug': Artista.objects.order_by('pk').values_list('slug', flat=True).first()}
+    if nombre == 'api_lista':
+        return {'recurso': 'lanzamientos'}
+    if nombre == 'api_detalle':
+        return {'recurso': 'notas', 'pk': _nota_mas_comentada().pk}
+    return {}
+
+
+@override_settings(MUSICA_CACHE_PAGINAS=0)
+class PresupuestoVistasTests(TestCase):
+    """
+    Recorre todas las rutas de musica/urls.py con el test client y mide
+    consultas, tiempo de SQL y tiempo total. Falla si una vista supera su
+    presupuesto o si su cantidad de consultas crece con el volumen de datos.
+    """
+
+    def _rutas(self):
+        return [p.name for p in musica_urls.urlpatterns if isinstance(p, URLPattern) and p.name]
+
+    def _medir(self, nombre, volumen_total):
+        url = reverse(f'musica:{nombre}', kwargs=_argumentos(nombre))
+        pedir = self.client.post if nombre in METODO_POST else self.client.get
+        params = PARAMETROS.get(nombre, {})
+        pedir(url, params)  # calentamiento (caches de tarjetas, templates, etc.)
+        tiempos, reloj = [], None
+        for _ in range(REPETICIONES):
+            reloj = _RelojSQL()
+            inicio = time.perf_counter()
+            with connection.execute_wrapper(reloj):
+                response = pedir(url, params)
+            tiempos.append((time.perf_counter() - inicio, reloj))
+        wall, reloj = sorted(tiempos, key=lambda t: t[0])[len(tiempos) // 2]
+        return {
+            'vista': nombre,
+            'url': url,
+            'status': response.status_code,
+            'consultas': reloj.consultas,
+            'sql_ms': round(reloj.segundos * 1000, 3),
+            'wall_ms': round(wall * 1000, 3),
+            'volumen': volumen_total,
+        }
+
+    def test_presupuestos_por_vista(self):
+        rutas = self._rutas()
+        sin_presupuesto = sorted(set(rutas) - set(PRESUPUESTOS))
+        self.assertEqual(sin_presupuesto, [], 'Rutas sin presupuesto en PRESUPUESTOS')
+        medibles = [r for r in rutas if r not in OMITIDAS]
+
+        filas = []
+        _sembrar_volumen(VOLUMEN)
+        base = {r: self._medir(r, dict(VOLUMEN)) for r in medibles}
+        filas.extend(base.values())
+
+        crecido = {k: v * (FACTOR_CRECIMIENTO - 1) for k, v in VOLUMEN.items()}
+        _sembrar_volumen(crecido, seed=1)
+        total = {k: v * FACTOR_CRECIMIENTO for k, v in VOLUMEN.items()}
+        grande = {r: self._medir(r, total) for r in medibles}
+        filas.extend(grande.values())
+
+        ruta_reporte = os.environ.get('MUSICA_PERF_REPORTE')
+        if ruta_reporte:
+            with open(ruta_reporte, 'w', encoding='utf-8') as fh:
+                json.dump({'omitidas': OMITIDAS, 'mediciones': filas}, fh, ensure_ascii=False, indent=2)
+
+        for r in medibles:
+            with self.subTest(vista=r):
+                self.assertLess(grande[r]['status'], 400, grande[r])
+                self.assertEqual(base[r]['consultas'], grande[r]['consultas'],
+                                 f'{r}: las consultas crecen con el volumen')
+                self.assertLessEqual(grande[r]['consultas'], PRESUPUESTOS[r], grande[r])
+                self.assertLessEqual(grande[r]['wall_ms'], MAX_MS, grande[r])
+
+
+# ----------------------------
+# Cache de tarjetas y de páginas
+# ----------------------------
+
+@override_settings(MUSICA_TAREAS_INMEDIATAS=True)
+class TarjetasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artista = Artista.objects.create(nombre='Banda')
+        self.nota = NotaBlog.objects.create(titulo='Nota', contenido='Texto')
+        self.lanzamiento = Lanzamiento.objects.create(
+            titulo='Disco', artista=self.artista, fecha_lanzamiento=datetime.date.today(),
+        )
+
+    def _pares(self):
+        lanzamiento = Lanzamiento.objects.select_related('artista').get(pk=self.lanzamiento.pk)
+        return [('nota', NotaBlog.objects.get(pk=self.nota.pk)), ('lanzamiento', lanzamiento),
+                ('artista', Artista.objects.get(pk=self.artista.pk))]
+
+    def test_spec_resuelta_desde_meta(self):
+        spec = tarjetas.spec('lanzamiento')
+        self.assertEqual(spec.campos_imagen, ('imagen',))
+        self.assertTrue(spec.usa_artista)
+        self.assertFalse(tarjetas.spec('nota').usa_artista)
+
+    def test_segunda_vez_sin_consultas(self):
+        pares = self._pares()
+        cache.clear()
+        primera = tarjetas.items(pares)
+        with self.assertNumQueries(0):
+            segunda = tarjetas.items(pares)
+        self.assertEqual(primera, segunda)
+        self.assertEqual([it['titulo'] for it in segunda], ['Nota', 'Disco', 'Banda'])
+        self.assertEqual(segunda[0]['url'], self.nota.get_absolute_url())
+
+    def test_guardar_cambia_la_clave(self):
+        antes = tarjetas.items(self._pares())
+        self.nota.titulo = 'Nota corregida'
+        self.nota.save()
+        self.assertEqual(tarjetas.items(self._pares())[0]['titulo'], 'Nota corregida')
+
+        # El artista cambia la clave de su tarjeta y la de sus lanzamientos (usan su imagen).
+        self.artista.imagen = 'artistas/banda.jpg'
+        self.artista.save()
+        despues = tarjetas.items(self._pares())
+        self.assertNotEqual(despues[1]['version'], antes[1]['version'])
+        self.assertIn('artistas/banda', despues[1]['image_url'])
+
+    def test_cambio_sin_senales(self):
+        # Un cambio de otro proceso no borra nada de este cache: lo delata el updated_at.
+        tarjetas.items(self._pares())
+        NotaBlog.objects.filter(pk=self.nota.pk).update(
+            titulo='Editada en otro lado', updated_at=timezone.now() + datetime.timedelta(seconds=1),
+        )
+        self.assertEqual(tarjetas.items(self._pares())[0]['titulo'], 'Editada en otro lado')
+
+
+class CachePaginasTests(TestCase):
+    """Portada e ingresos cacheados por query string e invalidados por las señales."""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('lector', password='x')
+        self.nota = NotaBlog.objects.create(titulo='Primera nota', contenido='<p>Texto</p>')
+
+    def test_segundo_pedido_sin_consultas(self):
+        for url in (reverse('musica:inicio'), reverse('musica:inicio') + '?q=nota', reverse('musica:ingresos')):
+            with self.subTest(url=url):
+                primera = self.client.get(url)
+                with self.assertNumQueries(0):
+                    segunda = self.client.get(url)
+                self.assertEqual(primera.content, segunda.content)
+
+    def test_query_string_distinta_es_otra_entrada(self):
+        self.client.get(reverse('musica:inicio'))
+        response = self.client.get(reverse('musica:inicio') + '?q=inexistente')
+        self.assertNotContains(response, 'Primera nota</h5>')
+
+    def test_guardar_contenido_invalida(self):
+        url = reverse('musica:inicio')
+        self.client.get(url)
+        Concierto.objects.create(nombre='Concierto nuevo', fecha=timezone.now())
+        self.assertContains(self.client.get(url), 'Concierto nuevo')
+        self.nota.titulo = 'Nota corregida'
+        self.nota.save()
+        self.assertContains(self.client.get(url), 'Nota corregida')
+        self.nota.delete()
+        self.assertNotContains(self.client.get(url), 'Nota corregida')
+
+    def test_comentario_invalida(self):
+        antes = cache_paginas._generacion()
+        Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido='Hola')
+        self.assertNotEqual(cache_paginas._generacion(), antes)
+
+    @override_settings(MUSICA_TAREAS_INMEDIATAS=False)
+    def test_resincronizar_artista_invalida(self):
+        artista = Artista.objects.create(nombre='Banda')
+        Lanzamiento.objects.create(titulo='Disco', artista=artista, fecha_lanzamiento=datetime.date.today())
+        url = reverse('musica:inicio')
+        self.client.get(url)
+        artista.imagen = 'artistas/banda.jpg'
+        artista.save()
+        # Un pedido entre el guardado y la tarea vuelve a cachear la tarjeta vieja.
+        self.assertNotContains(self.client.get(url), 'artistas/banda')
+        signals.resincronizar_artista(artista.pk)
+        self.assertContains(self.client.get(url), 'artistas/banda')
+
+    @override_settings(MUSICA_TAREAS_INMEDIATAS=False)
+    def test_reindexar_invalida(self):
+        url = reverse('musica:inicio') + '?q=invierno'
+        nota = NotaBlog.objects.create(titulo='Festival de invierno', contenido='x')
+        self.assertContains(self.client.get(url), 'No hay publicaciones')
+        busqueda.indexar_pk('musica.notablog', nota.pk)
+        self.assertNotContains(self.client.get(url), 'No hay publicaciones')
+
+    def test_usuario_logueado_no_usa_cache(self):
+        url = reverse('musica:inicio')
+        self.client.get(url)
+        self.client.force_login(self.usuario)
+        self.assertContains(self.client.get(url), 'Hola, lector')
+
+    def test_fragmento_versionado_por_objeto(self):
+        items = tarjetas.items([('nota', self.nota)])
+        clave = tarjetas._clave_fragmento(items[0])
+        html = tarjetas.renderizar(items)
+        self.assertIn('Primera nota', html[0])
+        self.assertEqual(cache.get(clave), html[0])
+
+        self.nota.titulo = 'Nota corregida'
+        self.nota.save()
+        items = tarjetas.items([('nota', self.nota)])
+        self.assertNotEqual(tarjetas._clave_fragmento(items[0]), clave)
+        self.assertIn('Nota corregida', tarjetas.renderizar(items)[0])
+
+
+CACHE_ARCHIVOS = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'blogmusica-tests-cache'),
+    },
+}
+
+
+@override_settings(CACHES=CACHE_ARCHIVOS)
+class CachePaginasArchivosTests(CachePaginasTests):
+    """Lo mismo con el backend de archivos."""
+
+
+# ----------------------------
+# GET condicional
+# ----------------------------
+
+@override_settings(MUSICA_CACHE_PAGINAS=0)
+class GetCondicionalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('lector', password='x')
+        self.nota = NotaBlog.objects.create(titulo='Nota', contenido='<p>Texto</p>')
+        self.artista = Artista.objects.create(nombre='Banda')
+        self.lanzamiento = Lanzamiento.objects.create(
+            titulo='Disco', artista=self.artista, fecha_lanzamiento=datetime.date.today(),
+        )
+
+    def _revalidar(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_304_sin_renderizar(self):
+        urls = [
+            reverse('musica:inicio'),
+            reverse('musica:ingresos'),
+            reverse('musica:lista_lanzamientos'),
+            reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk}),
+            reverse('musica:lanzamiento_detalle', kwargs={'pk': self.lanzamiento.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                revalidada = self._revalidar(url, response)
+                self.assertEqual(revalidada.status_code, 304)
+                self.assertEqual(revalidada.templates, [])
+
+    def test_cambios_generan_otro_etag(self):
+        url = reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk})
+        response = self.client.get(url)
+        Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido='Hola')
+        self.assertEqual(self._revalidar(url, response).status_code, 200)
+
+        url = reverse('musica:lanzamiento_detalle', kwargs={'pk': self.lanzamiento.pk})
+        response = self.client.get(url)
+        self.artista.nombre = 'Banda renombrada'
+        self.artista.save()
+        self.assertContains(self._revalidar(url, response), 'Banda renombrada')
+
+        url = reverse('musica:lista_lanzamientos')
+        response = self.client.get(url)
+        self.lanzamiento.delete()
+        self.assertEqual(self._revalidar(url, response).status_code, 200)
+
+    def test_etag_depende_del_usuario(self):
+        url = reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk})
+        response = self.client.get(url)
+        self.client.force_login(self.usuario)
+        self.assertContains(self._revalidar(url, response), 'Publicar comentario')
+
+    def test_nuevo_login_genera_otro_etag(self):
+        # Con el login cambian la sesión y el token CSRF del formulario de comentarios.
+        url = reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk})
+        self.client.login(username='lector', password='x')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self._revalidar(url, response).status_code, 304)
+
+        self.client.logout()
+        self.client.login(username='lector', password='x')
+        self.assertContains(self._revalidar(url, response), 'Publicar comentario')
+
+    @override_settings(MUSICA_TAREAS_INMEDIATAS=False, MUSICA_CACHE_PAGINAS=0)
+    def test_busqueda_cambia_al_reindexar(self):
+        url = reverse('musica:inicio') + '?q=invierno'
+        nota = NotaBlog.objects.create(titulo='Festival de invierno', contenido='x')
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self._revalidar(url, response).status_code, 304)
+        # La tarea reindexa sin tocar las tablas del sello.
+        busqueda.indexar_pk('musica.notablog', nota.pk)
+        self.assertNotContains(self._revalidar(url, response), 'No hay publicaciones')
+
+    def test_inexistente_sigue_siendo_404(self):
+        self.assertEqual(self.client.get(reverse('musica:nota_detalle', kwargs={'pk': 999})).status_code, 404)
+
+    @override_settings(MUSICA_CACHE_PAGINAS=300)
+    def test_pagina_cacheada_responde_304_sin_consultas(self):
+        url = reverse('musica:inicio')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            revalidada = self._revalidar(url, response)
+        self.assertEqual(revalidada.status_code, 304)
+
+
+# ----------------------------
+# Slugs
+# ----------------------------
+
+class SlugsTests(TestCase):
+
+    def _nota(self, titulo):
+        return NotaBlog.objects.create(titulo=titulo, contenido='x')
+
+    def test_sufijos_consecutivos_en_una_consulta(self):
+        self.assertEqual(self._nota('Novedades de la semana').slug, 'novedades-de-la-semana')
+        for n in range(2, 12):
+            self._nota('Novedades de la semana')
+        with self.assertNumQueries(1):
+            proximo = slugs.siguiente(NotaBlog, 'slug', 'Novedades de la semana', 'nota')
+        self.assertEqual(proximo, 'novedades-de-la-semana-12')
+
+    def test_ignora_slugs_con_el_mismo_prefijo(self):
+        self._nota('Novedades de la semana en vivo')
+        self._nota('Novedades de la semana 2024')
+        self.assertEqual(self._nota('Novedades de la semana').slug, 'novedades-de-la-semana')
+        # "-2024" no se distingue de un sufijo: la serie sigue desde ahí, sin chocar.
+        self.assertEqual(self._nota('Novedades de la semana').slug, 'novedades-de-la-semana-2025')
+        self.assertEqual(self._nota('¡!').slug, 'nota')
+
+    def test_reintenta_si_otro_proceso_tomo_el_slug(self):
+        self._nota('Agenda')
+        real = slugs.siguiente
+        respuestas = iter(['agenda'])  # la primera consulta "llega tarde": devuelve uno ya tomado
+        with mock.patch.object(slugs, 'siguiente', side_effect=lambda *a: next(respuestas, None) or real(*a)):
+            nota = self._nota('Agenda')
+        self.assertEqual(nota.slug, 'agenda-2')
+
+    def test_asignar_en_lote(self):
+        self._nota('Agenda')
+        self._nota('Agenda')
+        objs = [NotaBlog(titulo=t, contenido='x') for t in ('Agenda', 'Agenda 3', 'Agenda', 'Crónica')]
+        with self.assertNumQueries(1):
+            slugs.asignar(objs, 'slug', 'titulo', 'nota')
+        self.assertEqual([o.slug for o in objs], ['agenda-3', 'agenda-3-2', 'agenda-4', 'cronica'])
+        NotaBlog.objects.bulk_create(objs)
+
+
+class RutasPorSlugTests(TestCase):
+
+    def setUp(self):
+        self.nota = NotaBlog.objects.create(titulo='Crónica del festival', contenido='<p>Texto</p>')
+        self.artista = Artista.objects.create(nombre='Los Pericos')
+
+    def test_slug_y_pk_cuestan_lo_mismo(self):
+        for por_pk, por_slug in (
+            (reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk}), self.nota.get_absolute_url()),
+            (reverse('musica:artista_detalle', kwargs={'pk': self.artista.pk}), self.artista.get_absolute_url()),
+        ):
+            with self.subTest(url=por_slug):
+                self.client.get(por_slug)  # calentamiento (LRU, tarjetas)
+                self.assertEqual(_contar_consultas(self.client, por_slug), _contar_consultas(self.client, por_pk))
+
+    def test_artista_tiene_slug(self):
+        self.assertEqual(self.artista.slug, 'los-pericos')
+        self.assertEqual(Artista.objects.create(nombre='Los Pericos').slug, 'los-pericos-2')
+        self.assertContains(self.client.get('/artista/los-pericos/'), 'Los Pericos')
+
+    def test_nombres_solo_de_digitos(self):
+        # Un slug "1" o "2024" lo resolvería la ruta por pk, que va antes.
+        artista = Artista.objects.create(nombre=str(self.artista.pk))  # "/artista/<pk>/" es Los Pericos
+        nota = NotaBlog.objects.create(titulo='2024', contenido='Resumen del año')
+        self.assertEqual((artista.slug, nota.slug), (f'{self.artista.pk}-artista', '2024-nota'))
+        self.assertEqual(NotaBlog.objects.create(titulo='2024', contenido='x').slug, '2024-nota-2')
+        lote = slugs.asignar([Artista(nombre=str(self.artista.pk))], 'slug', 'nombre', 'artista')
+        self.assertEqual(lote[0].slug, f'{self.artista.pk}-artista-2')
+
+        self.assertEqual(self.client.get(artista.get_absolute_url()).context['artista'], artista)
+        self.assertContains(self.client.get(nota.get_absolute_url()), 'Resumen del año')
+
+    def test_cambio_de_slug_invalida_el_lru(self):
+        url = self.nota.get_absolute_url()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.nota.slug = 'cronica'
+        self.nota.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get('/nota/cronica/').status_code, 200)
+
+    def test_lru_desactualizado_no_devuelve_otro_objeto(self):
+        url = self.nota.get_absolute_url()
+        self.client.get(url)
+        # Como si otro proceso hubiera renombrado el slug sin pasar por este LRU.
+        NotaBlog.objects.filter(pk=self.nota.pk).update(slug='otra')
+        otra = NotaBlog.objects.create(titulo='Crónica del festival', contenido='Contenido de la otra nota')
+        self.assertEqual(otra.slug, 'cronica-del-festival')
+        self.assertContains(self.client.get(url), 'Contenido de la otra nota')
+
+
+def _jpeg(ancho, alto):
+    buffer = BytesIO()
+    Image.new('RGB', (ancho, alto), (200, 30, 30)).save(buffer, format='JPEG')
+    return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MUSICA_TAREAS_INMEDIATAS=True, MUSICA_CACHE_PAGINAS=0)
+class DerivadosImagenesTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        ajuste = override_settings(MEDIA_ROOT=media.name)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        cache.clear()
+
+    def test_genera_derivados_al_guardar(self):
+        artista = Artista.objects.create(nombre='Divididos', imagen=_jpeg(800, 450))
+        datos = imagenes.manifiesto(artista.imagen.name)
+        self.assertEqual((datos['ancho'], datos['alto']), (800, 450))
+        self.assertEqual([a for a, _ruta in datos['derivados']['jpeg']], [320, 640])
+        for formato in imagenes.formatos_disponibles():
+            for _ancho, ruta in datos['derivados'][formato]:
+                self.assertTrue(artista.imagen.storage.exists(ruta), ruta)
+
+        html = self.client.get(artista.get_absolute_url()).content.decode()
+        self.assertIn('<picture>', html)
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(f'{imagenes.ruta_derivado(artista.imagen.name, 640, "jpeg")} 640w', html)
+
+    def test_no_agranda_imagenes_chicas(self):
+        artista = Artista.objects.create(nombre='Almendra', imagen=_jpeg(200, 100))
+        self.assertEqual(imagenes.manifiesto(artista.imagen.name)['derivados']['jpeg'][0][0], 200)
+
+    @override_settings(MUSICA_TAREAS_INMEDIATAS=False)
+    def test_el_request_no_espera_la_generacion(self):
+        artista = Artista.objects.create(nombre='Los Redondos', imagen=_jpeg(800, 450))
+        self.assertTrue(Tarea.objects.filter(nombre='imagenes.procesar', argumentos=['musica.artista', artista.pk, 'imagen']).exists())
+        # Mientras tanto, el original.
+        html = self.client.get(artista.get_absolute_url()).content.decode()
+        self.assertNotIn('<picture>', html)
+        self.assertIn(f'src="{artista.imagen.url}"', html)
+
+        for pk in tareas.tomar('test', 10):
+            tareas.ejecutar(pk)
+        self.assertIn('<picture>', self.client.get(artista.get_absolute_url()).content.decode())
+
+
+# TransactionTestCase: el worker ejecuta las tareas en otros threads, con su propia conexión.
+@override_settings(MUSICA_TAREAS_INMEDIATAS=False, CACHES=CACHE_ARCHIVOS)
+class ColaTareasTests(TransactionTestCase):
+
+    def test_worker_exige_cache_compartido(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            with self.assertRaisesMessage(CommandError, 'DJ_CACHE_DIR'):
+                call_command('run_worker', '--una-vez', stdout=StringIO())
+            with override_settings(MUSICA_CACHE_PAGINAS=0):
+                call_command('run_worker', '--una-vez', stdout=StringIO())
+
+    def test_guardar_encola_sin_duplicar(self):
+        nota = NotaBlog.objects.create(titulo='Festival de invierno', contenido='x')
+        nota.contenido = 'y'
+        nota.save()
+        self.assertEqual(Tarea.objects.filter(nombre='busqueda.indexar').count(), 1)
+        self.assertFalse(busqueda.buscar('invierno').total)
+
+        call_command('run_worker', '--una-vez', stdout=StringIO())
+        self.assertEqual(Tarea.objects.get().estado, Tarea.HECHA)
+        self.assertTrue(busqueda.buscar('invierno').total)
+
+    def test_reintento_con_espera_y_fallida(self):
+        llamadas = []
+
+        @tareas.registrar('test.falla')
+        def falla():
+            llamadas.append(1)
+            raise RuntimeError('sin red')
+
+        tarea = tareas.encolar('test.falla')
+        tarea.max_intentos = 2
+        tarea.save()
+        with self.assertLogs('musica.tareas', 'WARNING'):
+            self.assertEqual(tareas.ejecutar(tareas.tomar('w', 10)[0]), Tarea.PENDIENTE)
+        tarea.refresh_from_db()
+        self.assertGreater(tarea.disponible_en, timezone.now())
+        self.assertIn('sin red', tarea.ultimo_error)
+        self.assertEqual(tareas.tomar('w', 10), [])  # todavía no
+
+        Tarea.objects.filter(pk=tarea.pk).update(disponible_en=timezone.now())
+        with self.assertLogs('musica.tareas', 'ERROR'):
+            self.assertEqual(tareas.ejecutar(tareas.tomar('w', 10)[0]), Tarea.FALLIDA)
+        self.assertEqual(len(llamadas), 2)
+
+    def test_tarea_tomada_una_sola_vez_y_recuperada(self):
+        tarea = tareas.encolar('busqueda.indexar', 'musica.notablog', 0)
+        self.assertEqual(tareas.tomar('a', 10), [tarea.pk])
+        self.assertEqual(tareas.tomar('b', 10), [])
+        Tarea.objects.filter(pk=tarea.pk).update(tomada_en=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(tareas.recuperar_vencidas(), 1)
+        self.assertEqual(tareas.tomar('b', 10), [tarea.pk])
+
+
+class VistasAsyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artista = Artista.objects.create(nombre='Soda Stereo')
+        self.nota = NotaBlog.objects.create(titulo='Gira de Soda', contenido='Vuelve la banda')
+        Lanzamiento.objects.create(titulo='Sueño Stereo', artista=self.artista, fecha_lanzamiento=datetime.date.today())
+
+    def test_son_async(self):
+        for nombre in ('inicio', 'ingresos', 'lista_artistas', 'lista_conciertos', 'lista_lanzamientos', 'lista_recomendaciones'):
+            with self.subTest(vista=nombre):
+                self.assertTrue(iscoroutinefunction(getattr(views, nombre)))
+
+    async def test_listados_y_busqueda(self):
+        for url in ('/', '/ingresos/', '/artistas/', '/conciertos/', '/lanzamientos/', '/recomendaciones/'):
+            with self.subTest(url=url):
+                self.assertEqual((await self.async_client.get(url)).status_code, 200)
+        response = await self.async_client.get('/', {'q': 'soda'})
+        self.assertContains(response, 'Gira de Soda')
+        self.assertContains(response, 'Sueño Stereo')
+
+    async def test_usuario_logueado(self):
+        usuario = await User.objects.acreate_user('lector', password='x')
+        await self.async_client.aforce_login(usuario)
+        response = await self.async_client.get('/lanzamientos/')
+        self.assertContains(response, 'lector')
+        revalidada = await self.async_client.get('/lanzamientos/', headers={'if-none-match': response['ETag']})
+        self.assertEqual(revalidada.status_code, 304)
+
+    async def test_acargar_respeta_el_ranking(self):
+        lanzamiento = await Lanzamiento.objects.aget()
+        claves = [('lanzamiento', lanzamiento.pk), ('artista', self.artista.pk), ('nota', self.nota.pk), ('nota', 0)]
+        pares = await busqueda.acargar(claves)
+        self.assertEqual([(tipo, obj.pk) for tipo, obj in pares], claves[:3])
+        self.assertEqual(pares[0][1].artista.nombre, 'Soda Stereo')  # select_related
+
+
+class ComentariosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('lector', password='x')
+        self.nota = NotaBlog.objects.create(titulo='Nota', contenido='Texto')
+
+    def _comentar(self, contenido, **kwargs):
+        return Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido=contenido, **kwargs)
+
+    def test_contadores_desnormalizados(self):
+        primero = self._comentar('Uno')
+        ultimo = self._comentar('Dos')
+        self.nota.refresh_from_db()
+        self.assertEqual((self.nota.comentarios_count, self.nota.ultimo_comentario_at), (2, ultimo.created_at))
+
+        ultimo.delete()
+        self.nota.refresh_from_db()
+        self.assertEqual((self.nota.comentarios_count, self.nota.ultimo_comentario_at), (1, primero.created_at))
+
+        Comentario.objects.bulk_create([Comentario(nota=self.nota, autor=self.usuario, contenido=str(i)) for i in range(30)])
+        self.nota.refresh_from_db()
+        self.assertEqual(self.nota.comentarios_count, 1)  # bulk_create no dispara señales
+        comentarios.recalcular([self.nota.pk])
+        self.nota.refresh_from_db()
+        self.assertEqual(self.nota.comentarios_count, 31)
+
+        semillas.generar({'usuarios': 2, 'notas': 8, 'comentarios': 200}, reconstruir_indices=False)
+        for nota in NotaBlog.objects.annotate(n=Count('comentarios')):
+            self.assertEqual(nota.comentarios_count, nota.n)
+
+    @override_settings(MUSICA_COMENTARIOS_POR_MINUTO=2)
+    def test_limite_por_usuario(self):
+        self.client.force_login(self.usuario)
+        url = reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk})
+        for i in range(2):
+            self.assertEqual(self.client.post(url, {'contenido': f'Hola {i}'}).status_code, 302)
+        response = self.client.post(url, {'contenido': 'Otra vez'})
+        self.assertContains(response, 'Estás comentando muy seguido', status_code=429)
+        self.assertEqual(Comentario.objects.count(), 2)
+
+        otro = User.objects.create_user('otro', password='x')
+        self.client.force_login(otro)
+        self.assertEqual(self.client.post(url, {'contenido': 'Hola'}).status_code, 302)
+
+    def test_paginas_de_comentarios(self):
+        Comentario.objects.bulk_create([Comentario(nota=self.nota, autor=self.usuario, contenido=f'C{i}') for i in range(45)])
+        comentarios.recalcular([self.nota.pk])
+        response = self.client.get(reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk}))
+        self.assertContains(response, 'Comentarios (45)')
+        primera = response.context['comentarios']
+        self.assertEqual(len(primera), comentarios.POR_PAGINA)
+
+        vistos = [c.pk for c in primera]
+        cursor = primera.siguiente
+        url = reverse('musica:nota_comentarios', kwargs={'pk': self.nota.pk})
+        while cursor:
+            datos = self.client.get(url, {'cursor': cursor}).json()
+            vistos += [c['id'] for c in datos['comentarios']]
+            cursor = datos['siguiente']
+        self.assertEqual(vistos, list(Comentario.objects.order_by('-created_at', '-id').values_list('pk', flat=True)))
+        self.assertEqual(self.client.get(reverse('musica:nota_comentarios', kwargs={'pk': 0})).status_code, 404)
+
+
+class ApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artista = Artista.objects.create(nombre='Fito Páez', pais='Argentina')
+        hoy = datetime.date.today()
+        self.lanzamientos = [
+            Lanzamiento.objects.create(titulo=f'Disco {i}', artista=self.artista,
+                                       fecha_lanzamiento=hoy - datetime.timedelta(days=i))
+            for i in range(5)
+        ]
+
+    def _get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, response.json()
+
+    def test_campos_y_columnas(self):
+        url = reverse('musica:api_lista', kwargs={'recurso': 'lanzamientos'})
+        with CaptureQueriesContext(connection) as ctx:
+            response, datos = self._get(url, fields='titulo,artista')
+        self.assertEqual(datos['resultados'][0], {'titulo': 'Disco 0', 'artista': self.artista.pk})
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('descripcion', sql)
+        self.assertNotIn('musica_artista', sql)  # el id del artista, sin JOIN
+
+        response, datos = self._get(url, fields='titulo,clave')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('clave', datos['error'])
+        self.assertEqual(self.client.get('/api/v1/discos/').status_code, 404)
+
+    def test_paginacion_por_cursor(self):
+        url = reverse('musica:api_lista', kwargs={'recurso': 'lanzamientos'})
+        vistos, cursor = [], None
+        while True:
+            _response, datos = self._get(url, limite=2, fields='id', **({'cursor': cursor} if cursor else {}))
+            vistos += [f['id'] for f in datos['resultados']]
+            cursor = datos['siguiente']
+            if not cursor:
+                break
+        self.assertEqual(vistos, [l.pk for l in self.lanzamientos])
+
+    def test_ids_en_una_consulta(self):
+        pks = [self.lanzamientos[3].pk, self.lanzamientos[0].pk, 0]
+        url = reverse('musica:api_lista', kwargs={'recurso': 'lanzamientos'})
+        with CaptureQueriesContext(connection) as ctx:
+            _response, datos = self._get(url, ids=','.join(map(str, pks)), fields='id,titulo')
+        self.assertEqual([f['id'] for f in datos['resultados']], pks[:2])
+        self.assertEqual(datos['faltantes'], [0])
+        self.assertEqual(len([q for q in ctx.captured_queries if 'musica_lanzamiento' in q['sql'] and 'IN' in q['sql']]), 1)
+        self.assertEqual(self.client.get(url, {'ids': 'a,b'}).status_code, 400)
+
+    def test_ndjson_en_streaming(self):
+        response = self.client.get(reverse('musica:api_lista', kwargs={'recurso': 'artistas'}),
+                                   {'formato': 'ndjson', 'fields': 'nombre,pais'})
+        self.assertTrue(response.streaming)
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(l) for l in lineas], [{'nombre': 'Fito Páez', 'pais': 'Argentina'}])
+
+    def test_detalle_feed_y_etag(self):
+        nota = NotaBlog.objects.create(titulo='Nota', contenido='x')
+        url = reverse('musica:api_detalle', kwargs={'recurso': 'notas', 'pk': nota.pk})
+        response, datos = self._get(url, fields='titulo,slug')
+        self.assertEqual(datos, {'titulo': 'Nota', 'slug': 'nota'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(reverse('musica:api_detalle', kwargs={'recurso': 'notas', 'pk': 0})).status_code, 404)
+
+        _response, datos = self._get(reverse('musica:api_lista', kwargs={'recurso': 'feed'}), fields='tipo,titulo')
+        self.assertEqual(datos['resultados'][0], {'tipo': 'nota', 'titulo': 'Nota'})
+
+
+class CatalogoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('lectora', password='x')
+        self.artista = Artista.objects.create(nombre='Mercedes Sosa', pais='Argentina', biografia='La Negra — «Gracias a la vida» 🎶')
+        self.nota = NotaBlog.objects.create(titulo='Crónica', contenido='Ñandú, canción')
+        Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido='¡Qué show!')
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def _exportar(self, nombre, *args):
+        ruta = os.path.join(self.dir.name, nombre)
+        call_command('export_musica', ruta, *args, stderr=StringIO())
+        return ruta
+
+    def _importar(self, ruta, *args):
+        call_command('import_musica', ruta, *args, stdout=StringIO())
+
+    def test_ida_y_vuelta_comprimido(self):
+        ruta = self._exportar('catalogo.ndjson.gz')
+        creado = Artista.objects.values_list('created_at', 'updated_at').get()
+        Comentario.objects.all().delete()
+        NotaBlog.objects.all().delete()
+        Artista.objects.all().delete()
+        User.objects.all().delete()
+
+        self._importar(ruta)
+        artista = Artista.objects.get(pk=self.artista.pk)
+        self.assertEqual(artista.biografia, 'La Negra — «Gracias a la vida» 🎶')
+        self.assertEqual((artista.created_at, artista.updated_at), creado)  # sin auto_now
+        nota = NotaBlog.objects.get(pk=self.nota.pk)
+        self.assertEqual((nota.slug, nota.comentarios_count), ('cronica', 1))
+        self.assertEqual(Comentario.objects.get().autor.username, 'lectora')
+        self.assertEqual(busqueda.buscar('nandu').claves, [('nota', nota.pk)])
+
+        # Reimportar actualiza por id en lugar de duplicar; las filas nuevas siguen la secuencia.
+        Artista.objects.filter(pk=self.artista.pk).update(nombre='Otra')
+        self._importar(ruta)
+        self.assertEqual(list(Artista.objects.values_list('nombre', flat=True)), ['Mercedes Sosa'])
+        self.assertGreater(Artista.objects.create(nombre='Nueva').pk, self.artista.pk)
+
+    def test_reparar_mojibake(self):
+        roto = 'Córdoba, canción'.encode('utf-8').decode('cp850')
+        self.assertEqual(catalogo.reparar_texto(roto), 'Córdoba, canción')
+        self.assertEqual(catalogo.reparar_texto('Crónica — ok'), 'Crónica — ok')
+        for texto in ('música', 'árbol', 'café', 'Ñandú — en vivo'):  # UTF-8 leído como cp1252
+            with self.subTest(texto=texto):
+                self.assertEqual(catalogo.reparar_texto(texto.encode('utf-8').decode('cp1252')), texto)
+        self.assertEqual(catalogo.reparar_texto('mÃºsica'), 'música')
+        Artista.objects.filter(pk=self.artista.pk).update(biografia=roto)
+
+        ruta = self._exportar('catalogo.ndjson', '--modelos', 'musica.artista')
+        self._importar(ruta, '--reparar-mojibake', '--sin-indices')
+        self.assertEqual(Artista.objects.get(pk=self.artista.pk).biografia, 'Córdoba, canción')
+
+    def test_archivo_invalido(self):
+        ruta = os.path.join(self.dir.name, 'otro.ndjson')
+        with open(ruta, 'w', encoding='utf-8') as fh:
+            fh.write('[{"model": "musica.artista"}]\n')
+        with self.assertRaisesMessage(CommandError, 'No es un archivo musica-ndjson'):
+            self._importar(ruta)
+
+
+@override_settings(MUSICA_CAMBIOS_MARGEN=0)
+class CambiosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('espejo', password='x')
+        self.artista = Artista.objects.create(nombre='Charly García')
+        self.concierto = Concierto.objects.create(nombre='Obras', fecha=timezone.now())
+        self.nota = NotaBlog.objects.create(titulo='Nota', contenido='x')
+        Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido='Uno')
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.estado = os.path.join(self.dir.name, 'marca')
+
+    def test_lapidas_de_todos_los_modelos(self):
+        # signals no importa cambios al arrancar: su lista de modelos tiene que coincidir a mano.
+        self.assertEqual(sorted(m._meta.label_lower for m in signals.CONTENIDO), sorted(cambios.MODELOS))
+
+    def _exportar(self, nombre):
+        ruta = os.path.join(self.dir.name, nombre)
+        call_command('export_cambios', ruta, '--estado', self.estado, '--lote', '2', stderr=StringIO())
+        with open(ruta, encoding='utf-8') as fh:
+            return ruta, [json.loads(l) for l in fh]
+
+    def _cambiar(self):
+        self.artista.nombre = 'Charly'
+        self.artista.save()
+        self.concierto.delete()
+        self.lanzamiento = Lanzamiento.objects.create(titulo='Clics modernos', artista=self.artista,
+                                                      fecha_lanzamiento=datetime.date(1983, 11, 1))
+        Comentario.objects.create(nota=self.nota, autor=self.usuario, contenido='Dos')
+
+    def test_solo_lo_que_cambio(self):
+        ruta_completa, lineas = self._exportar('todo.ndjson')
+        self.assertEqual([l.get('modelo') for l in lineas[1:]],
+                         ['musica.artista', 'musica.notablog', 'musica.concierto', 'musica.comentario'])
+
+        self._cambiar()
+        ruta_cambios, lineas = self._exportar('cambios.ndjson')
+        self.assertIsNotNone(lineas[0]['desde'])  # la marca que dejó la exportación anterior
+        self.assertEqual([(l['modelo'], 'borrado' in l) for l in lineas[1:]], [
+            ('musica.concierto', True), ('musica.artista', False), ('musica.lanzamiento', False), ('musica.comentario', False),
+        ])  # la nota no: su contador de comentarios se recalcula en el espejo
+
+        _ruta, lineas = self._exportar('nada.ndjson')
+        self.assertEqual(len(lineas), 1)
+
+        # Espejo: vacío, la exportación inicial y después los cambios.
+        for modelo in (Comentario, Lanzamiento, NotaBlog, Concierto, Artista):
+            modelo.objects.all().delete()
+        for ruta in (ruta_completa, ruta_cambios):
+            call_command('import_musica', ruta, stdout=StringIO())
+        self.assertEqual(Artista.objects.get().nombre, 'Charly')
+        self.assertFalse(Concierto.objects.exists())
+        self.assertEqual(NotaBlog.objects.get().comentarios_count, 2)
+        self.assertEqual(busqueda.buscar('clics').claves, [('lanzamiento', self.lanzamiento.pk)])
+        self.assertEqual(sorted(FeedEntry.objects.values_list('tipo', flat=True)), ['lanzamiento', 'nota'])
+
+    def test_lapidas_y_purga(self):
+        pk = self.concierto.pk
+        self.concierto.delete()
+        self.assertEqual(list(Borrado.objects.values_list('modelo', 'objeto_id')), [('musica.concierto', pk)])
+        Borrado.objects.update(borrado_en=timezone.now() - datetime.timedelta(days=40))
+        self.assertEqual(cambios.purgar(30), 1)
+
+    def test_api(self):
+        url = reverse('musica:api_cambios')
+        vistos, params = [], {'limite': 2}
+        while True:
+            datos = self.client.get(url, params).json()
+            vistos += [r['modelo'] for r in datos['cambios']]
+            if not datos['siguiente']:
+                break
+            params = {'cursor': datos['siguiente'], 'limite': 2}
+        self.assertEqual(vistos, ['musica.artista', 'musica.notablog', 'musica.concierto', 'musica.comentario'])
+
+        self._cambiar()
+        datos = self.client.get(url, {'desde': datos['marca']}).json()
+        self.assertEqual([r['modelo'] for r in datos['cambios']],
+                         ['musica.concierto', 'musica.artista', 'musica.lanzamiento', 'musica.comentario'])
+        self.assertEqual(self.client.get(url, {'desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'x'}).status_code, 400)
+
+
+class AuditoriaIndicesTests(TestCase):
+
+    def test_consultas_de_las_vistas_usan_indices(self):
+        _sembrar_volumen({'usuarios': 3, 'artistas': 5, 'notas': 30, 'conciertos': 30, 'lanzamientos': 30,
+                          'recomendaciones': 30, 'comentarios': 60})
+        salida = StringIO()
+        call_command('auditar_indices', '--estricto', stdout=salida)
+        self.assertIn('Con problemas: 0', salida.getvalue())
+
+    def test_marca_scans_y_ordenamientos(self):
+        sql = 'SELECT "musica_comentario"."id" FROM "musica_comentario" ORDER BY "musica_comentario"."contenido" LIMIT 5'
+        self.assertEqual(auditoria.problemas(sql, auditoria.explicar(sql, ())), [
+            'recorre toda la tabla musica_comentario', 'ordena sin índice (USE TEMP B-TREE FOR ORDER BY)',
+        ])
+        # Recorrido en el orden de la PK que corta en el LIMIT: no es un problema.
+        sql = 'SELECT "musica_notablog"."id" FROM "musica_notablog" ORDER BY "musica_notablog"."id" DESC LIMIT 6'
+        self.assertEqual(auditoria.problemas(sql, auditoria.explicar(sql, ())), [])
+
+
+@override_settings(METRICAS_MUESTREO=1, METRICAS_LENTAS=2, METRICAS_LENTO_MS=0, METRICAS_TOKEN='secreto')
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        metricas.registro.reiniciar()
+        Artista.objects.create(nombre='Soda Stereo')
+
+    def test_mide_vistas_sync_y_async(self):
+        with self.assertLogs('blogmusica.metricas', 'WARNING') as logs:
+            self.client.get(reverse('musica:lista_artistas'))
+            self.client.get(reverse('musica:quienes_somos'))
+            self.client.get(reverse('musica:lista_artistas'))
+        self.assertIn('Request lento: GET /artistas/', logs.output[0])
+
+        texto = self.client.get('/metricas/', HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+        etiqueta = f'pid="{os.getpid()}",vista="musica:lista_artistas",metodo="GET"'
+        self.assertIn(f'blogmusica_request_seconds_count{{{etiqueta}}} 2', texto)
+        self.assertIn(f'blogmusica_responses_total{{{etiqueta},status="200"}} 2', texto)
+        consultas = [l for l in texto.splitlines() if l.startswith(f'blogmusica_sql_queries_total{{{etiqueta}}}')]
+        self.assertGreater(int(consultas[0].split()[-1]), 0)  # vista async: el SQL corre en otro thread
+        self.assertIn('blogmusica_template_seconds_total{pid', texto)
+        self.assertIn('vista="musica:quienes_somos"', texto)
+
+        lentos = self.client.get('/metricas/lentas/', HTTP_AUTHORIZATION='Bearer secreto').json()['lentos']
+        self.assertEqual(len(lentos), 2)
+        self.assertTrue(any(q['sql'].startswith('SELECT') for l in lentos for q in l['sql']))
+
+    def test_cache_y_acceso(self):
+        with self.assertLogs('blogmusica.metricas', 'WARNING'):
+            self.client.get(reverse('musica:inicio'))
+            self.client.get(reverse('musica:inicio'))  # del cache de páginas
+        texto = metricas.registro.prometheus()
+        aciertos = [l for l in texto.splitlines() if l.startswith('blogmusica_cache_hits_total') and 'musica:inicio' in l]
+        self.assertGreater(int(aciertos[0].split()[-1]), 0)
+
+        self.assertEqual(self.client.get('/metricas/').status_code, 403)
+        self.assertEqual(self.client.get('/metricas/', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        usuario = User.objects.create_user('editora', password='x', is_staff=True)
+        self.client.force_login(usuario)
+        self.assertEqual(self.client.get('/metricas/').status_code, 200)
+
+    @override_settings(METRICAS_LENTO_MS=60 * 1000)
+    def test_rapidos_no_son_lentos(self):
+        with self.assertNoLogs('blogmusica.metricas', 'WARNING'):
+            self.client.get(reverse('musica:lista_artistas'))
+        self.assertEqual(metricas.registro.lentos(), [])
+        self.assertIn('vista="musica:lista_artistas"', metricas.registro.prometheus())
+
+    @override_settings(METRICAS_MUESTREO=0)
+    def test_sin_muestreo_no_se_usa(self):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        with self.assertRaises(MiddlewareNotUsed):
+            metricas.MetricasMiddleware(lambda request: None)
+
+
+@override_settings(TEMPLATES_PERFIL=1, METRICAS_TOKEN='secreto')
+class PlantillasTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        plantillas.acumulado.reiniciar()
+        self.nota = NotaBlog.objects.create(titulo='Primera nota', contenido='<p>Texto</p>')
+
+    def test_perfil_por_template_nodo_y_filtro(self):
+        with plantillas.perfilar() as perfil:
+            self.client.get(reverse('musica:nota_detalle', args=[self.nota.pk]))
+        templates = {f['nombre']: f for f in perfil.filas('template')}
+        self.assertIn('musica/nota_detalle.html', templates)
+        self.assertIn('musica/base.html', templates)  # el padre del {% extends %}
+        nodos = [f['nombre'] for f in perfil.filas('nodo')]
+        self.assertTrue(any(n.startswith('musica/nota_detalle.html:12 {% firstof') for n in nodos))
+        self.assertIn('date', {f['nombre'] for f in perfil.filas('filtro')})
+        for fila in perfil.filas():
+            self.assertLessEqual(fila['propio_ms'], fila['total_ms'] + 0.001)
+
+    def test_middleware_y_vista(self):
+        self.client.get(reverse('musica:quienes_somos'))
+        self.assertEqual(self.client.get('/metricas/templates/').status_code, 403)
+        datos = self.client.get('/metricas/templates/', {'tipo': 'template'}, HTTP_AUTHORIZATION='Bearer secreto').json()
+        self.assertEqual(datos['requests'], 1)
+        self.assertIn('musica/quienes_somos.html', [f['nombre'] for f in datos['filas']])
+
+    @override_settings(TEMPLATES_PERFIL=0)
+    def test_sin_perfil_no_se_usa(self):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        with self.assertRaises(MiddlewareNotUsed):
+            plantillas.PerfilMiddleware(lambda request: None)
+
+    def test_precompilar(self):
+        resultado = {nombre: error for nombre, _s, error in plantillas.precompilar()}
+        self.assertIn('musica/base.html', resultado)
+        self.assertIn('musica/_tarjeta.html', resultado)
+        self.assertEqual([n for n, error in resultado.items() if error], [])
+        salida = StringIO()
+        call_command('precompilar_templates', stdout=salida)
+        self.assertIn('Todos los templates compilan', salida.getvalue())
+
+
+class ArranqueTests(TestCase):
+
+    @override_settings(PRECARGA=True, TEMPLATES_PRECOMPILAR=True)
+    def test_precarga(self):
+        with mock.patch.object(os, 'register_at_fork') as fork, self.assertLogs('blogmusica.arranque', 'INFO'):
+            tiempos = arranque.precargar()
+        self.assertEqual(list(tiempos), ['urls', 'cache', 'base de datos', 'templates'])
+        fork.assert_called_once()
+        self.assertTrue(connection.is_usable())
+
+    @override_settings(PRECARGA=False, TEMPLATES_PRECOMPILAR=False)
+    def test_sin_precarga(self):
+        self.assertEqual(arranque.precargar(), {})
+
+    def test_leer_importtime(self):
+        texto = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     PIL._version\n'
+            'import time:     26825 |      26945 |   PIL.Image\n'
+            'import time:       382 |      27327 | musica.imagenes\n'
+        )
+        modulos = arranque.leer_importtime(texto)
+        self.assertEqual(modulos[1], ('PIL.Image', 26825, 26945, 1))
+        self.assertEqual(arranque.por_paquete(modulos), {'PIL': 26945, 'musica': 382})
+
+    def test_sin_exportacion_al_arrancar(self):
+        script = (
+            "import sys, django; django.setup(); import blogmusica.urls; "
+            "print(' '.join(m for m in ('musica.cambios', 'musica.catalogo', 'musica.semillas') if m in sys.modules))"
+        )
+        proceso = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'blogmusica.settings'},
+        )
+        self.assertEqual(proceso.stdout.strip(), '')
+
+    def test_vistas_de_auth_perezosas(self):
+        response = self.client.post(reverse('musica:register'), {
+            'username': 'nueva', 'password1': 'clave-larga-123', 'password2': 'clave-larga-123',
+        })
+        self.assertRedirects(response, reverse('musica:inicio'), fetch_redirect_response=False)
+        self.assertTrue(User.objects.filter(username='nueva').exists())
+        self.assertEqual(self.client.get(reverse('musica:register')).status_code, 302)  # ya logueada
+        self.client.post(reverse('musica:logout'))
+        self.assertContains(self.client.get(reverse('musica:login')), 'csrfmiddlewaretoken')
+
+
+class BasedatosTests(TestCase):
+
+    def _conexion_nueva(self, directorio):
+        """Conexión nueva (dispara connection_created) a una base en archivo: la de los tests está en memoria."""
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        conexion = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directorio, 'db.sqlite3')}, 'prueba')
+        conexion.ensure_connection()
+        self.addCleanup(conexion.close)
+        return lambda pragma: conexion.connection.execute(f'PRAGMA {pragma}').fetchone()[0]
+
+    def test_pragmas_en_cada_conexion(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            pragma = self._conexion_nueva(directorio)
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+            self.assertEqual(pragma('busy_timeout'), 5000)
+            self.assertEqual(pragma('cache_size'), -20000)
+            self.assertEqual(pragma('mmap_size'), 128 * 1024 * 1024)
+            self.assertEqual(pragma('temp_store'), 2)  # MEMORY
+        self.assertEqual(basedatos.estado()['busy_timeout'], 5000)  # también la de los tests
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'DELETE', 'synchronous': 'FULL'})
+    def test_pragmas_de_settings(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            pragma = self._conexion_nueva(directorio)
+            self.assertEqual(pragma('journal_mode'), 'delete')
+            self.assertEqual(pragma('synchronous'), 2)
+
+    def test_conexiones_persistentes_e_immediate(self):
+        ajustes = connection.settings_dict
+        self.assertTrue(ajustes['CONN_HEALTH_CHECKS'])
+        self.assertEqual(ajustes['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+
+@override_settings(MUSICA_REPLICAS=['replica'], MUSICA_CACHE_PAGINAS=0)
+class ReplicasTests(TransactionTestCase):
+    """La réplica es una copia en archivo de la base de prueba, que sólo se actualiza con replicas.copiar()."""
+
+    # El alias se agrega después de preparar la clase: el runner no crea una base de prueba para él.
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._directorio = tempfile.mkdtemp()
+        connections.settings['replica'] = {
+            **connection.settings_dict,
+            'NAME': os.path.join(cls._directorio, 'replica.sqlite3'),
+            'OPTIONS': {'init_command': 'PRAGMA query_only = ON'},
+        }
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.databases = {'default'}
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(cls._directorio, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('lector', password='x')
+        self.nota = NotaBlog.objects.create(titulo='Nota', contenido='Texto')
+        replicas.copiar('replica')
+        self.url = reverse('musica:nota_detalle', kwargs={'pk': self.nota.pk})
+
+    def _get(self, client, url):
+        with CaptureQueriesContext(connections['replica']) as en_replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(en_replica)
+
+    def test_vistas_de_contenido_leen_de_la_replica(self):
+        for nombre in ('inicio', 'ingresos', 'lista_artistas', 'lista_conciertos'):
+            _response, en_replica = self._get(self.client, reverse(f'musica:{nombre}'))
+            self.assertGreater(en_replica, 0, nombre)
+        # Lo que no es contenido (ni un GET de contenido) va a la primaria.
+        for url in (reverse('musica:api_cambios'), reverse('musica:quienes_somos')):
+            self.assertEqual(self._get(self.client, url)[1], 0, url)
+        with self.assertRaises(OperationalError):  # la réplica es de sólo lectura
+            Artista.objects.using('replica').create(nombre='X')
+
+    def test_quien_escribe_lee_de_la_primaria(self):
+        autor, otro = self.client_class(), self.client_class()
+        autor.force_login(self.usuario)
+
+        response = autor.post(self.url, {'contenido': 'Mi comentario nuevo'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[replicas.COOKIE]['max-age'], 10)
+
+        response, en_replica = self._get(autor, self.url)
+        self.assertEqual(en_replica, 0)
+        self.assertContains(response, 'Mi comentario nuevo')
+
+        # Los demás leen de la réplica, con su atraso, hasta la próxima copia.
+        response, en_replica = self._get(otro, self.url)
+        self.assertGreater(en_replica, 0)
+        self.assertNotContains(response, 'Mi comentario nuevo')
+        replicas.copiar('replica')
+        self.assertContains(self._get(otro, self.url)[0], 'Mi comentario nuevo')
+
+    def test_sin_replicas_todo_a_la_primaria(self):
+        enrutador = replicas.Enrutador()
+        self.assertIsNone(enrutador.db_for_read(NotaBlog))
+        self.assertEqual(enrutador.db_for_write(NotaBlog), 'default')
+        self.assertFalse(enrutador.allow_migrate('replica', 'musica'))
+        with override_settings(MUSICA_REPLICAS=[]):
+            self.assertIsNone(enrutador.allow_migrate('replica', 'musica'))
+            self.assertEqual(self._get(self.client_class(), reverse('musica:inicio'))[1], 0)
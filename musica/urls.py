@@ -1,18 +1,28 @@
 # musica/urls.py
+from importlib import import_module
+
 from django.urls import path
-from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
 
 app_name = 'musica'
 
+
+def _perezosa(nombre):
+    """Vista de musica/auth_views.py que se importa con su primer request, no al arrancar."""
+    def vista(request, *args, **kwargs):
+        return getattr(import_module('musica.auth_views'), nombre)(request, *args, **kwargs)
+    vista.__name__ = nombre
+    return vista
+
+
 urlpatterns = [
     # Portada
     path('', views.inicio, name='inicio'),
 
     # Auth (coinciden con los {% url %} de base.html)
-    path('ingresar/', auth_views.LoginView.as_view(template_name='musica/login.html'), name='login'),
-    path('salir/', auth_views.LogoutView.as_view(next_page='musica:inicio'), name='logout'),
-    path('registrarse/', views.registro, name='register'),
+    path('ingresar/', _perezosa('login'), name='login'),
+    path('salir/', _perezosa('logout'), name='logout'),
+    path('registrarse/', _perezosa('registro'), name='register'),
 
     # Listados (navbar y extras)
     path('artistas/', views.lista_artistas, name='lista_artistas'),
@@ -24,12 +34,18 @@ urlpatterns = [
 
     # --- Detalles por PK (tus vistas actuales) ---
     path('nota/<int:pk>/', views.nota_detalle, name='nota_detalle'),
+    path('nota/<int:pk>/comentarios/', views.nota_comentarios, name='nota_comentarios'),
     path('artista/<int:pk>/', views.artista_detalle, name='artista_detalle'),
     path('concierto/<int:pk>/', views.concierto_detalle, name='concierto_detalle'),
     path('lanzamiento/<int:pk>/', views.lanzamiento_detalle, name='lanzamiento_detalle'),
     path('recomendacion/<int:pk>/', views.recomendacion_detalle, name='recomendacion_detalle'),
 
-    # --- Aliases por SLUG (compatibilidad con get_absolute_url/plantillas viejas) ---
-    path('nota/<slug:slug>/', views.nota_detalle_slug, name='nota_detail'),
-    path('artista/<slug:slug>/', views.artista_detalle_slug, name='artista_detail'),
+    # --- Por SLUG (URL canónica de get_absolute_url): misma vista, una sola carga ---
+    path('nota/<slug:slug>/', views.nota_detalle, name='nota_detail'),
+    path('artista/<slug:slug>/', views.artista_detalle, name='artista_detail'),
+
+    # --- API JSON de sólo lectura (ver musica/api.py) ---
+    path('api/v1/cambios/', api.lista_cambios, name='api_cambios'),
+    path('api/v1/<str:recurso>/', api.lista, name='api_lista'),
+    path('api/v1/<str:recurso>/<int:pk>/', api.detalle, name='api_detalle'),
 ]
\ No newline at end of file
@@ -2,6 +2,7 @@ from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import DetailView
 from django.contrib.auth.decorators import login_required
 
+from . import comentarios
 from .models import NotaBlog, Comentario
 
 
@@ -24,6 +25,6 @@ def agregar_comentario(request, slug):
     nota = get_object_or_404(NotaBlog, slug=slug)
     if request.method == 'POST':
         contenido = (request.POST.get('contenido') or '').strip()
-        if contenido:
+        if contenido and comentarios.permitido(request.user):
             Comentario.objects.create(nota=nota, autor=request.user, contenido=contenido)
     return redirect(nota.get_absolute_url() + '#comentarios')
\ No newline at end of file